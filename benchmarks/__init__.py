@@ -0,0 +1 @@
+"""Headless benchmark suite for the 8D Report Assistant (run with ``python -m benchmarks.run``)."""
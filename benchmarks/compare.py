@@ -0,0 +1,62 @@
+"""
+Compare two benchmark result files.
+
+    python -m benchmarks.compare OLD.json NEW.json [--threshold 1.2]
+
+Prints the median ratio per benchmark and exits with status 1 when any
+benchmark got slower than ``threshold`` x the old median, so it can gate a
+deploy.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(old, new, threshold):
+    rows, regressions = [], []
+    for name in sorted(set(old["results"]) | set(new["results"])):
+        a = old["results"].get(name)
+        b = new["results"].get(name)
+        if a is None or b is None:
+            rows.append((name, a and a["median_s"], b and b["median_s"], None))
+            continue
+        ratio = b["median_s"] / a["median_s"] if a["median_s"] else float("inf")
+        rows.append((name, a["median_s"], b["median_s"], ratio))
+        if ratio > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def _ms(value):
+    return f"{value * 1000:10.2f}" if value is not None else f"{'-':>10}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=1.2, help="allowed slowdown ratio (default 1.2)")
+    args = parser.parse_args(argv)
+
+    old, new = load(args.old), load(args.new)
+    if old.get("quick") != new.get("quick"):
+        print("warning: comparing a --quick run against a full run", file=sys.stderr)
+
+    rows, regressions = compare(old, new, args.threshold)
+    print(f"{'benchmark':<45} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    for name, a, b, ratio in rows:
+        flag = "  <-- regression" if name in regressions else ""
+        ratio_txt = f"{ratio:7.2f}" if ratio is not None else f"{'n/a':>7}"
+        print(f"{name:<45} {_ms(a)} {_ms(b)} {ratio_txt}{flag}")
+
+    print(f"\n{old['meta']['commit']} -> {new['meta']['commit']}: {len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
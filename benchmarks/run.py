@@ -0,0 +1,966 @@
+"""
+Run the headless benchmark suite and write machine-readable results.
+
+    python -m benchmarks.run                     # full suite
+    python -m benchmarks.run --quick             # fewer repeats, smaller sizes
+    python -m benchmarks.run --only excel        # substring filter on benchmark names
+    python -m benchmarks.compare OLD.json NEW.json
+
+Full-script reruns go through ``streamlit.testing.v1.AppTest`` (no browser);
+pure helpers are called directly. Results are written as JSON to
+``benchmarks/results/<timestamp>-<commit>.json`` unless ``--output`` is given.
+"""
+import argparse
+import datetime
+import gc
+import json
+import logging
+import os
+import pickle
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from benchmarks import synthetic
+from eightd import classify_4m, fuzzy, match_catalog, smart_root_cause_suggestion, suggest_root_cause
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT_PATH = os.path.join(ROOT, "app.backup.py")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+# ---------------------------
+# Timing helpers
+# ---------------------------
+def _summary(samples, **extra):
+    result = {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "mean_s": statistics.fmean(samples),
+        "runs": len(samples),
+    }
+    result.update(extra)
+    return result
+
+
+def time_call(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def time_and_peak(fn, repeat):
+    """Timings from ``repeat`` runs plus the Python-heap peak of one extra traced run."""
+    samples = time_call(fn, repeat)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return samples, peak
+
+
+# ---------------------------
+# Full-script reruns (AppTest)
+# ---------------------------
+def _app_test(state):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(SCRIPT_PATH, default_timeout=600)
+    for key, value in state.items():
+        at.session_state[key] = value
+    return at
+
+
+def _check(at, name):
+    if at.exception:
+        raise RuntimeError(f"{name}: script raised {at.exception[0].value}")
+
+
+def _markdown_bytes(at):
+    """UTF-8 size of all markdown the run emitted (main area and sidebar) — a proxy for per-rerun payload."""
+    return sum(len(m.value.encode("utf-8")) for m in list(at.markdown) + list(at.sidebar.markdown))
+
+
+def bench_reruns(quick):
+    results = {}
+    repeat = 3 if quick else 10
+    for name, spec in synthetic.SESSIONS.items():
+        if quick and name == "heavy":
+            spec = dict(spec, photos=10)
+        state = synthetic.session_state(**spec)
+        at = _app_test(state)
+
+        start = time.perf_counter()
+        at.run()
+        first = time.perf_counter() - start
+        _check(at, name)
+
+        samples = time_call(at.run, repeat)
+        _check(at, name)
+        results[f"rerun.{name}"] = _summary(samples, first_run_s=first, markdown_bytes=_markdown_bytes(at), **spec)
+    return results
+
+
+# Runs in a fresh interpreter: what a new container pays before the first page is on screen
+_COLD_START = """
+import json, sys, time
+started = time.perf_counter()
+import streamlit, eightd.ui
+imported = time.perf_counter() - started
+heavy = sorted(m for m in ("openpyxl", "PIL", "pandas", "numpy", "pyarrow") if m in sys.modules)
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+run_started = time.perf_counter()
+at.run()
+first_run = time.perf_counter() - run_started
+assert not at.exception, at.exception
+print(json.dumps({"import_s": imported, "first_run_s": first_run, "heavy": heavy}))
+"""
+
+
+def bench_cold_start(quick):
+    """Fresh-process import of the page's modules and the first script run (first paint)."""
+    import tempfile
+
+    repeat = 3 if quick else 7
+    samples = []
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, EIGHTD_STORE_PATH=os.path.join(directory, "cold.sqlite3"), PYTHONPATH=ROOT)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            out = subprocess.run(
+                [sys.executable, "-c", _COLD_START, SCRIPT_PATH],
+                capture_output=True, text=True, check=True, cwd=ROOT, env=env,
+            ).stdout
+            sample = json.loads(out.strip().splitlines()[-1])
+            sample["process_s"] = time.perf_counter() - started
+            samples.append(sample)
+    return {
+        "cold_start.import": _summary(
+            [s["import_s"] for s in samples], heavy_modules_loaded=samples[0]["heavy"]
+        ),
+        "cold_start.first_run": _summary([s["first_run_s"] for s in samples]),
+        "cold_start.process": _summary([s["process_s"] for s in samples]),
+    }
+
+
+def _render_whys_script():
+    from eightd import WHY_SECTIONS
+    from eightd.ui import current_report, render_why_section
+
+    report = current_report()
+    for section in WHY_SECTIONS:
+        render_why_section(report.whys[section], section, section, "en")
+
+
+def bench_render_whys(quick):
+    """The three D5 why sections rendered on their own, with growing why lists."""
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    repeat = 3 if quick else 8
+    for count in ([5, 25] if quick else [5, 25, 100]):
+        state = synthetic.session_state(whys_per_section=count, photos=0, text_len=0)
+        at = AppTest.from_function(_render_whys_script, default_timeout=600)
+        for key, value in state.items():
+            at.session_state[key] = value
+        at.run()
+        _check(at, f"render_whys {count}")
+        samples = time_call(at.run, repeat)
+        results[f"render_whys.{count}_per_section"] = _summary(
+            samples, whys=count * 3, selectboxes=len(at.selectbox),
+            options=sum(len(box.options) for box in at.selectbox),
+        )
+    return results
+
+
+# ---------------------------
+# Excel export
+# ---------------------------
+def bench_generate_excel(quick):
+    from eightd.export import generate_excel
+
+    results = {}
+    repeat = 2 if quick else 5
+    for count in ([0, 5, 20] if quick else [0, 5, 20, 50]):
+        report = synthetic.report(whys_per_section=5, photos=count, text_len=400)
+        size = len(generate_excel(report))
+        samples, peak = time_and_peak(lambda: generate_excel(report), repeat)
+        results[f"generate_excel.{count}_photos"] = _summary(
+            samples, photos=count, xlsx_bytes=size, py_peak_kib=round(peak / 1024, 1)
+        )
+    return results
+
+
+def bench_export_queue(quick):
+    """What a page run pays for the download with the export queue: the submit (content digest) only."""
+    from eightd.jobs import ExportQueue
+
+    results = {}
+    repeat = 20 if quick else 100
+    for count in ([5, 20] if quick else [5, 20, 50]):
+        queue = ExportQueue(workers=1)
+        report = synthetic.report(whys_per_section=5, photos=count, text_len=400)
+        started = time.perf_counter()
+        job = queue.submit(report)
+        first_submit = time.perf_counter() - started
+        job.future.result()
+        results[f"export_queue.{count}_photos.submit"] = _summary(
+            time_call(lambda: queue.submit(report), repeat), photos=count,
+            first_submit_ms=round(first_submit * 1e3, 2), export_s=round(job.finished_at - job.started_at, 3),
+        )
+        queue.shutdown()
+    return results
+
+
+def bench_drafts(quick):
+    """AI drafts: a provider call (offline stand-in with a per-word delay) vs. a coalesced or cached repeat."""
+    import tempfile
+
+    from eightd.drafts import ROOT_CAUSE, DraftQueue, OfflineProvider, draft_prompt
+    from eightd.store import ReportStore
+
+    results = {}
+    repeat = 50 if quick else 500
+    delay = 0.002
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReportStore(os.path.join(directory, "bench.sqlite3"))
+        report = synthetic.report(whys_per_section=5, text_len=400)
+        prompt = draft_prompt(report, ROOT_CAUSE, "occ")
+
+        queue = DraftQueue(OfflineProvider(delay=delay), store, rate=10 ** 6)
+        started = time.perf_counter()
+        job = queue.submit(prompt, "bench")
+        job.future.result()
+        results["drafts.provider_call"] = _summary(
+            [time.perf_counter() - started], words=len(job.text.split()), delay_per_word_ms=delay * 1e3,
+        )
+        results["drafts.coalesced_submit"] = _summary(time_call(lambda: queue.submit(prompt, "bench"), repeat))
+        queue.shutdown()
+
+        def restarted():  # a fresh queue (new process): served from the store's draft_cache
+            fresh = DraftQueue(OfflineProvider(delay=delay), store, workers=1)
+            assert fresh.submit(prompt, "bench").cached
+            fresh.shutdown()
+
+        results["drafts.cached_after_restart"] = _summary(time_call(restarted, repeat // 5))
+        store.close()
+    return results
+
+
+def bench_import_excel(quick):
+    """Reading an exported workbook back into an EightD (cells streamed, pictures from the zip)."""
+    from eightd.export import generate_excel
+    from eightd.xlsx_import import import_excel
+
+    results = {}
+    repeat = 3 if quick else 10
+    for count in ([0, 20] if quick else [0, 20, 50]):
+        data = generate_excel(synthetic.report(whys_per_section=5, photos=count, text_len=400))
+        samples, peak = time_and_peak(lambda: import_excel(data), repeat)
+        results[f"import_excel.{count}_photos"] = _summary(
+            samples, photos=count, xlsx_bytes=len(data), py_peak_kib=round(peak / 1024, 1)
+        )
+    return results
+
+
+# ---------------------------
+# Session model footprint
+# ---------------------------
+def bench_model(quick):
+    """Pickled size and pickle/unpickle time of the session report (attachment bytes excluded)."""
+    results = {}
+    repeat = 20 if quick else 200
+    for name, spec in synthetic.SESSIONS.items():
+        report = synthetic.report(**dict(spec, photos=0))
+        blob = pickle.dumps(report, protocol=pickle.HIGHEST_PROTOCOL)
+        samples = time_call(lambda: pickle.loads(pickle.dumps(report, protocol=pickle.HIGHEST_PROTOCOL)), repeat)
+        results[f"model.pickle_roundtrip.{name}"] = _summary(samples, pickled_bytes=len(blob))
+    return results
+
+
+# ---------------------------
+# Workspace switching
+# ---------------------------
+def bench_workspace(quick):
+    """Switching the active report with growing numbers of open (parked) reports."""
+    import tempfile
+
+    from eightd.spool import AttachmentSpool
+    from eightd.workspace import Workspace
+
+    results = {}
+    repeat = 20 if quick else 100
+    with tempfile.TemporaryDirectory() as spool_dir:
+        spool = AttachmentSpool(spool_dir)
+        for count in ([2, 10] if quick else [2, 10, 50]):
+            workspace = Workspace(synthetic.report(**synthetic.SESSIONS["typical"]), spool=spool)
+            for seed in range(1, count):
+                workspace.new(synthetic.report(**synthetic.SESSIONS["typical"], seed=seed))
+            ids = workspace.ids
+            turn = iter(range(10 ** 9))
+            samples = time_call(lambda: workspace.switch(ids[next(turn) % count]), repeat)
+            results[f"workspace.switch.{count}_open"] = _summary(
+                samples, reports=count, parked_bytes=workspace.parked_bytes()
+            )
+    return results
+
+
+# ---------------------------
+# Report store and analytics aggregates
+# ---------------------------
+def _dashboard(store):
+    from eightd import analytics
+
+    counts = analytics.category_counts(store)
+    analytics.pareto(counts)
+    analytics.trend(counts)
+    analytics.top_items(store)
+    analytics.close_times(store)
+
+
+_STORE_START = datetime.datetime(2024, 1, 1).timestamp()
+_MONTH = 30 * 86400
+
+
+def _populate_store(store, count, batch=500):
+    """``count`` closed synthetic reports spread over 24 months; returns the seconds spent saving."""
+    began = time.perf_counter()
+    for first in range(0, count, batch):
+        items = [
+            (f"bench-{i}", synthetic.report(whys_per_section=5, text_len=120, seed=i))
+            for i in range(first, min(first + batch, count))
+        ]
+        store.save_many(items, now=_STORE_START + (first // batch) % 24 * _MONTH)
+    return time.perf_counter() - began
+
+
+def bench_analytics(quick):
+    """Saving into the store (with incremental aggregates) and building the dashboard frames over it."""
+    import tempfile
+
+    from eightd.store import ReportStore
+
+    results = {}
+    count = 2000 if quick else 50000
+    start, month = _STORE_START, _MONTH
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReportStore(os.path.join(directory, "bench.sqlite3"))
+        elapsed = _populate_store(store, count)
+        results["analytics.bulk_save"] = _summary(
+            [elapsed], reports=count, reports_per_s=round(count / elapsed, 1),
+            db_bytes=os.path.getsize(store.path),
+        )
+
+        report = synthetic.report(whys_per_section=5, text_len=120, seed=1)
+        turn = iter(range(10 ** 9))
+
+        def resave():
+            report.whys["occ"][0].item_id = ("occ-1.1", "occ-2.1")[next(turn) % 2]
+            store.save("bench-1", report, now=start + 3 * month)
+
+        results["analytics.incremental_save"] = _summary(time_call(resave, 20 if quick else 100), reports=count)
+        results["analytics.dashboard"] = _summary(time_call(lambda: _dashboard(store), 3 if quick else 10), reports=count)
+        store.close()
+    return results
+
+
+# ---------------------------
+# New 8D from a template
+# ---------------------------
+def bench_templates(quick):
+    """New 8D from a saved report with many photos: full load + deepcopy vs. clone with attachments by digest."""
+    import copy
+    import tempfile
+
+    from eightd import templates
+    from eightd.store import ReportStore
+
+    results = {}
+    repeat = 5 if quick else 20
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReportStore(os.path.join(directory, "bench.sqlite3"))
+        for count in ([5, 20] if quick else [5, 20, 50]):
+            source = synthetic.report(whys_per_section=5, photos=count, text_len=400, seed=count)
+            store.save(f"src{count}", source)
+            photo_bytes = sum(a.size for _, a in source.attachments())
+            results[f"templates.{count}_photos.deepcopy"] = _summary(
+                time_call(lambda: copy.deepcopy(store.load(f"src{count}")), repeat), photos=count, photo_bytes=photo_bytes,
+            )
+            results[f"templates.{count}_photos.clone"] = _summary(
+                time_call(lambda: templates.clone_report(store.load(f"src{count}", with_data=False)), repeat),
+                photos=count, photo_bytes=photo_bytes,
+            )
+        for i in range(200):
+            store.save_template(f"t{i}", f"Template {i} {synthetic.report(seed=i).step('D1').answer[:20]}", source)
+        entries = templates.template_entries(store)
+        results["templates.search_200"] = _summary(
+            time_call(lambda: templates.search(entries, "template 1"), repeat * 20), entries=len(entries),
+        )
+        store.close()
+    return results
+
+
+# ---------------------------
+# Evidence package
+# ---------------------------
+def bench_bundle(quick):
+    """Evidence ZIP of a report with many photos: streamed from the store vs. built in memory with every file deflated."""
+    import io
+    import tempfile
+    import zipfile
+
+    from eightd import bundle
+    from eightd.export import generate_excel
+    from eightd.model import UPLOAD_STEPS, Attachment
+    from eightd.spool import default_spool
+    from eightd.store import ReportStore
+
+    results = {}
+    repeat = 2 if quick else 5
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReportStore(os.path.join(directory, "bench.sqlite3"))
+        default_spool().sources.append(store.attachment_data)  # the workbook's thumbnails, as with the default store
+        for count in ([20] if quick else [20, 100]):
+            report = synthetic.report(whys_per_section=5, photos=count, text_len=400, seed=count)
+            for step in UPLOAD_STEPS:  # distinct photos, so the store holds each one
+                files = report.step(step).attachments
+                files[:] = [Attachment(a.name, a.mime, a.data + f"{count}-{a.name}".encode()) for a in files]
+            store.save(f"r{count}", report)
+            photo_bytes = sum(a.size for _, a in report.attachments())
+            out_path = os.path.join(directory, "out.zip")
+
+            def streamed():
+                with open(out_path, "wb") as out:
+                    bundle.write_bundle(store.load(f"r{count}", with_data=False), out, "en", store)
+
+            def in_memory():
+                loaded = store.load(f"r{count}")
+                buf = io.BytesIO()
+                with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+                    zf.writestr("report.xlsx", generate_excel(loaded, "en"))
+                    for step, a in loaded.attachments():
+                        zf.writestr(f"{step}/{a.name}", a.getvalue())
+                return buf.getvalue()
+
+            samples, peak = time_and_peak(streamed, repeat)
+            results[f"bundle.{count}_photos.streamed"] = _summary(
+                samples, photo_bytes=photo_bytes, zip_bytes=os.path.getsize(out_path), peak_bytes=peak,
+            )
+            samples, peak = time_and_peak(in_memory, repeat)
+            results[f"bundle.{count}_photos.in_memory"] = _summary(samples, photo_bytes=photo_bytes, peak_bytes=peak)
+        default_spool().sources.remove(store.attachment_data)
+        store.close()
+    return results
+
+
+# ---------------------------
+# Evidence text extraction
+# ---------------------------
+def bench_extract(quick):
+    """Text of uploaded TXT/XLSX evidence: first extraction vs. the digest cache (same process and after a restart)."""
+    import io
+    import tempfile
+
+    from openpyxl import Workbook
+
+    from eightd import extract, templates
+    from eightd.model import Attachment, EightD
+    from eightd.store import ReportStore
+
+    results = {}
+    rows = 5000 if quick else 50000
+    repeat = 3 if quick else 10
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Measurements")
+    for i in range(rows):
+        ws.append([f"P-{i}", "gauge", 10 + (i % 7) / 100, "torque tool calibration" if i % 50 == 0 else "ok"])
+    buf = io.BytesIO()
+    wb.save(buf)
+    files = {
+        "xlsx": Attachment("log.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", buf.getvalue()),
+        "txt": Attachment("log.txt", "text/plain", "\n".join(synthetic.why_corpus(rows)).encode("utf-8")),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReportStore(os.path.join(directory, "bench.sqlite3"))
+        for kind, attachment in files.items():
+            results[f"extract.{kind}.first"] = _summary(
+                time_call(lambda: extract.extract_text(attachment), repeat), file_bytes=attachment.size,
+            )
+            extractor = extract.TextExtractor(store)
+            extractor.submit(attachment).future.result()
+            results[f"extract.{kind}.in_process"] = _summary(time_call(lambda: extractor.submit(attachment), repeat * 100))
+            results[f"extract.{kind}.after_restart"] = _summary(
+                time_call(lambda: extract.TextExtractor(store, workers=1).submit(attachment), repeat * 10),
+            )
+            extractor.shutdown()
+        report = EightD()
+        report.step("D3").attachments += files.values()
+        for i in range(200):
+            store.save(f"r{i}", report if i % 20 == 0 else synthetic.report(seed=i))
+        entries = templates.template_entries(store)
+        results["extract.search_200_reports"] = _summary(
+            time_call(lambda: templates.search(entries, "torque calibration"), repeat * 10), entries=len(entries),
+        )
+        store.close()
+    return results
+
+
+# ---------------------------
+# Unicode normalization
+# ---------------------------
+def bench_normalize(quick):
+    """Normalizing a report's fields on every rerun (memoized vs. not) and a large file streamed vs. read whole."""
+    import tempfile
+    import unicodedata
+
+    from eightd import normalize
+    from eightd.analysis import duplicate_whys
+
+    results = {}
+    repeat = 20 if quick else 100
+    report = synthetic.report(**synthetic.SESSIONS["heavy"])
+    for whys in report.whys.values():
+        for why in whys[::4]:
+            why.other = unicodedata.normalize("NFD", why.other + " calibración")
+
+    def fields(norm):
+        for answer in report.steps.values():
+            for name in ("answer", "occ_answer", "det_answer", "sys_answer"):
+                norm(getattr(answer, name))
+        for whys in report.whys.values():
+            for why in whys:
+                norm(why.other)
+
+    results["normalize.report_fields.memoized"] = _summary(time_call(lambda: fields(normalize.normalize_text), repeat))
+    results["normalize.report_fields.uncached"] = _summary(time_call(lambda: fields(normalize.normalize_chunk), repeat))
+    results["normalize.duplicate_whys"] = _summary(time_call(lambda: duplicate_whys(report), repeat))
+
+    size = (8 if quick else 64) * 1024 * 1024
+    line = unicodedata.normalize("NFD", "Inspección\u00a0de máquina, “lote” 42\n")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "big.txt")
+
+        def write():
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(line * (size // len(line.encode("utf-8"))))
+
+        def whole():
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(normalize.normalize_chunk(text))
+
+        for name, fn in (("streamed", lambda: normalize.normalize_file(path)), ("whole_file", whole)):
+            samples = []
+            for _ in range(1 if quick else 3):
+                write()  # a file with something to change every time
+                samples += time_call(fn, 1)
+            write()
+            tracemalloc.start()
+            try:
+                fn()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            results[f"normalize.file_{size >> 20}mb.{name}"] = _summary(samples, peak_bytes=peak)
+    return results
+
+
+# ---------------------------
+# Change log
+# ---------------------------
+def bench_history(quick):
+    """Rebuilding a long-edited report from the change log: snapshot plus tail vs. replaying every event."""
+    import tempfile
+
+    from eightd import history
+    from eightd.store import ReportStore
+
+    results = {}
+    repeat = 20 if quick else 100
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReportStore(os.path.join(directory, "bench.sqlite3"))
+        report = synthetic.report(whys_per_section=5, text_len=400)
+        edits = 0
+        for count in ([1000, 5000] if quick else [1000, 5000, 20000]):
+            started = time.perf_counter()
+            while edits < count:
+                report.step(("D2", "D4", "D8")[edits % 3]).answer = f"edit {edits}"
+                store.save("long", report, now=_STORE_START + edits, user="bench")
+                edits += 1
+            save_s = (time.perf_counter() - started) / count
+            events, snapshots = store.history_stats()
+            results[f"history.report_at.{count}_edits"] = _summary(
+                time_call(lambda: store.report_at("long"), repeat), events=events, snapshots=snapshots,
+                save_ms=round(save_s * 1e3, 3),
+            )
+
+            def full_replay():
+                _, rows = store.query("SELECT step, field, value FROM report_events WHERE report_id = 'long' ORDER BY seq")
+                history.replay(history.empty_report(), rows)
+
+            results[f"history.full_replay.{count}_edits"] = _summary(time_call(full_replay, max(3, repeat // 10)))
+        store.close()
+    return results
+
+
+# ---------------------------
+# Containment board
+# ---------------------------
+def bench_containment(quick):
+    """The D4 board over every stored report: index range scan vs. deserializing every report body."""
+    import tempfile
+
+    from eightd.model import EightD
+    from eightd.store import OPEN_STATUSES, ReportStore, containments
+    from eightd.texts import location_options, status_options
+
+    results = {}
+    count = 2000 if quick else 50000
+    repeat = 20 if quick else 50
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReportStore(os.path.join(directory, "bench.sqlite3"))
+        for first in range(0, count, 500):
+            items = []
+            for i in range(first, min(first + 500, count)):
+                report = synthetic.report(whys_per_section=5, text_len=120, seed=i)
+                report.step("D4").location = [location_options["en"][i % 4]]
+                report.step("D4").status = [status_options["en"][0 if i % 10 == 0 else 2]]  # one in ten open
+                items.append((f"bench-{i}", report))
+            store.save_many(items, now=_STORE_START + i)
+        board = time_call(lambda: (store.open_containments(), store.containment_counts()), repeat)
+        results["containment.board_index"] = _summary(board, reports=count, open=len(store.open_containments(limit=count)))
+
+        def full_scan():
+            _, rows = store.query("SELECT body FROM reports")
+            return [
+                row for (body,) in rows for row in containments(EightD.from_dict(json.loads(body)))
+                if row[1] in OPEN_STATUSES
+            ]
+
+        results["containment.board_full_scan"] = _summary(time_call(full_scan, 3), reports=count)
+        store.close()
+    return results
+
+
+# ---------------------------
+# Columnar history export
+# ---------------------------
+def bench_columnar(quick):
+    """Parquet export of the stored history and reading the whys table back."""
+    import tempfile
+
+    import pyarrow.dataset as ds
+
+    from eightd.columnar import export_history
+    from eightd.store import ReportStore
+
+    results = {}
+    count = 2000 if quick else 20000
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReportStore(os.path.join(directory, "bench.sqlite3"))
+        _populate_store(store, count)
+        out = os.path.join(directory, "history")
+        samples = time_call(lambda: export_history(out, store, full=True), 2 if quick else 3)
+        whys_dir = os.path.join(out, "whys")
+        parquet_bytes = sum(os.path.getsize(os.path.join(whys_dir, f)) for f in os.listdir(whys_dir))
+        results["columnar.export_full"] = _summary(
+            samples, reports=count, reports_per_s=round(count / statistics.median(samples), 1)
+        )
+        samples = time_call(lambda: ds.dataset(whys_dir).to_table().to_pandas(), 3 if quick else 10)
+        results["columnar.read_whys"] = _summary(samples, reports=count, whys_parquet_bytes=parquet_bytes)
+        store.close()
+    return results
+
+
+# ---------------------------
+# Bulk workbook ingestion
+# ---------------------------
+def bench_ingest(quick):
+    """Bulk import of a directory of exported workbooks: serial vs. the process pool."""
+    import tempfile
+
+    from eightd.export import generate_excel
+    from eightd.ingest import ingest_directory
+    from eightd.store import ReportStore
+
+    results = {}
+    count = 40 if quick else 400
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "in")
+        os.makedirs(source)
+        for i in range(count):
+            data = generate_excel(synthetic.report(whys_per_section=5, photos=i % 3, text_len=400, seed=i))
+            with open(os.path.join(source, f"report{i:05d}.xlsx"), "wb") as f:
+                f.write(data)
+        for workers in sorted({1, os.cpu_count() or 1}):
+            store = ReportStore(os.path.join(directory, f"bench{workers}.sqlite3"))
+            started = time.perf_counter()
+            stats = ingest_directory(source, store, workers=workers)
+            elapsed = time.perf_counter() - started
+            results[f"ingest.{workers}_workers"] = _summary(
+                [elapsed], files=stats.loaded, files_per_s=round(stats.loaded / elapsed, 1)
+            )
+            started = time.perf_counter()
+            ingest_directory(source, store, workers=workers)
+            results[f"ingest.{workers}_workers.rerun"] = _summary([time.perf_counter() - started], files=count)
+            store.close()
+    return results
+
+
+# ---------------------------
+# Shared editing
+# ---------------------------
+def bench_shared(quick):
+    """Editors on one shared report: the stamp poll vs. a full reload, and part commits from threads."""
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    from eightd import shared
+    from eightd.store import ReportStore
+
+    editors = 20
+    rounds = 10 if quick else 50
+    repeat = 200 if quick else 2000
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReportStore(os.path.join(directory, "bench.sqlite3"))
+        report = synthetic.report(whys_per_section=5, photos=2, text_len=400, seed=1)
+        state = shared.share(store, "shared", report, "owner", "owner")
+        sessions = [shared.join(store, "shared", f"editor{i}") for i in range(editors)]
+
+        poll = time_call(lambda: shared.pull(store, state, report), repeat)
+        results["shared.poll"] = _summary(poll, note="stamp unchanged: one primary-key lookup")
+        results["shared.full_reload"] = _summary(time_call(lambda: store.load("shared"), repeat // 10))
+
+        def edit(i):
+            own, theirs = sessions[i]
+            part = shared.PARTS[i % len(shared.PARTS)]  # two editors per part: some conflicts and locks
+            outcome = {"committed": 0, "conflicts": 0}
+            for n in range(rounds):
+                shared.pull(store, theirs, own)
+                if part.startswith("D5."):
+                    own.whys[part[3:]][0].other = f"editor {i} round {n}"
+                else:
+                    own.step(part).answer = f"editor {i} round {n}"
+                outcome["committed"] += len(shared.push(store, theirs, own, f"editor {i}"))
+                if part in theirs.conflicts:
+                    outcome["conflicts"] += 1
+                    shared.keep_mine(theirs, part)
+            return outcome
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(editors) as pool:
+            outcomes = list(pool.map(edit, range(editors)))
+        elapsed = time.perf_counter() - started
+        committed = sum(o["committed"] for o in outcomes)
+        results[f"shared.{editors}_editors"] = _summary(
+            [elapsed], rounds=editors * rounds, commits=committed,
+            conflicts=sum(o["conflicts"] for o in outcomes), commits_per_s=round(committed / elapsed, 1),
+        )
+        store.close()
+    return results
+
+
+# ---------------------------
+# HTTP API
+# ---------------------------
+def bench_api(quick):
+    """Local HTTP API: batched creation, report GETs and XLSX exports answered from the ETag."""
+    import tempfile
+    import threading
+    import urllib.error
+    import urllib.request
+
+    from eightd.api import make_server
+    from eightd.jobs import ExportQueue
+    from eightd.store import ReportStore
+
+    count = 100 if quick else 1000
+    repeat = 50 if quick else 200
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReportStore(os.path.join(directory, "bench.sqlite3"))
+        server = make_server(port=0, store=store, queue=ExportQueue(), token="")
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        def request(method, path, body=None, headers=None):
+            data = json.dumps(body).encode("utf-8") if body is not None else None
+            req = urllib.request.Request(base + path, data=data, method=method, headers=headers or {})
+            try:
+                with urllib.request.urlopen(req) as response:
+                    return response.status, response.headers, response.read()
+            except urllib.error.HTTPError as e:
+                return e.code, e.headers, e.read()
+
+        reports = [
+            {"steps": {step: {"answer": answer.answer} for step, answer in
+                       synthetic.report(whys_per_section=0, text_len=400, seed=i).steps.items() if answer.answer}}
+            for i in range(count)
+        ]
+        started = time.perf_counter()
+        _, _, body = request("POST", "/reports/batch", {"reports": reports})
+        elapsed = time.perf_counter() - started
+        results["api.batch_create"] = _summary([elapsed], reports=count, reports_per_s=round(count / elapsed, 1))
+
+        report_id = json.loads(body)["report_ids"][0]
+        results["api.get_report"] = _summary(time_call(lambda: request("GET", f"/reports/{report_id}"), repeat))
+        _, headers, _ = request("GET", f"/reports/{report_id}/export.xlsx")
+        etag = headers["ETag"]
+        results["api.export.not_modified"] = _summary(time_call(
+            lambda: request("GET", f"/reports/{report_id}/export.xlsx", headers={"If-None-Match": etag}), repeat
+        ))
+        results["api.export.cached"] = _summary(
+            time_call(lambda: request("GET", f"/reports/{report_id}/export.xlsx"), repeat)
+        )
+        server.shutdown()
+        server.server_close()
+        store.close()
+    return results
+
+
+# ---------------------------
+# Keyword classifiers
+# ---------------------------
+def bench_classifiers(quick):
+    corpus = synthetic.why_corpus(1000 if quick else 10000)
+    repeat = 3 if quick else 7
+    groups = [corpus[i:i + 5] for i in range(0, len(corpus), 5)]
+
+    def run_classify():
+        for w in corpus:
+            classify_4m(w)
+
+    def run_classify_cold():
+        classify_4m.cache_clear()
+        run_classify()
+
+    def run_suggest():
+        for g in groups:
+            suggest_root_cause(g)
+
+    def run_smart():
+        for i in range(0, len(groups) - 2, 3):
+            smart_root_cause_suggestion("", groups[i], groups[i + 1], groups[i + 2])
+
+    def run_fuzzy_cold():
+        fuzzy._ranked.cache_clear()
+        for w in corpus:
+            match_catalog(w)
+
+    def run_fuzzy_cached():
+        for w in corpus:
+            match_catalog(w)
+
+    results = {}
+    for name, fn, ops in [
+        ("classify_4m.cold", run_classify_cold, len(corpus)),
+        ("classify_4m", run_classify, len(corpus)),
+        ("match_catalog.cold", run_fuzzy_cold, len(corpus)),
+        ("match_catalog.cached", run_fuzzy_cached, len(corpus)),
+        ("suggest_root_cause", run_suggest, len(groups)),
+        ("smart_root_cause_suggestion", run_smart, len(range(0, len(groups) - 2, 3))),
+    ]:
+        samples = time_call(fn, repeat)
+        results[f"classifiers.{name}"] = _summary(
+            samples, ops=ops, ops_per_s=round(ops / statistics.median(samples), 1)
+        )
+    return results
+
+
+BENCHMARKS = {
+    "cold_start": bench_cold_start,
+    "rerun": bench_reruns,
+    "render_whys": bench_render_whys,
+    "generate_excel": bench_generate_excel,
+    "export_queue": bench_export_queue,
+    "drafts": bench_drafts,
+    "import_excel": bench_import_excel,
+    "model": bench_model,
+    "workspace": bench_workspace,
+    "analytics": bench_analytics,
+    "templates": bench_templates,
+    "bundle": bench_bundle,
+    "extract": bench_extract,
+    "normalize": bench_normalize,
+    "history": bench_history,
+    "containment": bench_containment,
+    "columnar": bench_columnar,
+    "ingest": bench_ingest,
+    "shared": bench_shared,
+    "api": bench_api,
+    "classifiers": bench_classifiers,
+}
+
+
+# ---------------------------
+# Entry point
+# ---------------------------
+def _commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=ROOT, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _metadata():
+    import streamlit
+    import openpyxl
+
+    return {
+        "commit": _commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "streamlit": streamlit.__version__,
+        "openpyxl": openpyxl.__version__,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="fewer repeats and smaller inputs")
+    parser.add_argument("--only", action="append", default=[], help="run only benchmarks whose group contains this")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    meta = _metadata()
+    # Session state set up outside a script run makes Streamlit warn once per key
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    results = {}
+    for group, bench in BENCHMARKS.items():
+        if args.only and not any(o in group for o in args.only):
+            continue
+        print(f"[bench] {group} ...", file=sys.stderr, flush=True)
+        for name, res in bench(args.quick).items():
+            results[name] = res
+            print(f"  {name:<45} median {res['median_s'] * 1000:9.2f} ms", file=sys.stderr)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{meta['commit']}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "quick": args.quick, "results": results}, f, indent=2, sort_keys=True)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Synthetic 8D sessions and why corpora for the benchmarks.
+
+Everything here is deterministic (seeded) so results are comparable across
+commits.
+"""
+import io
+import random
+
+from PIL import Image as PILImage
+
+from eightd import OTHER, UPLOAD_STEPS, WHY_SECTIONS, Attachment, EightD, WhyEntry, catalog_ids, catalog_label
+from eightd.ui import WORKSPACE_KEY
+from eightd.workspace import Workspace
+
+# Free-text fragments that hit (and miss) the keyword classifiers
+_FREE_TEXT_WORDS = [
+    "operator", "skipped", "torque", "check", "because", "training", "was", "not", "updated",
+    "machine", "fixture", "worn", "supplier", "batch", "out", "of", "specification", "inspection",
+    "frequency", "too", "low", "procedure", "unclear", "calibration", "overdue", "humidity",
+    "contamination", "shift", "handover", "missing", "design", "tolerance", "stack-up",
+]
+
+
+# ---------------------------
+# Why corpora
+# ---------------------------
+def why_corpus(size, seed=0, other_ratio=0.3):
+    """Mix of catalog labels and free-text 'Other' whys."""
+    rng = random.Random(seed)
+    labels = [catalog_label(item_id) for section in WHY_SECTIONS for item_id in catalog_ids(section)]
+    corpus = []
+    for _ in range(size):
+        if rng.random() < other_ratio:
+            corpus.append(" ".join(rng.choice(_FREE_TEXT_WORDS) for _ in range(rng.randint(4, 14))))
+        else:
+            corpus.append(rng.choice(labels))
+    return corpus
+
+
+# ---------------------------
+# Attachments
+# ---------------------------
+def photo_bytes(width=1600, height=1200, seed=0):
+    """A noisy JPEG, so it compresses like a real photo rather than a flat colour."""
+    noise = PILImage.effect_noise((width, height), 64 + seed % 32).convert("RGB")
+    buf = io.BytesIO()
+    noise.save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+
+def photo_attachments(count, width=1600, height=1200):
+    """``count`` photo attachments spread round-robin over the upload steps."""
+    per_step = {step: [] for step in UPLOAD_STEPS}
+    data = photo_bytes(width, height) if count else b""
+    for i in range(count):
+        per_step[UPLOAD_STEPS[i % len(UPLOAD_STEPS)]].append(Attachment(f"photo_{i}.jpg", "image/jpeg", data))
+    return per_step
+
+
+# ---------------------------
+# Reports and session states
+# ---------------------------
+def _why_entries(section, count, rng, other_every=4):
+    ids = catalog_ids(section)
+    picked = rng.sample(ids, min(count, len(ids)))
+    entries = []
+    for i in range(count):
+        if i % other_every == other_every - 1 or i >= len(picked):
+            entries.append(WhyEntry(OTHER, " ".join(rng.choice(_FREE_TEXT_WORDS) for _ in range(8))))
+        else:
+            entries.append(WhyEntry(picked[i]))
+    return entries
+
+
+def report(whys_per_section=0, photos=0, text_len=400, seed=0):
+    """An ``EightD`` with every text field about ``text_len`` characters long."""
+    rng = random.Random(seed)
+    text = " ".join(rng.choice(_FREE_TEXT_WORDS) for _ in range(text_len // 6)) if text_len else ""
+    files = photo_attachments(photos)
+
+    r = EightD(report_date="January 01, 2026", prepared_by="bench")
+    for step, answer in r.steps.items():
+        answer.answer = text
+        if step in UPLOAD_STEPS:
+            answer.attachments = files[step]
+        if step == "D3" and text:
+            answer.inspection_stage = ["During Process / Manufacture"]
+        if step == "D4" and text:
+            answer.location = ["Warehouse stock"]
+            answer.status = ["In Progress"]
+        if step in ("D6", "D7"):
+            answer.occ_answer = answer.det_answer = answer.sys_answer = text
+
+    if whys_per_section:
+        for section in WHY_SECTIONS:
+            r.whys[section] = _why_entries(section, whys_per_section, rng)
+    return r
+
+
+def session_state(**spec):
+    """Session state preset for AppTest; an all-zero spec is an empty (fresh) session."""
+    if not any(spec.values()):
+        return {}
+    return {WORKSPACE_KEY: Workspace(report(**spec))}
+
+
+SESSIONS = {
+    "empty": dict(whys_per_section=0, photos=0, text_len=0),
+    "typical": dict(whys_per_section=5, photos=4, text_len=400),
+    "heavy": dict(whys_per_section=40, photos=40, text_len=4000),
+}
@@ -1,14 +1,19 @@
-import re
+"""
+Normalize stray Unicode (no-break spaces, zero-width characters, NFD accents)
+in the app's source files, in place; wrapper around ``eightd.normalize``.
 
-path = "app.py"
+    python clean.py [--check] [PATH...]   (default: app.backup.py, eightd/, pages/)
 
-with open(path, "r", encoding="utf-8") as f:
-    text = f.read()
+Curly quotes are kept: the source uses them on purpose in some UI strings.
+"""
+import sys
 
-# Replace ALL non-breaking spaces with normal spaces
-cleaned = text.replace("\u00A0", " ")
+from eightd.normalize import main
 
-with open(path, "w", encoding="utf-8") as f:
-    f.write(cleaned)
+DEFAULT_PATHS = ["app.backup.py", "eightd", "pages"]
 
-print("All U+00A0 characters removed!")
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if all(arg.startswith("-") for arg in args):
+        args += DEFAULT_PATHS
+    sys.exit(main(["--keep-quotes", *args]))
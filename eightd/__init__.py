@@ -0,0 +1,83 @@
+"""
+8D report domain model and pure logic.
+
+Importable without Streamlit: the page script (``app.backup.py``) is a thin
+view over this package. ``eightd.ui`` holds the Streamlit helpers and
+``eightd.export`` the XLSX writer (it pulls in openpyxl and PIL);
+``eightd.workspace`` holds the open reports of one session, ``eightd.store``
+the saved ones (SQLite) and ``eightd.analytics`` the dashboards over them.
+``eightd.fuzzy`` maps free-text whys onto the catalogs and ``eightd.shared``
+lets several sessions edit one stored report part by part. ``eightd.jobs``
+runs exports on a background queue and ``eightd.api`` serves the store over
+HTTP. ``eightd.drafts`` drafts root causes and actions with an AI provider
+and ``eightd.history`` is the per-field change log of stored reports;
+``eightd.templates`` starts new reports from templates and past reports,
+``eightd.bundle`` streams a report's evidence package (ZIP) and
+``eightd.extract`` reads the text of uploaded TXT/XLSX/PDF evidence.
+``eightd.normalize`` gives text one Unicode form where it enters the app.
+"""
+from eightd.analysis import (
+    classify_4m,
+    completed_steps,
+    duplicate_whys,
+    is_step_filled,
+    root_cause_texts,
+    smart_root_cause_suggestion,
+    suggest_root_cause,
+)
+from eightd.catalogs import (
+    WHY_CATALOGS,
+    catalog_category,
+    catalog_ids,
+    catalog_item,
+    catalog_label,
+    category_ids,
+    category_of,
+    find_catalog_id,
+    search_catalog,
+    why_categories,
+)
+from eightd.fuzzy import CatalogMatch, best_catalog_id, match_catalog
+from eightd.model import (
+    DEFAULT_WHY_SLOTS,
+    OTHER,
+    STEPS,
+    UPLOAD_STEPS,
+    WHY_SECTIONS,
+    Attachment,
+    EightD,
+    StepAnswer,
+    WhyEntry,
+)
+
+__all__ = [
+    "Attachment",
+    "CatalogMatch",
+    "DEFAULT_WHY_SLOTS",
+    "EightD",
+    "OTHER",
+    "STEPS",
+    "StepAnswer",
+    "UPLOAD_STEPS",
+    "WHY_CATALOGS",
+    "WHY_SECTIONS",
+    "WhyEntry",
+    "best_catalog_id",
+    "catalog_category",
+    "catalog_ids",
+    "catalog_item",
+    "catalog_label",
+    "category_ids",
+    "category_of",
+    "classify_4m",
+    "completed_steps",
+    "duplicate_whys",
+    "find_catalog_id",
+    "is_step_filled",
+    "match_catalog",
+    "root_cause_texts",
+    "search_catalog",
+    "smart_root_cause_suggestion",
+    "suggest_root_cause",
+    "why_categories",
+]
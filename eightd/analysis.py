@@ -0,0 +1,233 @@
+"""
+Keyword-based root cause helpers for the D5 why analysis.
+
+All functions are pure: they take plain strings/lists or an ``EightD`` and
+never touch Streamlit. Keywords and duplicates are matched on
+``normalize.match_key`` (Unicode form, case and spacing ignored).
+"""
+from functools import lru_cache
+
+from eightd.model import STEPS, WHY_SECTIONS
+from eightd.normalize import match_key
+
+
+# ---------------------------
+# Root cause suggestion & helper functions
+# ---------------------------
+def suggest_root_cause(whys, lang_key="en"):
+    """
+    Analyze whys (occ/det/sys) and return top 1–3 contributing root cause categories.
+    Supports English and Spanish.
+    """
+    text = " ".join([match_key(w) for w in whys if w.strip()])
+    
+    categories = {
+        "Training / Knowledge": ["training", "knowledge", "human error", "competence", "onboarding", "guidance"],
+        "Equipment / Tooling": ["equipment", "tool", "machine", "fixture", "calibration", "maintenance", "sensor"],
+        "Process / Procedure": ["process", "procedure", "standard", "control plan", "method", "capability", "instructions", "fmea"],
+        "Communication / Info": ["communication", "information", "handover", "feedback", "miscommunication"],
+        "Material / Supplier": ["material", "supplier", "component", "part", "specification", "labeling", "lot"],
+        "Design / Engineering": ["design", "specification", "drawing", "tolerance", "robust", "dfmea", "verification", "validation"],
+        "Management / Resources": ["management", "supervision", "resource", "leadership", "accountability"],
+        "Environment / External": ["temperature", "humidity", "contamination", "environment", "vibration", "power", "esd"]
+    }
+
+    # Count hits per category
+    scores = {cat:0 for cat in categories}
+    for cat, keywords in categories.items():
+        for kw in keywords:
+            scores[cat] += text.count(kw)
+    
+    scored_cats = {k:v for k,v in scores.items() if v > 0}
+    if not scored_cats:
+        return {
+            "en": "No clear root cause suggestion (provide more detailed 5-Whys)",
+            "es": "No hay sugerencia clara de causa raíz (proporcione más detalles en los 5 Porqués)"
+        }[lang_key]
+
+    # Top 3 categories
+    sorted_cats = sorted(scored_cats.items(), key=lambda x: x[1], reverse=True)
+    top_cats = [cat for cat, score in sorted_cats[:3]]
+
+    # Bilingual mapping
+    rc_texts = {
+        "en": {
+            "single": "The root cause is likely related to {0}. Focus your analysis in this area.",
+            "double": "The root cause is likely related to a combination of {0} and {1}. Consider focusing your investigation in these areas.",
+            "triple": "The root cause is likely related to a combination of {0}, and {1}. Focus your analysis on these areas."
+        },
+        "es": {
+            "single": "La causa raíz probablemente está relacionada con {0}. Enfoca tu análisis en esta área.",
+            "double": "La causa raíz probablemente está relacionada con una combinación de {0} y {1}. Considera enfocar tu investigación en estas áreas.",
+            "triple": "La causa raíz probablemente está relacionada con una combinación de {0}, y {1}. Enfoca tu análisis en estas áreas."
+        }
+    }
+
+    if len(top_cats) == 1:
+        return rc_texts[lang_key]["single"].format(top_cats[0])
+    elif len(top_cats) == 2:
+        return rc_texts[lang_key]["double"].format(top_cats[0], top_cats[1])
+    else:
+        return rc_texts[lang_key]["triple"].format(top_cats[0], top_cats[1])
+
+
+@lru_cache(maxsize=8192)
+def classify_4m(text, lang="en"):
+    patterns_en = {
+        "Machine": ["equipment", "machine", "tool", "fixture", "wear", "maintenance", "calibration"],
+        "Method": ["procedure", "process", "assembly", "sequence", "standard", "instruction", "setup"],
+        "Material": ["component", "supplier", "batch", "raw", "contamination", "mix", "specification"],
+        "Measurement": ["inspection", "test", "measurement", "gauge", "criteria", "frequency"]
+    }
+    patterns_es = {
+        "Maquinaria": ["equipo", "máquina", "herramienta", "utillaje", "desgaste", "mantenimiento", "calibración"],
+        "Metodo": ["procedimiento", "proceso", "ensamblaje", "secuencia", "estándar", "instrucción", "configuración"],
+        "Material": ["componente", "proveedor", "lote", "materia prima", "contaminación", "mezcla", "especificación"],
+        "Mediciones": ["inspección", "prueba", "medición", "calibre", "criterio", "frecuencia"]
+    }
+    patterns = patterns_es if lang == "es" else patterns_en
+    text_lower = match_key(text)
+    for m, kws in patterns.items():
+        if any(k in text_lower for k in kws):
+            return m
+    return "Other"
+
+
+# 4M class (or "Detection" / "Systemic" / "Other") -> suggested root causes per
+# language. Replaced in place by a plant file (``eightd.plant``).
+ROOT_CAUSE_SUGGESTIONS = {
+    "Method": {
+        "en": ["Inadequate or missing process control or standard","Incomplete or unclear work instructions / SOPs",
+               "Outdated or obsolete process standards","Incorrect assembly or operation sequence","Missing or ineffective process controls",
+               "Lack of error-proofing (Poka-Yoke)","Variability in process execution between operators or shifts",
+               "Uncommunicated or poorly managed process changes","Process not validated or qualified"],
+        "es": ["Control o estándar de proceso inadecuado o ausente","Instrucciones de trabajo / SOP incompletas o poco claras",
+               "Normas de proceso obsoletas o desactualizadas","Secuencia de montaje o operación incorrecta",
+               "Controles de proceso faltantes o ineficaces","Falta de prevención de errores (Poka-Yoke)",
+               "Variabilidad en la ejecución del proceso entre operadores o turnos","Cambios en el proceso no comunicados o mal gestionados",
+               "Proceso no validado o calificado"]
+    },
+    "Machine": {
+        "en": ["Equipment degradation or lack of preventive maintenance","Improper machine setup or adjustment",
+               "Tooling errors (jigs, fixtures, molds)","Calibration issues","Machine design limitations",
+               "Automation or robotics malfunctions","Unstable process due to equipment variation"],
+        "es": ["Degradación del equipo o falta de mantenimiento preventivo","Configuración o ajuste incorrecto de la máquina",
+               "Errores de herramientas (plantillas, fijaciones, moldes)","Problemas de calibración",
+               "Limitaciones del diseño de la máquina","Fallas en automatización o robótica",
+               "Proceso inestable debido a variación del equipo"]
+    },
+    "Material": {
+        "en": ["Supplier or component quality variation","Incorrect material grade or specifications",
+               "Contaminated raw materials","Substandard or counterfeit components","Improper storage or handling",
+               "Material deterioration over time (aging, corrosion)","Packaging or labeling errors causing wrong part usage",
+               "Inadequate incoming inspection"],
+        "es": ["Variación de calidad de proveedor o componente","Grado o especificación de material incorrecto",
+               "Materias primas contaminadas","Componentes defectuosos o falsificados","Almacenamiento o manipulación inadecuada",
+               "Deterioro del material con el tiempo (envejecimiento, corrosión)","Errores de embalaje o etiquetado causando uso incorrecto",
+               "Inspección entrante inadecuada"]
+    },
+    "Measurement": {
+        "en": ["Insufficient inspection or gauge control","Inaccurate or uncalibrated measuring devices",
+               "Insufficient inspection frequency or sampling","Misinterpretation of measurement results",
+               "Lack of standardization in inspection procedures","Missing or incomplete measurement data",
+               "Undefined or poorly communicated tolerance limits","Measurement method not appropriate for detecting nonconformance"],
+        "es": ["Inspección o control de medidores insuficiente","Dispositivos de medición inexactos o no calibrados",
+               "Frecuencia de inspección o muestreo insuficiente","Mala interpretación de los resultados de medición",
+               "Falta de estandarización en procedimientos de inspección","Datos de medición faltantes o incompletos",
+               "Límites de tolerancia mal definidos o comunicados","Método de medición no adecuado para detectar no conformidades"]
+    },
+    "Detection": {
+        "en": ["Detection method did not identify the nonconformance before shipment",
+               "Inspection procedures not standardized or followed",
+               "Inadequate inspection frequency or sampling plan",
+               "Measurement devices not calibrated or appropriate"],
+        "es": ["El método de detección no identificó la no conformidad antes del envío",
+               "Procedimientos de inspección no estandarizados o no seguidos",
+               "Frecuencia de inspección o plan de muestreo inadecuado",
+               "Dispositivos de medición no calibrados o inadecuados",
+               "Error humano durante la detección o verificación"]
+    },
+    "Systemic": {
+        "en": ["Systemic weakness in management of change or lessons learned","Insufficient training or knowledge management",
+               "Lack of cross-functional communication","Ineffective quality management system",
+               "Inadequate corrective action follow-up or verification"],
+        "es": ["Debilidad sistémica en gestión de cambios o lecciones aprendidas","Capacitación o gestión de conocimiento insuficiente",
+               "Falta de comunicación entre funciones","Sistema de gestión de calidad ineficaz",
+               "Seguimiento o verificación de acciones correctivas inadecuado"]
+    },
+    "Other": {
+        "en": ["Perform deeper investigation","Escalate to cross-functional review"],
+        "es": ["Realizar investigación más profunda","Escalar a revisión interfuncional"]
+    }
+}
+
+
+def smart_root_cause_suggestion(d1_concern, occ_list, det_list, sys_list, lang="en"):
+    if not any([occ_list, det_list, sys_list]):
+        return ("⚠️ No Why analysis provided yet.", "", "") if lang=="en" else ("⚠️ No se ha proporcionado análisis de causas.", "", "")
+    
+    suggestions = ROOT_CAUSE_SUGGESTIONS
+    occ_categories_detected = set(classify_4m(w, lang) for w in occ_list)
+    occ_suggestions, det_suggestions, sys_suggestions = [], [], []
+
+    for cat in occ_categories_detected:
+        if cat in suggestions:
+            occ_suggestions.extend(suggestions[cat][lang])
+        else:
+            occ_suggestions.extend(suggestions["Other"][lang])
+    if det_list:
+        det_suggestions.extend(suggestions["Detection"][lang])
+    if sys_list:
+        sys_suggestions.extend(suggestions["Systemic"][lang])
+
+    # Remove duplicates
+    occ_suggestions = list(dict.fromkeys(occ_suggestions))
+    det_suggestions = list(dict.fromkeys(det_suggestions))
+    sys_suggestions = list(dict.fromkeys(sys_suggestions))
+
+    # Format results
+    occ_result = f"💡 **Possible Occurrence Root Cause Suggestion:** {', '.join(occ_suggestions)}." if occ_suggestions else ("No Occurrence root cause detected yet." if lang=="en" else "No se detectó causa raíz de ocurrencia aún.")
+    det_result = f"💡 **Possible Detection Root Cause Suggestion:** {', '.join(det_suggestions)}." if det_suggestions else ("No Detection root cause detected yet." if lang=="en" else "No se detectó causa raíz de detección aún.")
+    sys_result = f"💡 **Possible Systemic Root Cause Suggestion:** {', '.join(sys_suggestions)}." if sys_suggestions else ("No Systemic root cause detected yet." if lang=="en" else "No se detectó causa raíz sistémica aún.")
+
+    return occ_result, det_result, sys_result
+
+
+# ---------------------------
+# Report-level helpers
+# ---------------------------
+NO_WHYS_TEXT = {
+    "en": "⚠️ No Why analysis provided yet.",
+    "es": "⚠️ No se ha proporcionado análisis de causas.",
+}
+
+
+def root_cause_texts(report, lang="en"):
+    """(occurrence, detection, systemic) suggestion texts for a report's whys."""
+    occ_whys, det_whys, sys_whys = (report.why_texts(s, lang) for s in WHY_SECTIONS)
+    if occ_whys or det_whys or sys_whys:
+        return smart_root_cause_suggestion(report.step("D1").answer, occ_whys, det_whys, sys_whys, lang=lang)
+    text = NO_WHYS_TEXT["es" if lang == "es" else "en"]
+    return text, text, text
+
+
+def duplicate_whys(report, lang="en"):
+    """Why texts that appear more than once across the three D5 sections (the first spelling of each)."""
+    spellings = {}
+    for s in WHY_SECTIONS:
+        for w in report.why_texts(s, lang):
+            spellings.setdefault(match_key(w), []).append(w)
+    return [texts[0] for texts in spellings.values() if len(texts) > 1]
+
+
+def is_step_filled(report, step):
+    if step == "D5":
+        return any(w.text() for s in WHY_SECTIONS for w in report.whys[s])
+    answer = report.step(step)
+    if step in ("D6", "D7"):
+        return any(getattr(answer, f"{s}_answer").strip() for s in WHY_SECTIONS)
+    return answer.answer.strip() != ""
+
+
+def completed_steps(report):
+    return sum(1 for step in STEPS if is_step_filled(report, step))
@@ -0,0 +1,71 @@
+"""
+Dashboard frames over the report store.
+
+Everything here reads the store's small aggregate tables (see
+``eightd.store``), never the report bodies, and shapes them with pandas
+groupbys, so the cost depends on the number of categories and months rather
+than on the number of stored reports.
+"""
+import pandas as pd
+
+from eightd.catalogs import catalog_label
+from eightd.model import STEPS
+from eightd.store import KIND_4M, KIND_CATALOG
+
+SECTION_LABELS = {"occ": "Occurrence", "det": "Detection", "sys": "Systemic"}
+KIND_LABELS = {KIND_4M: "4M", KIND_CATALOG: "Catalog category"}
+
+
+def _frame(store, sql, params=()):
+    columns, rows = store.query(sql, params)
+    return pd.DataFrame(rows, columns=columns)
+
+
+def category_counts(store):
+    """kind, section, category, month, n for every non-zero count."""
+    frame = _frame(store, "SELECT kind, section, category, month, n FROM category_counts WHERE n > 0")
+    return frame.astype({"n": "int64"})  # also when empty (object columns otherwise)
+
+
+def _select(counts, kind, sections):
+    selected = counts[counts["kind"] == kind]
+    if sections:
+        selected = selected[selected["section"].isin(sections)]
+    return selected
+
+
+def pareto(counts, kind=KIND_4M, sections=None):
+    """Categories by count (descending) with their share and cumulative share in percent."""
+    totals = _select(counts, kind, sections).groupby("category")["n"].sum().sort_values(ascending=False)
+    frame = totals.reset_index()
+    total = frame["n"].sum()
+    frame["share_pct"] = (frame["n"] / total * 100).round(1) if total else 0.0
+    frame["cumulative_pct"] = (frame["n"].cumsum() / total * 100).round(1) if total else 0.0
+    return frame
+
+
+def trend(counts, kind=KIND_4M, sections=None, top=8):
+    """Month x category counts for the ``top`` categories (months as rows, oldest first)."""
+    selected = _select(counts, kind, sections)
+    if selected.empty:
+        return pd.DataFrame()
+    keep = selected.groupby("category")["n"].sum().nlargest(top).index
+    selected = selected[selected["category"].isin(keep)]
+    table = selected.pivot_table(index="month", columns="category", values="n", aggfunc="sum", fill_value=0)
+    return table.sort_index()
+
+
+def top_items(store, limit=15, lang="en"):
+    """Most frequently picked D5 catalog items."""
+    frame = _frame(store, "SELECT item_id, n FROM item_counts WHERE n > 0 ORDER BY n DESC LIMIT ?", (limit,))
+    frame["section"] = frame["item_id"].str.split("-").str[0].map(SECTION_LABELS)
+    frame["item"] = [catalog_label(item_id, lang) for item_id in frame["item_id"]]
+    return frame[["section", "item", "n", "item_id"]]
+
+
+def close_times(store):
+    """Average days from opening a report until each step was first filled, in step order."""
+    frame = _frame(store, "SELECT step, n, total_seconds FROM step_close_stats WHERE n > 0")
+    frame["mean_days"] = (frame["total_seconds"] / frame["n"] / 86400).round(2)
+    frame["order"] = frame["step"].map({step: i for i, step in enumerate(STEPS)})
+    return frame.sort_values("order")[["step", "n", "mean_days"]].rename(columns={"n": "reports"})
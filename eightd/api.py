@@ -0,0 +1,595 @@
+"""
+Headless HTTP API over the report store, for systems such as the MES.
+
+    python -m eightd.api [--host 127.0.0.1] [--port 8502] [--store PATH]
+
+Standard library only (``http.server``), one thread per request. Reports are
+the JSON of ``EightD.to_dict``; IDs are the store's. Endpoints:
+
+    GET    /health
+    GET    /reports                          saved reports, newest first
+    POST   /reports                          create one: {report JSON, "report_id"?} -> 201
+    POST   /reports/batch                    create many in one transaction: {"reports": [...]}
+    GET    /reports/{id}                     report JSON (ETag / If-None-Match)
+    PATCH  /reports/{id}                     merge: header fields, per-step fields, whole why sections
+    POST   /reports/{id}/attachments?step=D3&name=photo.jpg   raw file body (Content-Type kept)
+    GET    /reports/{id}/attachments/{digest}
+    GET    /reports/{id}/events?limit=100    change log, newest first (who changed which field, when)
+    GET    /reports/{id}/suggestions?lang=en root-cause suggestion texts, 4M mentions in the evidence
+    POST   /suggestions                      {"text", "section"?} -> closest catalog items and 4M class
+    GET    /reports/{id}/export.xlsx?lang=en (ETag / If-None-Match; ?wait=0 -> 202 while building)
+    GET    /reports/{id}/evidence.zip?lang=en  evidence package (``eightd.bundle``), streamed
+
+Writes are checked against ``If-Match`` when the client sends it (412 if the
+report changed since it read it). A PATCH or upload on a report that is being
+edited in the app (``eightd.shared``) is committed part by part like any
+other editor's change, and refused with 409 while someone holds a changed
+part's lease. Exports go through the export queue (``eightd.jobs``): the
+ETag is the export's content digest, so an unchanged report answers 304
+without being rebuilt, and identical requests share one build. Uploaded
+TXT/XLSX/PDF files are queued for text extraction (``eightd.extract``). Evidence
+packages are not cached: the ZIP is written straight to the socket with
+chunked transfer encoding, attachments read from the store in chunks.
+
+The server listens on localhost by default; with ``$EIGHTD_API_TOKEN`` set
+every request must carry ``Authorization: Bearer <token>``.
+"""
+import argparse
+import hashlib
+import hmac
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+from eightd import bundle, extract, plant, shared
+from eightd.analysis import classify_4m, root_cause_texts
+from eightd.catalogs import catalog_ids, catalog_label
+from eightd.fuzzy import match_catalog
+from eightd.jobs import DONE, FAILED, default_queue, export_key
+from eightd.model import OTHER, STEPS, UPLOAD_STEPS, WHY_SECTIONS, Attachment, EightD, WhyEntry
+from eightd.normalize import normalize_report, normalize_text
+from eightd.store import ReportStore, default_store
+from eightd.texts import inspection_stage_options, location_options, status_options
+from eightd.workspace import new_report_id
+
+API_TOKEN_ENV = "EIGHTD_API_TOKEN"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+MAX_BODY_BYTES = 50 * 1024 * 1024
+MAX_BATCH = 1000
+MAX_LIMIT = 10_000  # rows per list or events page
+EXPORT_WAIT_SECONDS = 60
+API_EDITOR = "api"
+
+_log = logging.getLogger(__name__)
+_TEXT_FIELDS = ("answer", "occ_answer", "det_answer", "sys_answer")
+_LIST_FIELDS = {  # field -> (step, options; values are the English labels)
+    "inspection_stage": ("D3", inspection_stage_options["en"]),
+    "location": ("D4", location_options["en"]),
+    "status": ("D4", status_options["en"]),
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# ---------------------------
+# Report JSON
+# ---------------------------
+def _expect(condition, message):
+    if not condition:
+        raise ApiError(HTTPStatus.BAD_REQUEST, message)
+
+
+def _check_step(step, fields):
+    _expect(step in STEPS, f"unknown step {step!r}")
+    _expect(isinstance(fields, dict), f"steps.{step}: expected an object")
+    for name, value in fields.items():
+        if name == "attachments":
+            raise ApiError(HTTPStatus.BAD_REQUEST, "attachments are uploaded through /reports/{id}/attachments")
+        if name in _TEXT_FIELDS:
+            _expect(isinstance(value, str), f"steps.{step}.{name}: expected a string")
+        elif name in _LIST_FIELDS:
+            field_step, options = _LIST_FIELDS[name]
+            _expect(step == field_step, f"steps.{step}: {name} belongs to {field_step}")
+            _expect(
+                isinstance(value, list) and all(isinstance(v, str) for v in value),
+                f"steps.{step}.{name}: expected a list of strings",
+            )
+            unknown = [v for v in value if v not in options]
+            _expect(not unknown, f"steps.{step}.{name}: unknown option(s) {unknown}; one of {list(options)}")
+        else:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"steps.{step}: unknown field {name!r}")
+
+
+def _check_whys(section, entries):
+    _expect(section in WHY_SECTIONS, f"unknown why section {section!r}")
+    _expect(isinstance(entries, list), f"whys.{section}: expected a list")
+    whys = []
+    for entry in entries:
+        # [item_id, other], {"item_id", "other"} or a bare catalog ID
+        if isinstance(entry, str):
+            entry = [entry]
+        elif isinstance(entry, dict):
+            entry = [entry.get("item_id", ""), entry.get("other", "")]
+        _expect(
+            isinstance(entry, list) and len(entry) <= 2 and all(isinstance(v, str) for v in entry),
+            f"whys.{section}: entries are [item_id, other], {{item_id, other}} or an item ID",
+        )
+        why = WhyEntry(*entry)
+        _expect(
+            why.item_id in ("", OTHER) or why.item_id in catalog_ids(section),
+            f"whys.{section}: unknown catalog item {why.item_id!r}",
+        )
+        whys.append(why)
+    return whys
+
+
+def apply_changes(report, data):
+    """
+    Merge a create / PATCH body into ``report``: header fields replace,
+    step fields replace field by field, why sections replace as a whole.
+    Text is normalized (``eightd.normalize``) on the way in.
+    Raises ``ApiError`` (400) on anything else.
+    """
+    _expect(isinstance(data, dict), "expected a JSON object")
+    unknown = sorted(set(data) - {"report_id", "report_date", "prepared_by", "steps", "whys"})
+    _expect(not unknown, f"unknown field(s) {unknown}")
+    for name in ("report_date", "prepared_by"):
+        if name in data:
+            _expect(isinstance(data[name], str), f"{name}: expected a string")
+            setattr(report, name, data[name])
+    steps = data.get("steps", {})
+    _expect(isinstance(steps, dict), "steps: expected an object")
+    for step, fields in steps.items():
+        _check_step(step, fields)
+        for name, value in fields.items():
+            setattr(report.step(step), name, value)
+    whys = data.get("whys", {})
+    _expect(isinstance(whys, dict), "whys: expected an object")
+    for section, entries in whys.items():
+        report.whys[section] = _check_whys(section, entries)
+    normalize_report(report)
+    return report
+
+
+def report_etag(report):
+    body = json.dumps(report.to_dict(), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return f'"{hashlib.sha256(body.encode("utf-8")).hexdigest()[:24]}"'
+
+
+def _etag_matches(header, etag):
+    return header is not None and (header.strip() == "*" or etag in (v.strip() for v in header.split(",")))
+
+
+# ---------------------------
+# Service
+# ---------------------------
+class ReportService:
+    """The API's operations, independent of HTTP (the handler maps routes onto them)."""
+
+    def __init__(self, store=None, queue=None, extractor=None):
+        self.store = store or default_store()
+        self.queue = queue or default_queue()
+        self.extractor = extractor or (extract.default_extractor() if store is None else extract.TextExtractor(self.store))
+        self._write_lock = threading.Lock()  # load-modify-save of one request at a time
+
+    def _load(self, report_id):
+        report = self.store.load(report_id)
+        if report is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no report {report_id!r}")
+        return report
+
+    def get(self, report_id):
+        return self._load(report_id)
+
+    def create(self, data):
+        report_id = data.get("report_id") if isinstance(data, dict) else None
+        report = apply_changes(EightD(), data)
+        with self._write_lock:
+            report_id = self._new_id(report_id)
+            self.store.save(report_id, report, user=API_EDITOR)
+        return report_id, report
+
+    def create_many(self, items):
+        _expect(isinstance(items, list), "reports: expected a list")
+        _expect(len(items) <= MAX_BATCH, f"at most {MAX_BATCH} reports per batch")
+        reports = []
+        for i, data in enumerate(items):
+            try:
+                reports.append((data.get("report_id") if isinstance(data, dict) else None, apply_changes(EightD(), data)))
+            except ApiError as e:
+                raise ApiError(e.status, f"reports[{i}]: {e.message}") from None
+        with self._write_lock:
+            saved, taken = [], set()
+            for report_id, report in reports:
+                report_id = self._new_id(report_id, taken)
+                taken.add(report_id)
+                saved.append((report_id, report))
+            self.store.save_many(saved, user=API_EDITOR)
+        return saved
+
+    def _new_id(self, report_id, taken=()):
+        if report_id is None:
+            return new_report_id()
+        _expect(isinstance(report_id, str) and re.fullmatch(r"[A-Za-z0-9_.-]{1,64}", report_id),
+                "report_id: 1-64 letters, digits, '_', '.' or '-'")
+        _, rows = self.store.query("SELECT 1 FROM reports WHERE report_id = ?", (report_id,))
+        if report_id in taken or rows:
+            raise ApiError(HTTPStatus.CONFLICT, f"report {report_id!r} already exists")
+        return report_id
+
+    def update(self, report_id, change, if_match=None):
+        """Load, ``change(report)``, check ``If-Match`` and save (or commit the changed shared parts)."""
+        with self._write_lock:
+            report = self._load(report_id)
+            if if_match is not None and not _etag_matches(if_match, report_etag(report)):
+                raise ApiError(HTTPStatus.PRECONDITION_FAILED, "the report changed since it was read")
+            before = {part: shared.part_body(report, part) for part in shared.PARTS}
+            change(report)
+            if self.store.shared_stamp(report_id) is None:
+                self.store.save(report_id, report, user=API_EDITOR)
+                return report
+            rows = {row.part: row for row in self.store.shared_parts(report_id)}
+            changed = {part: body for part in shared.PARTS if (body := shared.part_body(report, part)) != before[part]}
+            now = time.time()
+            for part in changed:
+                row = rows[part]
+                if row.holder not in ("", API_EDITOR) and row.lease_until > now:
+                    raise ApiError(
+                        HTTPStatus.CONFLICT, f"{part} is being edited by {row.editor or 'another user'}; retry later"
+                    )
+            for part, body in changed.items():
+                attachments = () if part.startswith("D5.") else report.step(part).attachments
+                result = self.store.commit_part(
+                    report_id, part, rows[part].version, body, API_EDITOR, API_EDITOR,
+                    now, lease_seconds=0, attachments=attachments,
+                )
+                if result.status != shared.COMMITTED:
+                    raise ApiError(
+                        HTTPStatus.CONFLICT,
+                        f"{part} is being edited by {result.editor or 'another user'}; retry later",
+                    )
+            return self._load(report_id)
+
+    def patch(self, report_id, data, if_match=None):
+        return self.update(report_id, lambda report: apply_changes(report, data), if_match)
+
+    def attach(self, report_id, step, name, mime, data, if_match=None):
+        _expect(step in UPLOAD_STEPS, f"step: one of {', '.join(UPLOAD_STEPS)}")
+        _expect(bool(name), "name: required")
+        _expect(bool(data), "empty file")
+        attachment = Attachment(name=normalize_text(name), mime=mime or "application/octet-stream", data=data)
+        self.update(report_id, lambda report: report.step(step).attachments.append(attachment), if_match)
+        self.extractor.submit(attachment)
+        return attachment
+
+    def attachment(self, report_id, digest):
+        report = self._load(report_id)
+        for _, attachment in report.attachments():
+            if attachment.digest == digest:
+                return attachment
+        raise ApiError(HTTPStatus.NOT_FOUND, f"no attachment {digest!r} in report {report_id!r}")
+
+    def events(self, report_id, limit):
+        self._load(report_id)
+        return [
+            {"seq": e.seq, "at": e.at, "user": e.user, "step": e.step, "field": e.field,
+             "old_hash": e.old_hash, "new_hash": e.new_hash}
+            for e in self.store.events(report_id, limit)
+        ]
+
+    def suggestions(self, report_id, lang):
+        report = self._load(report_id)
+        occ, det, sys_ = root_cause_texts(report, lang)
+        evidence = Counter()
+        for digest in {a.digest for _, a in report.attachments()}:
+            text = self.store.attachment_text(digest)
+            if text:
+                evidence.update(dict(extract.mentions_4m(text, lang)))
+        return {"occ": occ, "det": det, "sys": sys_, "evidence_4m": dict(evidence.most_common())}
+
+    def match(self, data, lang):
+        _expect(isinstance(data, dict) and isinstance(data.get("text"), str), "text: required string")
+        section = data.get("section")
+        _expect(section is None or section in WHY_SECTIONS, f"section: one of {', '.join(WHY_SECTIONS)}")
+        return {
+            "m4": classify_4m(data["text"], lang),
+            "matches": [
+                {"item_id": m.item_id, "label": catalog_label(m.item_id, lang), "score": m.score}
+                for m in match_catalog(data["text"], section)
+            ],
+        }
+
+    def evidence(self, report_id):
+        """The report with its attachment bytes left in the store (``eightd.bundle`` streams them)."""
+        report = self.store.load(report_id, with_data=False)
+        if report is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no report {report_id!r}")
+        return report
+
+    def export(self, report_id, lang, if_none_match=None, wait=True):
+        """(status, job or None, etag): 304 when the client has it, 202 while building, 200 with the job."""
+        report = self._load(report_id)
+        key = export_key(report, lang)
+        etag = f'"{key}"'
+        if _etag_matches(if_none_match, etag):
+            return HTTPStatus.NOT_MODIFIED, None, etag
+        job = self.queue.submit(report, lang, job_id=key)
+        if wait and not job.finished:
+            try:
+                job.future.result(timeout=EXPORT_WAIT_SECONDS)
+            except TimeoutError:
+                pass  # still building: 202, the client polls
+        if job.status == FAILED:
+            raise ApiError(HTTPStatus.INTERNAL_SERVER_ERROR, f"export failed: {job.error}")
+        if job.status != DONE:
+            return HTTPStatus.ACCEPTED, job, etag
+        return HTTPStatus.OK, job, etag
+
+
+# ---------------------------
+# HTTP
+# ---------------------------
+def _content_disposition(name):
+    """``attachment`` header for a client-supplied file name: a plain ASCII ``filename`` plus RFC 5987 ``filename*``."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    ascii_name = re.sub(r'[^A-Za-z0-9 ._()+-]', "_", ascii_name).strip(" .") or "file"
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(name, safe='')}"
+
+
+_ROUTES = [
+    ("GET", re.compile(r"^/health$"), "health"),
+    ("GET", re.compile(r"^/reports$"), "list_reports"),
+    ("POST", re.compile(r"^/reports$"), "create_report"),
+    ("POST", re.compile(r"^/reports/batch$"), "create_reports"),
+    ("GET", re.compile(r"^/reports/(?P<report_id>[^/]+)$"), "get_report"),
+    ("PATCH", re.compile(r"^/reports/(?P<report_id>[^/]+)$"), "patch_report"),
+    ("POST", re.compile(r"^/reports/(?P<report_id>[^/]+)/attachments$"), "add_attachment"),
+    ("GET", re.compile(r"^/reports/(?P<report_id>[^/]+)/attachments/(?P<digest>[0-9a-f]+)$"), "get_attachment"),
+    ("GET", re.compile(r"^/reports/(?P<report_id>[^/]+)/events$"), "get_events"),
+    ("GET", re.compile(r"^/reports/(?P<report_id>[^/]+)/suggestions$"), "get_suggestions"),
+    ("POST", re.compile(r"^/suggestions$"), "match_text"),
+    ("GET", re.compile(r"^/reports/(?P<report_id>[^/]+)/export\.xlsx$"), "export_xlsx"),
+    ("GET", re.compile(r"^/reports/(?P<report_id>[^/]+)/evidence\.zip$"), "evidence_zip"),
+]
+
+
+class _ChunkedBody(io.RawIOBase):
+    """Response body in HTTP/1.1 chunked transfer encoding (wrap in a ``BufferedWriter``)."""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if data:
+            self.wfile.write(b"%x\r\n" % len(data))
+            self.wfile.write(data)
+            self.wfile.write(b"\r\n")
+        return len(data)
+
+    def finish(self):
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "eightd-api"
+    protocol_version = "HTTP/1.1"
+    service = None  # set by make_server
+    token = None
+
+    # --- plumbing ---
+    def log_message(self, format, *args):
+        _log.info("%s %s", self.address_string(), format % args)
+
+    def _send(self, status, body=b"", content_type="application/json", headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status, value, headers=()):
+        self._send(status, json.dumps(value, ensure_ascii=False).encode("utf-8"), headers=headers)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"body over {MAX_BODY_BYTES} bytes")
+        return self.rfile.read(length) if length else b""
+
+    def _json_body(self):
+        try:
+            return json.loads(self._body() or b"null")
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {e}") from None
+
+    def _lang(self):
+        lang = self.query.get("lang", ["en"])[0]
+        _expect(lang in ("en", "es"), "lang: en or es")
+        return lang
+
+    def _limit(self, default):
+        value = self.query.get("limit", [str(default)])[0]
+        try:
+            limit = int(value)
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"limit: an integer, not {value!r}") from None
+        return max(1, min(limit, MAX_LIMIT))
+
+    def _dispatch(self):
+        url = urlsplit(self.path)
+        self.query = parse_qs(url.query)
+        try:
+            if self.token is not None:
+                supplied = self.headers.get("Authorization", "")
+                if not hmac.compare_digest(supplied.encode(), f"Bearer {self.token}".encode()):
+                    raise ApiError(HTTPStatus.UNAUTHORIZED, "missing or wrong bearer token")
+            allowed = []
+            for method, pattern, name in _ROUTES:
+                match = pattern.match(url.path)
+                if match:
+                    if method == self.command:
+                        plant.refresh()
+                        return getattr(self, name)(**match.groupdict())
+                    allowed.append(method)
+            if allowed:
+                raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, f"use {', '.join(allowed)}")
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no route {url.path}")
+        except ApiError as e:
+            self._json(e.status, {"error": e.message})
+        except Exception:
+            _log.exception("%s %s failed", self.command, self.path)
+            self._json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"})
+
+    do_GET = do_POST = do_PATCH = _dispatch
+
+    # --- endpoints ---
+    def health(self):
+        self._json(HTTPStatus.OK, {"status": "ok", "reports": self.service.store.count()})
+
+    def list_reports(self):
+        limit = self._limit(200)
+        self._json(HTTPStatus.OK, {"reports": [
+            {"report_id": rid, "title": title, "report_date": date, "completed": completed, "updated_at": updated}
+            for rid, title, date, completed, updated in self.service.store.list_reports(limit)
+        ]})
+
+    def _report(self, status, report_id, report):
+        self._json(status, {"report_id": report_id, **report.to_dict()}, headers=[("ETag", report_etag(report))])
+
+    def create_report(self):
+        report_id, report = self.service.create(self._json_body())
+        self._report(HTTPStatus.CREATED, report_id, report)
+
+    def create_reports(self):
+        data = self._json_body()
+        _expect(isinstance(data, dict), "expected {\"reports\": [...]}")
+        saved = self.service.create_many(data.get("reports"))
+        self._json(HTTPStatus.CREATED, {"report_ids": [report_id for report_id, _ in saved]})
+
+    def get_report(self, report_id):
+        report = self.service.get(report_id)
+        etag = report_etag(report)
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            return self._send(HTTPStatus.NOT_MODIFIED, headers=[("ETag", etag)])
+        self._report(HTTPStatus.OK, report_id, report)
+
+    def patch_report(self, report_id):
+        report = self.service.patch(report_id, self._json_body(), self.headers.get("If-Match"))
+        self._report(HTTPStatus.OK, report_id, report)
+
+    def add_attachment(self, report_id):
+        attachment = self.service.attach(
+            report_id,
+            self.query.get("step", [""])[0],
+            self.query.get("name", [""])[0],
+            self.headers.get("Content-Type"),
+            self._body(),
+            self.headers.get("If-Match"),
+        )
+        self._json(HTTPStatus.CREATED, attachment.to_dict(), headers=[
+            ("Location", f"/reports/{report_id}/attachments/{attachment.digest}"),
+        ])
+
+    def get_attachment(self, report_id, digest):
+        attachment = self.service.attachment(report_id, digest)
+        self._send(HTTPStatus.OK, attachment.getvalue(), attachment.mime, headers=[
+            ("ETag", f'"{attachment.digest}"'),
+            ("Content-Disposition", _content_disposition(attachment.name)),
+        ])
+
+    def get_events(self, report_id):
+        limit = self._limit(100)
+        self._json(HTTPStatus.OK, {"events": self.service.events(report_id, limit)})
+
+    def get_suggestions(self, report_id):
+        self._json(HTTPStatus.OK, self.service.suggestions(report_id, self._lang()))
+
+    def match_text(self):
+        self._json(HTTPStatus.OK, self.service.match(self._json_body(), self._lang()))
+
+    def export_xlsx(self, report_id):
+        wait = self.query.get("wait", ["1"])[0] != "0"
+        status, job, etag = self.service.export(report_id, self._lang(), self.headers.get("If-None-Match"), wait)
+        if status == HTTPStatus.NOT_MODIFIED:
+            return self._send(status, headers=[("ETag", etag)])
+        if status == HTTPStatus.ACCEPTED:
+            return self._json(status, {"status": job.status, "job_id": job.job_id}, headers=[("Retry-After", "1")])
+        self._send(status, job.data, job.mime, headers=[
+            ("ETag", etag),
+            ("Content-Disposition", _content_disposition(f"8D_Report_{report_id}.xlsx")),
+        ])
+
+    def evidence_zip(self, report_id):
+        lang = self._lang()
+        report = self.service.evidence(report_id)
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", bundle.BUNDLE_MIME)
+        self.send_header("Content-Disposition", _content_disposition(f"8D_Evidence_{report_id}.zip"))
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        body = _ChunkedBody(self.wfile)
+        try:
+            with io.BufferedWriter(body, bundle.CHUNK_SIZE) as out:
+                bundle.write_bundle(report, out, lang, self.service.store, report_id)
+                out.flush()
+                body.finish()
+        except Exception:
+            _log.exception("evidence package of %s failed", report_id)
+            self.close_connection = True  # the status is sent: cut the body short
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, store=None, queue=None, token=None):
+    """
+    A ``ThreadingHTTPServer`` serving the API (``port`` 0 picks a free one).
+    ``token`` defaults to ``$EIGHTD_API_TOKEN``; an empty one turns auth off.
+    """
+    token = os.environ.get(API_TOKEN_ENV) if token is None else token
+    handler = type("BoundApiHandler", (ApiHandler,), {"service": ReportService(store, queue), "token": token or None})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--store", help="SQLite store (default: $EIGHTD_STORE_PATH or data/eightd.sqlite3)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    plant.refresh()
+
+    store = ReportStore(args.store) if args.store else default_store()
+    server = make_server(args.host, args.port, store)
+    print(f"8D API on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
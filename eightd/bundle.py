@@ -0,0 +1,113 @@
+"""
+Evidence package: a ZIP of the report (XLSX and JSON) and every original
+attachment, by step.
+
+    D1/photo.jpg, D3/measurements.xlsx, D7/report.pdf, ...
+    report.xlsx, report.json, manifest.json (name, type, size, sha256 per file)
+
+The ZIP is written as a stream (``write_bundle``): attachments go in chunk
+by chunk (from memory, the spool file or the store's BLOB), so building a
+package of hundreds of MB holds one chunk of evidence at a time, and the
+output may be a socket (the API sends it with chunked transfer encoding)
+or a temporary file. Already-compressed files (JPEG, PNG, GIF, Office
+documents, ZIPs) are stored as they are; everything else is deflated.
+"""
+import json
+import os
+import re
+import tempfile
+import time
+import zipfile
+
+from eightd.export import generate_excel
+from eightd.model import UPLOAD_STEPS
+from eightd.spool import default_spool
+
+CHUNK_SIZE = 1024 * 1024
+BUNDLE_MIME = "application/zip"
+
+# Compressing these again costs CPU for nothing
+STORED_MIMES = ("image/jpeg", "image/png", "image/gif", "application/zip")
+STORED_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".zip", ".xlsx", ".docx", ".pptx")
+
+
+def compress_type(attachment):
+    if attachment.mime in STORED_MIMES or attachment.name.lower().endswith(STORED_EXTENSIONS):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def entry_names(report):
+    """(step, attachment, path in the ZIP): one folder per step, repeated file names numbered."""
+    entries, taken = [], set()
+    for step in UPLOAD_STEPS:
+        for attachment in report.step(step).attachments:
+            name = re.sub(r"[\\/:*?\"<>|\x00-\x1f]", "_", attachment.name).strip(" .") or "file"
+            stem, ext = os.path.splitext(name)
+            path, n = f"{step}/{name}", 1
+            while path.casefold() in taken:
+                n += 1
+                path = f"{step}/{stem} ({n}){ext}"
+            taken.add(path.casefold())
+            entries.append((step, attachment, path))
+    return entries
+
+
+def attachment_chunks(attachment, store=None, chunk_size=CHUNK_SIZE):
+    """The bytes of an attachment in chunks: from memory, else its spool file, else the store's BLOB."""
+    if attachment.is_resident:
+        view = memoryview(attachment.data)
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+        return
+    path = default_spool().path(attachment.digest)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+        return
+    if store is not None:
+        yield from store.attachment_chunks(attachment.digest, chunk_size)
+        return
+    yield attachment.getvalue()
+
+
+def write_bundle(report, out, lang="en", store=None, report_id=""):
+    """Write the evidence package of ``report`` to the binary stream ``out`` (need not be seekable)."""
+    stamp = time.localtime()[:6]
+    entries = entry_names(report)
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        zf.writestr("report.json", json.dumps({"report_id": report_id, **report.to_dict()}, ensure_ascii=False, indent=2))
+        zf.writestr(zipfile.ZipInfo("report.xlsx", stamp), generate_excel(report, lang))  # already deflated
+        manifest = []
+        for step, attachment, path in entries:
+            info = zipfile.ZipInfo(path, stamp)
+            info.compress_type = compress_type(attachment)
+            with zf.open(info, "w", force_zip64=attachment.size >= zipfile.ZIP64_LIMIT) as dest:
+                for chunk in attachment_chunks(attachment, store):
+                    dest.write(chunk)
+            manifest.append({
+                "step": step, "path": path, "name": attachment.name, "mime": attachment.mime,
+                "size": attachment.size, "sha256": attachment.digest,
+            })
+        zf.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+
+
+def bundle_file(report, lang="en", store=None, report_id=""):
+    """
+    The package written to a temporary file and opened for reading (an
+    ``io.BufferedReader``, which ``st.download_button`` accepts); the file
+    is unlinked at once and goes away when it is closed.
+    """
+    fd, path = tempfile.mkstemp(prefix="eightd-bundle-", suffix=".zip")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            write_bundle(report, out, lang, store, report_id)
+        return open(path, "rb")
+    finally:
+        os.unlink(path)
+
+
+def bundle_name(report, lang="en"):
+    return f"8D_Evidence_{report.report_date}.zip" if lang == "en" else f"Evidencias_8D_{report.report_date}.zip"
+
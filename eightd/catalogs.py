@@ -0,0 +1,467 @@
+"""
+D5 why catalogs (occurrence / detection / systemic) in English and Spanish.
+
+The English and Spanish dictionaries are parallel: the same category and
+item positions mean the same thing in both languages. Each item gets a
+language-independent ID ("occ-2.5" = occurrence, 2nd category, 5th item),
+which is what a report stores; labels are looked up per language. Categories
+get IDs the same way ("occ-2"), and ``search_catalog`` looks items up by
+prefix or substring for the D5 picker.
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+
+# ---------------------------
+# Cleaned & Standardized D5 categories
+# ---------------------------
+
+# Occurrence (issues that actually happen in process, material, design, equipment, or environment)
+occurrence_categories = {
+    "Machine / Equipment": [
+        "Equipment malfunction or inadequate maintenance",
+        "Calibration drift or misalignment",
+        "Tooling or fixture wear/damage",
+        "Machine parameters not optimized",
+        "Sensor malfunction or misalignment",
+        "Process automation fault not detected",
+        "Unstable process due to poor machine setup",
+        "Preventive maintenance schedule not followed"
+    ],
+    "Material / Component": [
+        "Incorrect material or component used",
+        "Supplier provided off-spec component",
+        "Material defect not visible during inspection",
+        "Damage during storage, handling, or transport",
+        "Incorrect or missing labeling / lot traceability error",
+        "Material substitution without approval",
+        "Material specification not aligned with requirements"
+    ],
+    "Process / Method": [
+        "Incorrect process step sequence",
+        "Inadequate process control or parameter definition",
+        "Unclear or missing work instructions / procedure",
+        "Process drift over time not detected",
+        "Control plan not followed on production floor",
+        "Incorrect torque, soldering, or assembly process",
+        "Outdated or missing process FMEA linkage",
+        "Process capability (Cp/Cpk) below target",
+        "Lack of standardized process or method"
+    ],
+    "Design / Engineering": [
+        "Design not robust to real-use conditions",
+        "Tolerance stack-up issue not evaluated",
+        "Late design change not communicated to production",
+        "Incorrect or unclear drawing specification",
+        "Component placement design error (DFMEA gap)",
+        "Lack of design verification or validation testing"
+    ],
+    "Environmental / External": [
+        "Temperature or humidity out of control range",
+        "Electrostatic discharge (ESD) not controlled",
+        "Contamination or dust affecting product",
+        "Power fluctuation or interruption",
+        "External vibration or noise interference",
+        "Environmental monitoring process unstable"
+    ]
+}
+
+# Detection (issues in QA, validation, FMEA, test setup, or organizational checks)
+detection_categories = {
+    "QA / Inspection": [
+        "Incomplete or outdated QA checklist",
+        "No automated inspection system in place",
+        "Manual inspection prone to human error",
+        "Inspection frequency too low to detect issue",
+        "Unclear or inconsistent inspection criteria",
+        "Measurement system not capable (GR&R issues)",
+        "Incoming inspection missed recent supplier issue",
+        "Ineffective detection method or gauge design",
+        "Undefined acceptance criteria",
+        "Inadequate automation or sensing",
+        "Final inspection missed due to sampling plan"
+    ],
+    "Validation / Process": [
+        "Process validation not updated after design/process change",
+        "Insufficient verification of new parameters or components",
+        "Design validation incomplete or not representative of real conditions",
+        "Control plan coverage inadequate for potential failure modes",
+        "Ongoing process monitoring missing (SPC / CpK)",
+        "Containment validation ineffective",
+        "Incorrect or outdated process limits"
+    ],
+    "FMEA / Control Plan": [
+        "Failure mode not captured in PFMEA",
+        "Detection controls missing or ineffective in PFMEA",
+        "Control plan not updated after corrective actions",
+        "FMEA not reviewed after customer complaint",
+        "Detection ranking unrealistic to inspection capability",
+        "PFMEA and control plan not properly linked"
+    ],
+    "Test / Equipment": [
+        "Test equipment calibration overdue",
+        "Testing software parameters incorrect",
+        "Test setup cannot detect this failure mode",
+        "Detection threshold too wide to capture failure",
+        "Test data not logged or reviewed regularly"
+    ],
+    "Organizational": [
+        "Feedback loop from quality incidents not implemented",
+        "Weak feedback loop from Production / Quality",
+        "Detection feedback missing in team meetings",
+        "Incoming or in-process audit missing",
+        "Training gaps in inspection/test personnel",
+        "Quality alerts not properly communicated to operators"
+    ]
+}
+
+# Systemic (management, training, SOPs, supplier, quality system)
+systemic_categories = {
+    "Management / Organization": [
+        "Inadequate leadership or supervision",
+        "Insufficient resource allocation",
+        "Delayed response to known production issues",
+        "Lack of accountability or ownership of quality issues",
+        "Ineffective escalation for recurring problems",
+        "Weak cross-functional communication"
+    ],
+    "Process / Procedure": [
+        "SOPs outdated or missing",
+        "Process FMEA not regularly reviewed",
+        "Control plan misaligned with PFMEA or actual process",
+        "Lessons learned not integrated into similar processes",
+        "Inefficient document control system",
+        "Preventive maintenance procedures not standardized"
+    ],
+    "Training": [
+        "No defined training matrix or certification tracking",
+        "New hires not trained on critical control points",
+        "Ineffective training or onboarding process",
+        "Knowledge not shared between shifts/teams",
+        "Competence requirements not clearly defined"
+    ],
+    "Supplier / External": [
+        "Supplier not included in 8D or FMEA review",
+        "Supplier corrective actions not verified",
+        "Incoming material audit process inadequate",
+        "Supplier process changes not communicated to customer",
+        "Long lead time for supplier quality issue closure",
+        "Supplier violation of standards"
+    ],
+    "Quality System / Feedback": [
+        "Internal audits ineffective or incomplete",
+        "Quality KPI tracking not linked to root cause analysis",
+        "Ineffective use of 5-Why or problem-solving tools",
+        "Customer complaints not feeding into design reviews",
+        "Lessons learned not shared or reused",
+        "No systemic review after multiple 8Ds in same area"
+    ]
+}
+
+occurrence_categories_es = {
+    "Máquina / Equipo": [
+        "Mal funcionamiento del equipo o mantenimiento inadecuado",
+        "Deriva de calibración o desalineación",
+        "Desgaste / daño de herramientas o accesorios",
+        "Parámetros de máquina no optimizados",
+        "Mal funcionamiento o desalineación del sensor",
+        "Fallo en automatización del proceso no detectado",
+        "Proceso inestable debido a mala configuración de la máquina",
+        "Programa de mantenimiento preventivo no seguido"
+    ],
+    "Material / Componente": [
+        "Material o componente incorrecto usado",
+        "Componente fuera de especificación por proveedor",
+        "Defecto de material no visible durante inspección",
+        "Daño durante almacenamiento, manipulación o transporte",
+        "Etiquetado incorrecto o faltante / error de trazabilidad de lote",
+        "Sustitución de material sin aprobación",
+        "Especificación de material no alineada con requisitos"
+    ],
+    "Proceso / Método": [
+        "Secuencia de pasos de proceso incorrecta",
+        "Control de proceso o definición de parámetros inadecuada",
+        "Instrucciones de trabajo o procedimiento poco claras o faltantes",
+        "Desviación del proceso no detectada con el tiempo",
+        "Plan de control no seguido en producción",
+        "Proceso de torque, soldadura o ensamblaje incorrecto",
+        "FMEA del proceso desactualizado o faltante",
+        "Capacidad del proceso (Cp/Cpk) por debajo del objetivo",
+        "Falta de estandarización de proceso o método"
+    ],
+    "Diseño / Ingeniería": [
+        "Diseño no robusto a condiciones reales",
+        "Problema de acumulación de tolerancias no evaluado",
+        "Cambio de diseño tardío no comunicado a producción",
+        "Especificación de dibujo incorrecta o poco clara",
+        "Error de colocación de componente (brecha DFMEA)",
+        "Falta de verificación o validación de diseño"
+    ],
+    "Ambiental / Externo": [
+        "Temperatura o humedad fuera del rango de control",
+        "Descarga electrostática (ESD) no controlada",
+        "Contaminación o polvo afectando producto",
+        "Fluctuación o interrupción de energía",
+        "Vibración externa o interferencia de ruido",
+        "Proceso de monitoreo ambiental inestable"
+    ]
+}
+detection_categories_es = {
+    "QA / Inspección": [
+        "Lista de verificación de QA incompleta o desactualizada",
+        "No hay sistema de inspección automatizado",
+        "Inspección manual propensa a errores humanos",
+        "Frecuencia de inspección demasiado baja para detectar problemas",
+        "Criterios de inspección poco claros o inconsistentes",
+        "Sistema de medición no capaz (problemas GR&R)",
+        "Inspección de entrada no detectó problema reciente del proveedor",
+        "Método de detección o diseño de calibrador ineficaz",
+        "Criterios de aceptación indefinidos",
+        "Automatización o sensores inadecuados",
+        "Inspección final fallida debido a plan de muestreo"
+    ],
+    "Validación / Proceso": [
+        "Validación del proceso no actualizada tras cambio de diseño/proceso",
+        "Verificación insuficiente de nuevos parámetros o componentes",
+        "Validación de diseño incompleta o no representativa",
+        "Cobertura del plan de control insuficiente para modos de falla potenciales",
+        "Monitoreo del proceso en curso faltante (SPC / CpK)",
+        "Validación de contención ineficaz",
+        "Límites de proceso incorrectos o desactualizados"
+    ],
+    "FMEA / Plan de Control": [
+        "Modo de falla no capturado en PFMEA",
+        "Controles de detección faltantes o ineficaces en PFMEA",
+        "Plan de control no actualizado después de acciones correctivas",
+        "FMEA no revisada tras queja del cliente",
+        "Clasificación de detección poco realista para la capacidad de inspección",
+        "PFMEA y plan de control no correctamente vinculados"
+    ],
+    "Prueba / Equipos": [
+        "Calibración de equipo de prueba vencida",
+        "Parámetros de software de prueba incorrectos",
+        "Configuración de prueba no detecta este modo de falla",
+        "Umbral de detección demasiado amplio para capturar falla",
+        "Datos de prueba no registrados o revisados regularmente"
+    ],
+    "Organizacional": [
+        "Bucle de retroalimentación de incidentes de calidad no implementado",
+        "Debilidad en el bucle de retroalimentación de Producción / Calidad",
+        "Falta retroalimentación de detección en reuniones de equipo",
+        "Auditoría de entrada o en proceso faltante",
+        "Gaps de entrenamiento en personal de inspección/prueba",
+        "Alertas de calidad no comunicadas correctamente a operadores"
+    ]
+}
+systemic_categories_es = {
+    "Gestión / Organización": [
+        "Liderazgo o supervisión inadecuada",
+        "Asignación insuficiente de recursos",
+        "Respuesta retrasada a problemas de producción conocidos",
+        "Falta de responsabilidad o propiedad sobre problemas de calidad",
+        "Escalamiento ineficaz para problemas recurrentes",
+        "Comunicación interfuncional débil"
+    ],
+    "Proceso / Procedimiento": [
+        "SOPs desactualizados o faltantes",
+        "FMEA de proceso no revisada regularmente",
+        "Plan de control desalineado con PFMEA o proceso real",
+        "Lecciones aprendidas no integradas en procesos similares",
+        "Sistema de control de documentos ineficiente",
+        "Procedimientos de mantenimiento preventivo no estandarizados"
+    ],
+    "Capacitación / Entrenamiento": [
+        "No hay matriz de capacitación definida o seguimiento de certificaciones",
+        "Nuevos empleados no entrenados en puntos críticos de control",
+        "Proceso de entrenamiento o inducción ineficaz",
+        "Conocimiento no compartido entre turnos/equipos",
+        "Requisitos de competencia no claramente definidos"
+    ],
+    "Proveedor / Externo": [
+        "Proveedor no incluido en revisión de 8D o FMEA",
+        "Acciones correctivas de proveedor no verificadas",
+        "Proceso de auditoría de material entrante inadecuado",
+        "Cambios de proceso del proveedor no comunicados al cliente",
+        "Tiempo de cierre de problemas de calidad del proveedor largo",
+        "Proveedor violó estándares"
+    ],
+    "Sistema de Calidad / Retroalimentación": [
+        "Auditorías internas ineficaces o incompletas",
+        "Seguimiento de KPI de calidad no vinculado al análisis de causa raíz",
+        "Uso ineficaz de 5-Why o herramientas de resolución de problemas",
+        "Quejas de clientes no alimentan revisiones de diseño",
+        "Lecciones aprendidas no compartidas o reutilizadas",
+        "No hay revisión sistémica después de múltiples 8Ds en la misma área"
+    ]
+}
+
+WHY_CATALOGS = {
+    "occ": {"en": occurrence_categories, "es": occurrence_categories_es},
+    "det": {"en": detection_categories, "es": detection_categories_es},
+    "sys": {"en": systemic_categories, "es": systemic_categories_es},
+}
+
+
+def why_categories(section, lang="en"):
+    """Category -> items dict for a D5 section ("occ", "det" or "sys")."""
+    return WHY_CATALOGS[section]["es" if lang == "es" else "en"]
+
+
+# ---------------------------
+# Catalog item IDs
+# ---------------------------
+def _build_index():
+    ids = {}      # section -> [item_id, ...] in display order
+    labels = {}   # item_id -> {"en": "Category: Item", "es": "Categoría: Elemento"}
+    lookup = {}   # "Category: Item" (either language) -> item_id
+    categories_by_id = {}  # item_id or category_id -> {"en": "Category", "es": "Categoría"}
+    items = {}    # item_id -> {"en": "Item", "es": "Elemento"}
+    category_ids_by_section = {}  # section -> ["occ-1", ...] in display order
+    for section, by_lang in WHY_CATALOGS.items():
+        ids[section] = []
+        category_ids_by_section[section] = []
+        categories = zip(by_lang["en"].items(), by_lang["es"].items())
+        for ci, ((cat_en, items_en), (cat_es, items_es)) in enumerate(categories, start=1):
+            category_id = f"{section}-{ci}"
+            category_ids_by_section[section].append(category_id)
+            categories_by_id[category_id] = {"en": cat_en, "es": cat_es}
+            for ii, (item_en, item_es) in enumerate(zip(items_en, items_es), start=1):
+                item_id = f"{category_id}.{ii}"
+                ids[section].append(item_id)
+                labels[item_id] = {"en": f"{cat_en}: {item_en}", "es": f"{cat_es}: {item_es}"}
+                items[item_id] = {"en": item_en, "es": item_es}
+                categories_by_id[item_id] = categories_by_id[category_id]
+                lookup.setdefault(labels[item_id]["en"], item_id)
+                lookup.setdefault(labels[item_id]["es"], item_id)
+    return ids, labels, lookup, categories_by_id, items, category_ids_by_section
+
+
+_IDS, _LABELS, _LOOKUP, _CATEGORIES, _ITEMS, _CATEGORY_IDS = _build_index()
+_VERSION = 0
+
+
+def catalog_version():
+    """Bumped by every ``replace_catalogs``; caches derived from the catalogs key on it."""
+    return _VERSION
+
+
+def replace_catalogs(catalogs):
+    """
+    Swap in new why catalogs for the sections given ({section: {"en": {...},
+    "es": {...}}}, validated by the caller) and rebuild the ID tables and
+    search index. Item IDs stay positional, so a saved "occ-2.5" means the
+    5th item of the 2nd category of whatever catalog is loaded.
+    """
+    global _IDS, _LABELS, _LOOKUP, _CATEGORIES, _ITEMS, _CATEGORY_IDS, _VERSION
+    WHY_CATALOGS.update(catalogs)
+    _IDS, _LABELS, _LOOKUP, _CATEGORIES, _ITEMS, _CATEGORY_IDS = _build_index()
+    _search_index.cache_clear()
+    _search.cache_clear()
+    _VERSION += 1
+
+
+def catalog_ids(section):
+    """Item IDs of a D5 section in catalog order."""
+    return _IDS[section]
+
+
+def catalog_label(item_id, lang="en"):
+    """ "Category: Item" label of a catalog ID; unknown IDs are returned unchanged."""
+    labels = _LABELS.get(item_id)
+    return labels["es" if lang == "es" else "en"] if labels else item_id
+
+
+def catalog_item(item_id, lang="en"):
+    """Item text of a catalog ID without its category; unknown IDs are returned unchanged."""
+    items = _ITEMS.get(item_id)
+    return items["es" if lang == "es" else "en"] if items else item_id
+
+
+def catalog_category(item_id, lang="en"):
+    """Category name of a catalog or category ID ("Machine / Equipment"), or None for unknown IDs."""
+    categories = _CATEGORIES.get(item_id)
+    return categories["es" if lang == "es" else "en"] if categories else None
+
+
+def find_catalog_id(label):
+    """Catalog ID of an English or Spanish "Category: Item" label, or None."""
+    return _LOOKUP.get(label.strip())
+
+
+# ---------------------------
+# Categories and item search
+# ---------------------------
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def fold_text(text):
+    """Lower case without accents or punctuation, for matching ("Calibración/Deriva" -> "calibracion deriva")."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def category_ids(section):
+    """Category IDs of a D5 section ("occ-1", "occ-2", ...) in catalog order."""
+    return _CATEGORY_IDS[section]
+
+
+def category_of(item_id):
+    """Category ID of a catalog ID ("occ-2.5" -> "occ-2")."""
+    return item_id.rpartition(".")[0]
+
+
+class _SearchIndex:
+    """
+    The items of one section, folded once. ``words`` is every (word, item
+    position) pair of both languages' labels, sorted, so the items with a word
+    starting with a prefix are one bisect range; ``texts`` are the folded
+    labels for substring matches.
+    """
+    __slots__ = ("ids", "texts", "words", "keys")
+
+    def __init__(self, section):
+        self.ids = catalog_ids(section)
+        self.texts = [f"{fold_text(catalog_label(i, 'en'))} | {fold_text(catalog_label(i, 'es'))}" for i in self.ids]
+        self.words = sorted({(word, pos) for pos, text in enumerate(self.texts) for word in text.split()})
+        self.keys = [word for word, _ in self.words]
+
+    def _prefixed(self, prefix):
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "\uffff", start)
+        return {pos for _, pos in self.words[start:end]}
+
+    def search(self, folded, category):
+        """Positions of matching items: every query word starts a label word first, then plain substrings."""
+        positions = range(len(self.ids))
+        if category:
+            positions = [pos for pos in positions if self.ids[pos].startswith(category + ".")]
+        if not folded:
+            return list(positions)
+        prefixed = set.intersection(*(self._prefixed(word) for word in folded.split()))
+        first = [pos for pos in positions if pos in prefixed]
+        rest = [pos for pos in positions if pos not in prefixed and folded in self.texts[pos]]
+        return first + rest
+
+
+@lru_cache(maxsize=None)
+def _search_index(section):
+    return _SearchIndex(section)
+
+
+@lru_cache(maxsize=1024)
+def _search(section, folded, category):
+    index = _search_index(section)
+    return tuple(index.ids[pos] for pos in index.search(folded, category))
+
+
+def search_catalog(section, query="", category=None, exclude=()):
+    """
+    Item IDs of ``section`` matching ``query`` in either language, optionally
+    within one category ID: items where every query word starts a word of
+    the label come first, then items containing the query anywhere, each in
+    catalog order. An empty query lists the whole section (or category).
+    """
+    matches = _search(section, fold_text(query), category or None)
+    return [item_id for item_id in matches if item_id not in exclude] if exclude else list(matches)
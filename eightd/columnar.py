@@ -0,0 +1,233 @@
+"""
+Columnar (Parquet) export of the saved 8D history for plant-wide analysis.
+
+    python -m eightd.columnar OUT_DIR           # append reports closed since the last run
+    python -m eightd.columnar OUT_DIR --full    # rewrite everything from scratch
+
+Only closed reports (all eight steps filled) are exported, so every report
+is written exactly once. Three tables are written under ``OUT_DIR``, one
+directory each, so that ``pyarrow.dataset`` / pandas / DuckDB / Spark can read
+a directory as one table:
+
+- ``reports/``: one row per report (dates, title, step answers, D3/D4 options);
+- ``whys/``: one row per filled D5 why (catalog ID, category and 4M class as
+  dictionary-encoded columns, free text of "Other" whys);
+- ``actions/``: one row per D6 corrective action and D7 verification.
+
+Reports are read from the store in pages of ``row_group_size`` and every page
+becomes one row group of each table. A run appends one ``part-NNNNN.parquet``
+per table and then advances ``_watermark.json`` (the closing time of the last
+exported report). A run that dies before that is simply repeated: it rewrites
+the same part numbers.
+"""
+import argparse
+import datetime
+import json
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from eightd import plant
+from eightd.catalogs import catalog_label
+from eightd.model import STEPS, WHY_SECTIONS, EightD
+from eightd.store import ReportStore, default_store, why_facts
+
+TABLES = ("reports", "whys", "actions")
+WATERMARK_FILE = "_watermark.json"
+DEFAULT_ROW_GROUP_SIZE = 10_000
+
+_TIMESTAMP = pa.timestamp("ms", tz="UTC")
+_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+SCHEMAS = {
+    "reports": pa.schema([
+        ("report_id", pa.string()),
+        ("created_at", _TIMESTAMP),
+        ("updated_at", _TIMESTAMP),
+        ("closed_at", _TIMESTAMP),
+        ("report_date", pa.string()),
+        ("prepared_by", pa.string()),
+        ("title", pa.string()),
+        ("completed_steps", pa.int8()),
+        ("attachments", pa.int16()),
+        *[(f"{step.lower()}_answer", pa.string()) for step in STEPS if step not in ("D5", "D6", "D7")],
+        ("inspection_stage", pa.list_(_CATEGORY)),
+        ("location", pa.list_(_CATEGORY)),
+        ("status", pa.list_(_CATEGORY)),
+    ]),
+    "whys": pa.schema([
+        ("report_id", pa.string()),
+        ("section", _CATEGORY),
+        ("position", pa.int16()),
+        ("item_id", _CATEGORY),
+        ("item", _CATEGORY),
+        ("category", _CATEGORY),
+        ("m4", _CATEGORY),
+        ("other_text", pa.string()),
+        ("month", _CATEGORY),
+    ]),
+    "actions": pa.schema([
+        ("report_id", pa.string()),
+        ("step", _CATEGORY),
+        ("section", _CATEGORY),
+        ("text", pa.string()),
+    ]),
+}
+
+
+def _timestamp(value):
+    return None if value is None else datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+
+
+def _rows(report_id, created_at, updated_at, closed_at, completed, title, report):
+    """The report's row and its why / action rows, as dicts of column -> value."""
+    d3, d4 = report.step("D3"), report.step("D4")
+    report_row = {
+        "report_id": report_id,
+        "created_at": _timestamp(created_at),
+        "updated_at": _timestamp(updated_at),
+        "closed_at": _timestamp(closed_at),
+        "report_date": report.report_date,
+        "prepared_by": report.prepared_by,
+        "title": title,
+        "completed_steps": completed,
+        "attachments": len(report.attachments()),
+        **{f"{step.lower()}_answer": report.step(step).answer for step in STEPS if step not in ("D5", "D6", "D7")},
+        "inspection_stage": d3.inspection_stage,
+        "location": d4.location,
+        "status": d4.status,
+    }
+    month = datetime.datetime.fromtimestamp(created_at).strftime("%Y-%m")
+    why_rows = [
+        {
+            "report_id": report_id,
+            "section": section,
+            "position": position,
+            "item_id": item_id,
+            "item": catalog_label(item_id) if item_id and not report.whys[section][position].is_other else None,
+            "category": category,
+            "m4": m4,
+            "other_text": report.whys[section][position].other or None,
+            "month": month,
+        }
+        for section, position, item_id, category, m4, _ in why_facts(report, month)
+    ]
+    action_rows = [
+        {"report_id": report_id, "step": step, "section": section, "text": text}
+        for step in ("D6", "D7")
+        for section in WHY_SECTIONS
+        if (text := getattr(report.step(step), f"{section}_answer").strip())
+    ]
+    return report_row, why_rows, action_rows
+
+
+def _table(name, rows):
+    schema = SCHEMAS[name]
+    return pa.Table.from_pydict({f.name: [row[f.name] for row in rows] for f in schema}, schema=schema)
+
+
+def _pages(store, after, page_size):
+    """Pages of closed reports ordered by (closed_at, report_id), strictly after the ``after`` key."""
+    closed_at, report_id = after
+    while True:
+        _, rows = store.query(
+            "SELECT report_id, created_at, updated_at, closed_at, completed, title, body FROM reports"
+            " WHERE closed_at > ? OR (closed_at = ? AND report_id > ?)"
+            " ORDER BY closed_at, report_id LIMIT ?",
+            (closed_at, closed_at, report_id, page_size),
+        )
+        if not rows:
+            return
+        yield rows
+        closed_at, report_id = rows[-1][3], rows[-1][0]
+
+
+def read_watermark(directory):
+    try:
+        with open(os.path.join(directory, WATERMARK_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"after": [0.0, ""], "parts": 0, "reports": 0}
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def export_history(directory, store=None, full=False, row_group_size=DEFAULT_ROW_GROUP_SIZE, compression="zstd"):
+    """
+    Append the reports closed since the last export (every closed report
+    with ``full``) as one new part per table. Returns the number of reports
+    written.
+    """
+    store = store or default_store()
+    if full:
+        for name in (*TABLES, WATERMARK_FILE):
+            path = os.path.join(directory, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.unlink(path)
+    watermark = read_watermark(directory)
+    part = f"part-{watermark['parts']:05d}.parquet"
+
+    writers = {}
+    written = 0
+    after = watermark["after"]
+    try:
+        for page in _pages(store, tuple(after), row_group_size):
+            tables = {name: [] for name in TABLES}
+            for report_id, created_at, updated_at, closed_at, completed, title, body in page:
+                report = EightD.from_dict(json.loads(body))
+                report_row, why_rows, action_rows = _rows(
+                    report_id, created_at, updated_at, closed_at, completed, title, report
+                )
+                tables["reports"].append(report_row)
+                tables["whys"].extend(why_rows)
+                tables["actions"].extend(action_rows)
+            for name, rows in tables.items():
+                if name not in writers:
+                    os.makedirs(os.path.join(directory, name), exist_ok=True)
+                    writers[name] = pq.ParquetWriter(
+                        os.path.join(directory, name, "." + part), SCHEMAS[name], compression=compression
+                    )
+                writers[name].write_table(_table(name, rows))
+            written += len(page)
+            after = [page[-1][3], page[-1][0]]
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    if not written:
+        return 0
+    for name in TABLES:
+        os.replace(os.path.join(directory, name, "." + part), os.path.join(directory, name, part))
+    _write_json(os.path.join(directory, WATERMARK_FILE), {
+        "after": after,
+        "parts": watermark["parts"] + 1,
+        "reports": watermark["reports"] + written,
+    })
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="output directory (reports/, whys/, actions/)")
+    parser.add_argument("--store", help="SQLite store (default: $EIGHTD_STORE_PATH or data/eightd.sqlite3)")
+    parser.add_argument("--full", action="store_true", help="delete previous parts and export everything")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    args = parser.parse_args(argv)
+    plant.refresh()
+
+    store = ReportStore(args.store) if args.store else default_store()
+    written = export_history(args.directory, store, full=args.full, row_group_size=args.row_group_size)
+    print(f"{written} report(s) exported to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
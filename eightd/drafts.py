@@ -0,0 +1,350 @@
+"""
+AI drafts of the D5 root-cause statements and D6 corrective actions.
+
+    queue = default_drafts()
+    job = queue.submit(draft_prompt(report, ROOT_CAUSE, "occ", "en"), user=token)
+    job.text                             # grows as the provider streams tokens
+    job.status                           # queued / running / done / failed
+
+A ``DraftProvider`` streams the text of a draft for a ``DraftPrompt`` (the D1
+concern and the whys of one section). ``OfflineProvider`` builds it locally
+from the keyword suggestions of ``eightd.analysis`` (tests, benchmarks, and
+sites without an API key); ``OpenAIProvider`` asks the OpenAI chat API, with
+the key passed in (the page reads it from Streamlit secrets) or taken from
+``$OPENAI_API_KEY``, never from source. ``$EIGHTD_DRAFT_PROVIDER`` picks one;
+it is offline unless set to ``openai``, so report text only leaves the
+machine when that is asked for explicitly.
+
+Drafts run on a small thread pool, so the page only polls the job. A job's
+ID is a digest of the provider and the prompt's ``match_key`` forms
+(``eightd.normalize``: the same text for the D5 duplicate check and the 4M
+classifier), so the same question from several reruns or sessions coalesces
+onto one call. Finished drafts are kept in the report
+store (``draft_cache``): asking again, after a restart too, is a primary-key
+lookup and costs no API call. Only drafts that reach the provider count
+against the per-user rate limit (``$EIGHTD_DRAFT_RATE`` per minute).
+"""
+import abc
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from eightd.analysis import ROOT_CAUSE_SUGGESTIONS, classify_4m
+from eightd.normalize import match_key, normalize_text
+from eightd.store import default_store
+
+DRAFT_PROVIDER_ENV = "EIGHTD_DRAFT_PROVIDER"
+DRAFT_MODEL_ENV = "EIGHTD_DRAFT_MODEL"
+DEFAULT_DRAFT_MODEL = "gpt-4o-mini"
+DRAFT_RATE_ENV = "EIGHTD_DRAFT_RATE"
+DEFAULT_DRAFT_RATE = 6  # new drafts per user per minute
+DRAFT_WORKERS = 4
+API_KEY_ENV = "OPENAI_API_KEY"
+KEEP_JOBS = 256
+
+ROOT_CAUSE = "root_cause"  # D5: root-cause statement of one why section
+ACTIONS = "actions"        # D6: corrective actions for one root-cause type
+KINDS = (ROOT_CAUSE, ACTIONS)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_log = logging.getLogger(__name__)
+
+_SECTION_NAMES = {
+    "en": {"occ": "occurrence", "det": "detection", "sys": "systemic"},
+    "es": {"occ": "ocurrencia", "det": "detección", "sys": "sistémica"},
+}
+_SECTION_SUGGESTIONS = {"det": "Detection", "sys": "Systemic"}
+
+
+class DraftRateLimited(Exception):
+    """The user asked for more new drafts than the rate limit allows."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"draft rate limit reached, retry in {retry_after:.0f} s")
+        self.retry_after = retry_after
+
+
+# ---------------------------
+# Prompts
+# ---------------------------
+def _clean(text):
+    return " ".join(normalize_text(text).split())
+
+
+@dataclass(frozen=True, slots=True)
+class DraftPrompt:
+    kind: str
+    section: str
+    lang: str
+    concern: str
+    whys: tuple[str, ...]
+
+    def key(self, provider_name):
+        """Job / cache ID: the provider and the normalized prompt."""
+        content = [provider_name, self.kind, self.section, self.lang, match_key(self.concern),
+                   [match_key(w) for w in self.whys]]
+        return hashlib.sha256(json.dumps(content, ensure_ascii=False).encode("utf-8")).hexdigest()[:24]
+
+    def messages(self):
+        """Chat messages asking for the draft."""
+        name = _SECTION_NAMES["en"][self.section]
+        if self.kind == ROOT_CAUSE:
+            task = (f"Write the {name} root-cause statement of an 8D report in one or two sentences, "
+                    "based on the customer concern and the 5-Why chain below.")
+        else:
+            task = (f"Propose two to four corrective actions (D6) that remove the {name} root cause "
+                    "found by the 5-Why chain below, as a short numbered list.")
+        language = "Spanish" if self.lang == "es" else "English"
+        whys = "\n".join(f"Why {i + 1}: {w}" for i, w in enumerate(self.whys)) or "(no whys yet)"
+        return [
+            {"role": "system", "content": f"You are a quality engineer writing 8D reports. Answer in {language}, "
+                                          "without preamble."},
+            {"role": "user", "content": f"{task}\n\nCustomer concern: {self.concern or '(not given)'}\n{whys}"},
+        ]
+
+
+def draft_prompt(report, kind, section, lang="en"):
+    """The prompt for a draft of ``kind`` for one why section of a report."""
+    return DraftPrompt(
+        kind, section, lang, _clean(report.step("D1").answer),
+        tuple(_clean(w) for w in report.why_texts(section, lang)),
+    )
+
+
+# ---------------------------
+# Providers
+# ---------------------------
+class DraftProvider(abc.ABC):
+    """Streams the text of a draft for a prompt, chunk by chunk."""
+
+    name = ""
+
+    @abc.abstractmethod
+    def stream(self, prompt):
+        """Yield the draft's text for ``prompt`` in chunks."""
+
+
+class OfflineProvider(DraftProvider):
+    """Local stand-in: a draft from the keyword suggestions, streamed word by word (``delay`` apart)."""
+
+    name = "offline"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def stream(self, prompt):
+        for i, word in enumerate(_offline_text(prompt).split(" ")):
+            if self.delay:
+                time.sleep(self.delay)
+            yield word if i == 0 else " " + word
+
+
+def _offline_text(prompt):
+    lang = "es" if prompt.lang == "es" else "en"
+    if not prompt.whys:
+        return "Añada primero los porqués de esta sección." if lang == "es" else "Add the whys of this section first."
+    if prompt.section in _SECTION_SUGGESTIONS:
+        categories = [_SECTION_SUGGESTIONS[prompt.section]]
+    else:
+        categories = list(dict.fromkeys(classify_4m(w, lang) for w in prompt.whys))
+    causes = list(dict.fromkeys(
+        cause for c in categories for cause in ROOT_CAUSE_SUGGESTIONS.get(c, ROOT_CAUSE_SUGGESTIONS["Other"])[lang]
+    ))[:3]
+    name = _SECTION_NAMES[lang][prompt.section]
+    last = prompt.whys[-1].rstrip(".")
+    if prompt.kind == ROOT_CAUSE:
+        if lang == "es":
+            return f"Causa raíz de {name}: {last}. Factores probables: {'; '.join(causes)}."
+        return f"The {name} root cause is: {last}. Likely contributing factors: {'; '.join(causes)}."
+    verb = "Eliminar" if lang == "es" else "Eliminate"
+    lines = [f"1. {verb}: {last}."] + [f"{i + 2}. {verb}: {c}." for i, c in enumerate(causes)]
+    return "\n".join(lines)
+
+
+class OpenAIProvider(DraftProvider):
+    """The OpenAI chat completions API, streamed (``openai`` is imported on first use)."""
+
+    def __init__(self, api_key, model=None):
+        self.api_key = api_key
+        self.model = model or os.environ.get(DRAFT_MODEL_ENV) or DEFAULT_DRAFT_MODEL
+        self.name = f"openai:{self.model}"
+        self._client = None
+
+    def stream(self, prompt):
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI(api_key=self.api_key)
+        response = self._client.chat.completions.create(
+            model=self.model, messages=prompt.messages(), stream=True, temperature=0.2, max_tokens=400,
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+def make_provider(name=None, api_key=None):
+    """The provider named by ``name`` / ``$EIGHTD_DRAFT_PROVIDER`` (see the module docstring)."""
+    api_key = api_key or os.environ.get(API_KEY_ENV)
+    name = name or os.environ.get(DRAFT_PROVIDER_ENV) or "offline"
+    if name == "offline":
+        return OfflineProvider()
+    if name == "openai":
+        if not api_key:
+            raise ValueError(f"the openai draft provider needs an API key (secrets or ${API_KEY_ENV})")
+        return OpenAIProvider(api_key)
+    raise ValueError(f"unknown draft provider: {name!r}")
+
+
+# ---------------------------
+# Rate limit
+# ---------------------------
+class RateLimiter:
+    """Token bucket per user: ``rate`` per minute, in bursts of up to ``burst``."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate / 60.0
+        self.burst = burst or max(1, rate)
+        self._buckets = {}  # user -> (tokens, at)
+        self._lock = threading.Lock()
+
+    def acquire(self, user, now=None):
+        """Take one token; returns 0, or the seconds until one is available (nothing taken)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, at = self._buckets.get(user, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - at) * self.rate)
+            if tokens < 1:
+                self._buckets[user] = (tokens, now)
+                return (1 - tokens) / self.rate
+            self._buckets[user] = (tokens - 1, now)
+            return 0.0
+
+
+# ---------------------------
+# Queue
+# ---------------------------
+@dataclass(slots=True)
+class DraftJob:
+    job_id: str
+    kind: str
+    section: str
+    submitted_at: float
+    status: str = QUEUED
+    chunks: list[str] = field(default_factory=list)
+    error: str | None = None
+    cached: bool = False
+    future: object = field(default=None, repr=False)
+
+    @property
+    def text(self):
+        return "".join(list(self.chunks))  # copied first: the worker may be appending
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+
+class DraftQueue:
+    def __init__(self, provider, store=None, workers=DRAFT_WORKERS, rate=None):
+        self.provider = provider
+        self.store = store
+        rate = rate if rate is not None else float(os.environ.get(DRAFT_RATE_ENV) or DEFAULT_DRAFT_RATE)
+        self.limiter = RateLimiter(rate)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="eightd-draft")
+        self._jobs = OrderedDict()  # job_id -> DraftJob, least recently used first
+        self._lock = threading.Lock()
+
+    def _live(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None or job.status == FAILED:
+            return None
+        self._jobs.move_to_end(job_id)
+        return job
+
+    def submit(self, prompt, user=None):
+        """
+        The job drafting ``prompt``: a running or finished one for the same
+        prompt, a finished one from the store's cache, else a new call to the
+        provider. Only the last counts against ``user``'s rate limit and may
+        raise ``DraftRateLimited``.
+        """
+        job_id = prompt.key(self.provider.name)
+        with self._lock:
+            job = self._live(job_id)
+        if job is not None:
+            return job
+        text = self.store.draft_text(job_id) if self.store is not None else None
+        with self._lock:
+            job = self._live(job_id)
+            if job is not None:
+                return job
+            if text is not None:
+                job = DraftJob(job_id, prompt.kind, prompt.section, time.time(), DONE, [text], cached=True)
+            else:
+                wait = self.limiter.acquire(user)
+                if wait:
+                    raise DraftRateLimited(wait)
+                job = DraftJob(job_id, prompt.kind, prompt.section, time.time())
+                job.future = self._pool.submit(self._run, job, prompt)
+            self._jobs[job_id] = job
+            while len(self._jobs) > KEEP_JOBS and next(iter(self._jobs.values())).finished:
+                self._jobs.popitem(last=False)
+            return job
+
+    def get(self, job_id):
+        """The job, or None once it has been dropped (or never existed)."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, prompt):
+        job.status = RUNNING
+        try:
+            for chunk in self.provider.stream(prompt):
+                job.chunks.append(chunk)
+            if self.store is not None:
+                self.store.save_draft(job.job_id, self.provider.name, job.text)
+        except Exception as e:  # reported on the job, the worker thread carries on
+            _log.exception("draft %s failed", job.job_id)
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = FAILED
+        else:
+            job.status = DONE
+
+    def stats(self):
+        """{status: job count} plus how many were served from the cache."""
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            counts["cached"] = sum(job.cached for job in self._jobs.values())
+            return counts
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_drafts(api_key=None, provider=None):
+    """
+    Process-wide draft queue over the default store (provider: ``make_provider``
+    of ``provider`` and ``api_key``; they only matter on the first call).
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = DraftQueue(make_provider(provider, api_key), default_store())
+        return _default
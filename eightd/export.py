@@ -0,0 +1,189 @@
+"""
+XLSX export of an ``EightD`` report.
+
+openpyxl and PIL (with numpy behind openpyxl) are imported inside
+``generate_excel``, not at module level: the page imports this module on
+every cold start (``build_rows``, the export queue), and the workbook is
+built on the export queue's threads, after the first paint.
+"""
+import io
+import os
+
+from eightd.analysis import root_cause_texts
+from eightd.model import UPLOAD_STEPS
+from eightd.spool import default_spool
+from eightd.texts import inspection_stage_options, location_options, status_options, t, translate_option
+
+SHEET_TITLE = {"en": "NPQP 8D Report", "es": "Informe 8D NPQP"}
+WHY_SEPARATOR = " | "
+
+
+def join_whys(texts):
+    """The whys of a section in one cell; a "|" inside a why is written "\\|" (``eightd.xlsx_import`` reads it back)."""
+    return WHY_SEPARATOR.join(text.replace("|", "\\|") for text in texts)
+
+
+# ---------------------------
+# Collect all answers for Excel export
+# ---------------------------
+def build_rows(report, lang="en"):
+    """(step label, answer, extra) rows in the order they appear in the export."""
+    occ_text, det_text, sys_text = root_cause_texts(report, lang)
+    occ_whys, det_whys, sys_whys = (report.why_texts(s, lang) for s in ("occ", "det", "sys"))
+
+    data_rows = []
+    for step in ("D1", "D2", "D3", "D4", "D5", "D6", "D7", "D8"):
+        answer = report.step(step)
+        if step in ("D1", "D2", "D8"):
+            data_rows.append((step, answer.answer.strip(), ""))
+        elif step == "D3":
+            extra = ""
+            if answer.inspection_stage:
+                label = "Inspection Stage(s)" if lang == "en" else "Etapa(s) de Inspección"
+                stages = [translate_option(inspection_stage_options, v, lang) for v in answer.inspection_stage]
+                extra = f"{label}: {', '.join(stages)}"
+            data_rows.append((step, answer.answer, extra))
+        elif step == "D4":
+            locations = [translate_option(location_options, v, lang) for v in answer.location]
+            statuses = [translate_option(status_options, v, lang) for v in answer.status]
+            extra = f"Location(s): {', '.join(locations)} | Status(es): {', '.join(statuses)}"
+            data_rows.append((step, answer.answer, extra))
+        elif step == "D5":
+            data_rows.append(("D5 - Root Cause (Occurrence)", occ_text, join_whys(occ_whys)))
+            data_rows.append(("D5 - Root Cause (Detection)", det_text, join_whys(det_whys)))
+            data_rows.append(("D5 - Root Cause (Systemic)", sys_text, join_whys(sys_whys)))
+        elif step == "D6":
+            data_rows.append(("D6 - Occurrence Countermeasure", answer.occ_answer, ""))
+            data_rows.append(("D6 - Detection Countermeasure", answer.det_answer, ""))
+            data_rows.append(("D6 - Systemic Countermeasure", answer.sys_answer, ""))
+        elif step == "D7":
+            data_rows.append(("D7 - Occurrence Countermeasure Verification", answer.occ_answer, ""))
+            data_rows.append(("D7 - Detection Countermeasure Verification", answer.det_answer, ""))
+            data_rows.append(("D7 - Systemic Countermeasure Verification", answer.sys_answer, ""))
+    return data_rows
+
+
+def _image_bytes(attachment):
+    """The bytes of a picture, read without keeping them on a lazily loaded attachment."""
+    return attachment.data if attachment.is_resident else default_spool().load(attachment.digest)
+
+
+# ---------------------------
+# Excel generation function (bilingual title + color formatting)
+# ---------------------------
+def generate_excel(report, lang="en", logo_path="logo.png"):
+    from openpyxl import Workbook
+    from openpyxl.drawing.image import Image as XLImage
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+    from openpyxl.utils import get_column_letter
+    from PIL import Image as PILImage
+
+    lang_key = "es" if lang == "es" else "en"
+    wb = Workbook()
+    ws = wb.active
+
+    # Bilingual worksheet title
+    ws.title = SHEET_TITLE[lang_key]
+
+    thin = Side(border_style="thin", color="000000")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+    # Add logo if exists
+    if logo_path and os.path.exists(logo_path):
+        try:
+            img = XLImage(logo_path)
+            img.width = 140
+            img.height = 40
+            ws.add_image(img, "A1")
+        except Exception:
+            pass
+
+    # Bilingual main title
+    main_title = "📋 Asistente de Informe 8D" if lang_key == "es" else "📋 8D Report Assistant"
+    ws.merge_cells(start_row=3, start_column=1, end_row=3, end_column=3)
+    ws.cell(row=3, column=1, value=main_title).font = Font(bold=True, size=14)
+
+    # Bilingual header info
+    ws.append([t[lang_key]['Report_Date'], report.report_date])
+    ws.append([t[lang_key]['Prepared_By'], report.prepared_by])
+    ws.append([])
+
+    # Header row
+    header_row = ws.max_row + 1
+    if lang_key == "es":
+        headers = ["Etapa", "Respuesta", "Notas / Comentarios"]
+    else:
+        headers = ["Step", "Answer", "Extra / Notes"]
+
+    fill = PatternFill(start_color="1E90FF", end_color="1E90FF", fill_type="solid")
+    for c_idx, h in enumerate(headers, start=1):
+        cell = ws.cell(row=header_row, column=c_idx, value=h)
+        cell.fill = fill
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+        cell.border = border
+
+    # Color fills for specific root cause categories
+    occ_fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")  # orange
+    det_fill = PatternFill(start_color="32CD32", end_color="32CD32", fill_type="solid")  # green
+    sys_fill = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")  # gray
+
+    # Bilingual keywords for color logic
+    occ_keywords = ["Occurrence", "Ocurrencia"]
+    det_keywords = ["Detection", "Detección"]
+    sys_keywords = ["Systemic", "Sistémica"]
+
+    # Append step answers with bilingual color formatting
+    for step_label, answer_text, extra_text in build_rows(report, lang_key):
+        ws.append([step_label, answer_text, extra_text])
+        r = ws.max_row
+        for c in range(1, 4):
+            cell = ws.cell(row=r, column=c)
+            cell.alignment = Alignment(wrap_text=True, vertical="top")
+            cell.border = border
+            if c == 2:
+                cell.font = Font(bold=True)
+                # Apply bilingual color formatting
+                if any(k in step_label for k in occ_keywords):
+                    cell.fill = occ_fill
+                elif any(k in step_label for k in det_keywords):
+                    cell.fill = det_fill
+                elif any(k in step_label for k in sys_keywords):
+                    cell.fill = sys_fill
+
+    # Insert uploaded images below table
+    last_row = ws.max_row + 2
+    for step in UPLOAD_STEPS:
+        uploaded_files = report.step(step).attachments
+        if uploaded_files:
+            title = f"{step} Archivos / Fotos Adjuntas" if lang_key == "es" else f"{step} Uploaded Files / Photos"
+            ws.cell(row=last_row, column=1, value=title).font = Font(bold=True)
+            last_row += 1
+            for f in uploaded_files:
+                if f.is_image:
+                    try:
+                        img = PILImage.open(io.BytesIO(_image_bytes(f)))
+                        fmt = img.format if img.format in ("JPEG", "PNG", "GIF") else "PNG"
+                        max_width = 300
+                        ratio = max_width / img.width
+                        img = img.resize((int(img.width * ratio), int(img.height * ratio)))
+                        buf = io.BytesIO()
+                        img.save(buf, format=fmt)
+                        excel_img = XLImage(buf)
+                        ws.add_image(excel_img, f"A{last_row}")
+                        last_row += int(img.height / 15) + 2
+                    except Exception as e:
+                        ws.cell(row=last_row, column=1, value=f"No se pudo agregar la imagen {f.name}: {e}" if lang_key == "es" else f"Could not add image {f.name}: {e}")
+                        last_row += 1
+                else:
+                    ws.cell(row=last_row, column=1, value=f.name)
+                    last_row += 1
+
+    # Set column widths
+    for col in range(1, 4):
+        ws.column_dimensions[get_column_letter(col)].width = 60
+
+    # ✅ Return as bytes
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
@@ -0,0 +1,288 @@
+"""
+Text of uploaded TXT, XLSX and PDF evidence.
+
+    extractor = default_extractor()
+    job = extractor.submit(attachment)   # queued / running / done / failed / unsupported
+    job.text                             # once done
+
+TXT files are decoded in chunks (UTF-8, UTF-16 with a BOM, else Latin-1),
+XLSX workbooks are read with openpyxl's ``read_only`` mode (cell values row
+by row, one line per row, tab-separated) and PDFs through the text layer of
+``pypdf`` when it is installed; without it a PDF is ``UNSUPPORTED``, and a
+scanned PDF with no text layer gives no text. At most ``MAX_TEXT_CHARS`` are
+kept per file.
+
+Extraction runs on a small thread pool, so the page only polls the job. Jobs
+are keyed by the attachment's content digest: the same file in several
+steps, reports or sessions is read once, and finished results are kept in the
+report store (``attachment_text``), so re-uploading a file or reopening a
+report after a restart is a primary-key lookup. Failures are only kept in
+memory, so installing pypdf takes effect after a restart.
+
+The text feeds the saved-report search (``eightd.templates``) and the 4M
+keyword classifier (``mentions_4m``).
+"""
+import codecs
+import functools
+import io
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from eightd.analysis import classify_4m
+from eightd.normalize import normalize_chunk
+from eightd.spool import default_spool
+from eightd.store import default_store
+
+EXTRACT_WORKERS = 2
+MAX_TEXT_CHARS = 100_000
+CHUNK_SIZE = 64 * 1024
+KEEP_JOBS = 128
+
+TXT = "txt"
+XLSX = "xlsx"
+PDF = "pdf"
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+UNSUPPORTED = "unsupported"  # a PDF without pypdf
+
+_KINDS = {
+    "text/plain": TXT, ".txt": TXT,
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": XLSX, ".xlsx": XLSX,
+    "application/pdf": PDF, ".pdf": PDF,
+}
+
+_log = logging.getLogger(__name__)
+
+
+class UnsupportedFile(Exception):
+    """The file's text cannot be read here (e.g. a PDF without pypdf installed)."""
+
+
+def kind_of(attachment):
+    """TXT, XLSX or PDF, or None for files whose text is not extracted (pictures, ...)."""
+    return _KINDS.get(attachment.mime) or _KINDS.get(os.path.splitext(attachment.name)[1].lower())
+
+
+# ---------------------------
+# Readers
+# ---------------------------
+def _open(attachment, store=None):
+    """A binary file object over the attachment's bytes (its spool file when they are not in memory)."""
+    if attachment.is_resident:
+        return io.BytesIO(attachment.data)
+    path = default_spool().path(attachment.digest)
+    if os.path.exists(path):
+        return open(path, "rb")
+    data = store.attachment_data(attachment.digest) if store is not None else None
+    return io.BytesIO(data if data is not None else attachment.getvalue())
+
+
+class _Text:
+    """Accumulates text up to ``MAX_TEXT_CHARS``; ``full`` once the rest can be skipped."""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    @property
+    def full(self):
+        return self.size >= MAX_TEXT_CHARS
+
+    def add(self, text):
+        text = text[:MAX_TEXT_CHARS - self.size]
+        self.parts.append(text)
+        self.size += len(text)
+
+    def value(self):
+        return "".join(self.parts)
+
+
+def read_txt(f):
+    out = _Text()
+    head = f.read(CHUNK_SIZE)
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encoding = "utf-16"
+    else:
+        try:
+            head.decode("utf-8")
+            encoding = "utf-8-sig"
+        except UnicodeDecodeError as e:
+            # A multibyte character cut at the end of the first chunk is still UTF-8
+            encoding = "utf-8-sig" if e.reason == "unexpected end of data" else "latin-1"
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    chunk = head
+    while chunk and not out.full:
+        out.add(decoder.decode(chunk))
+        chunk = f.read(CHUNK_SIZE)
+    if not out.full:
+        out.add(decoder.decode(b"", final=True))
+    return out.value()
+
+
+def read_xlsx(f):
+    from openpyxl import load_workbook
+
+    out = _Text()
+    wb = load_workbook(f, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            out.add(f"# {ws.title}\n")
+            for row in ws.iter_rows(values_only=True):
+                cells = ["" if v is None else str(v) for v in row]
+                while cells and not cells[-1]:
+                    cells.pop()
+                if cells:
+                    out.add("\t".join(cells) + "\n")
+                if out.full:
+                    return out.value()
+    finally:
+        wb.close()
+    return out.value()
+
+
+def read_pdf(f):
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise UnsupportedFile("reading PDF text needs pypdf (pip install pypdf)") from e
+    out = _Text()
+    for page in PdfReader(f).pages:
+        out.add((page.extract_text() or "") + "\n")
+        if out.full:
+            break
+    return out.value()
+
+
+_READERS = {TXT: read_txt, XLSX: read_xlsx, PDF: read_pdf}
+
+
+def extract_text(attachment, store=None):
+    """The text of a TXT/XLSX/PDF attachment; raises ``UnsupportedFile`` for anything else."""
+    kind = kind_of(attachment)
+    if kind is None:
+        raise UnsupportedFile(f"no text extraction for {attachment.mime or attachment.name}")
+    with _open(attachment, store) as f:
+        return _READERS[kind](f)
+
+
+@functools.lru_cache(maxsize=256)
+def mentions_4m(text, lang="en"):
+    """((4M class, lines), ...) of the lines of ``text`` the keyword classifier places, most mentioned first."""
+    counts = Counter(classify_4m(line, lang) for line in text.splitlines() if line.strip())
+    counts.pop("Other", None)
+    return tuple(counts.most_common())
+
+
+# ---------------------------
+# Queue
+# ---------------------------
+@dataclass(slots=True)
+class ExtractJob:
+    digest: str
+    name: str
+    submitted_at: float
+    status: str = QUEUED
+    text: str = ""
+    error: str | None = None
+    cached: bool = False
+    future: object = field(default=None, repr=False)
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED, UNSUPPORTED)
+
+
+class TextExtractor:
+    def __init__(self, store=None, workers=EXTRACT_WORKERS):
+        self.store = store
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="eightd-extract")
+        self._jobs = OrderedDict()  # digest -> ExtractJob, least recently used first
+        self._lock = threading.Lock()
+
+    def _live(self, digest):
+        job = self._jobs.get(digest)
+        if job is not None:
+            self._jobs.move_to_end(digest)
+        return job
+
+    def submit(self, attachment):
+        """
+        The job extracting ``attachment``'s text: a running or finished one
+        for the same content, a finished one from the store's cache, else a
+        new one. None for files whose text is not extracted.
+        """
+        if kind_of(attachment) is None:
+            return None
+        digest = attachment.digest
+        with self._lock:
+            job = self._live(digest)
+        if job is not None:
+            return job
+        cached = self.store.attachment_text(digest) if self.store is not None else None
+        with self._lock:
+            job = self._live(digest)
+            if job is not None:
+                return job
+            if cached is not None:
+                job = ExtractJob(digest, attachment.name, time.time(), DONE, cached, cached=True)
+            else:
+                job = ExtractJob(digest, attachment.name, time.time())
+                job.future = self._pool.submit(self._run, job, attachment)
+            self._jobs[digest] = job
+            while len(self._jobs) > KEEP_JOBS and next(iter(self._jobs.values())).finished:
+                self._jobs.popitem(last=False)
+            return job
+
+    def get(self, digest):
+        """The job, or None once it has been dropped (or never existed)."""
+        with self._lock:
+            return self._jobs.get(digest)
+
+    def _run(self, job, attachment):
+        job.status = RUNNING
+        try:
+            job.text = normalize_chunk(extract_text(attachment, self.store))
+        except UnsupportedFile as e:
+            job.error = str(e)
+            job.status = UNSUPPORTED
+        except Exception as e:  # reported on the job, the worker thread carries on
+            _log.warning("text extraction of %s (%s) failed: %s", job.name, job.digest, e)
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = FAILED
+        else:
+            job.status = DONE
+        if self.store is not None and job.status == DONE:
+            self.store.save_attachment_text(job.digest, job.text)
+
+    def stats(self):
+        """{status: job count} plus how many were served from the cache."""
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED, UNSUPPORTED)}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            counts["cached"] = sum(job.cached for job in self._jobs.values())
+            return counts
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_extractor():
+    """Process-wide text extractor over the default store."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = TextExtractor(default_store())
+        return _default
@@ -0,0 +1,141 @@
+"""
+Fuzzy matching of free-text ("Other") whys onto the D5 catalog items.
+
+Every catalog label, in both languages, is normalized once (lower case,
+accents and punctuation removed, stop words dropped) into a token set and a
+set of character trigrams. An inverted index maps each trigram to the labels
+containing it, so a query only touches the labels it shares trigrams with:
+the shared-trigram counts fall out of the posting lists and no label is
+compared character by character. A label's score is the mean of
+
+- the Dice coefficient of the two trigram sets (tolerates typos, plurals and
+  word order), and
+- the share of the query's tokens that appear in the label,
+
+and an item scores the best of its English and Spanish labels. Results are
+memoized per normalized text, so re-running a why on every keystroke or over
+the saved history costs one dict lookup after the first time.
+"""
+from collections import defaultdict
+from functools import lru_cache
+from typing import NamedTuple
+
+from eightd.catalogs import WHY_CATALOGS, catalog_ids, catalog_label, catalog_version, fold_text
+
+DEFAULT_LIMIT = 3
+DEFAULT_MIN_SCORE = 0.3
+# Stricter bar for mapping text onto a catalog item without a person looking at it
+AUTO_MATCH_SCORE = 0.6
+
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from in into is it not of on or the to too very was were with without "
+    "al con de del el en es la las lo los no o para por se sin su un una y".split()
+)
+_STEM = 5  # "train", "trained", "training" share a stem
+
+
+class CatalogMatch(NamedTuple):
+    item_id: str
+    score: float
+
+
+def _tokens(normalized):
+    return frozenset(w for w in normalized.split() if w not in _STOP_WORDS and len(w) > 1)
+
+
+def _stems(tokens):
+    return frozenset(token[:_STEM] for token in tokens)
+
+
+def _trigrams(tokens):
+    grams = set()
+    for token in tokens:
+        padded = f" {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class _Index:
+    __slots__ = ("version", "item_ids", "stems", "sizes", "postings")
+
+    def __init__(self):
+        self.version = catalog_version()
+        self.item_ids = []   # label number -> item ID (two labels per item: en, es)
+        self.stems = []      # label number -> set of word stems
+        self.sizes = []      # label number -> trigram count
+        self.postings = defaultdict(list)  # trigram -> [label number, ...]
+        for section in WHY_CATALOGS:
+            for item_id in catalog_ids(section):
+                for lang in ("en", "es"):
+                    tokens = _tokens(fold_text(catalog_label(item_id, lang)))
+                    grams = _trigrams(tokens)
+                    number = len(self.item_ids)
+                    self.item_ids.append(item_id)
+                    self.stems.append(_stems(tokens))
+                    self.sizes.append(len(grams))
+                    for gram in grams:
+                        self.postings[gram].append(number)
+
+    def scores(self, normalized):
+        """Item ID -> best score over its labels, for every label sharing a trigram with the text."""
+        tokens = _tokens(normalized)
+        stems = _stems(tokens)
+        grams = _trigrams(tokens)
+        if not grams:
+            return {}
+        shared = defaultdict(int)
+        for gram in grams:
+            for number in self.postings.get(gram, ()):
+                shared[number] += 1
+        best = {}
+        for number, common in shared.items():
+            dice = 2 * common / (len(grams) + self.sizes[number])
+            contained = common / len(grams)
+            cover = len(stems & self.stems[number]) / len(stems)
+            score = (dice + contained) / 4 + cover / 2
+            item_id = self.item_ids[number]
+            if score > best.get(item_id, 0.0):
+                best[item_id] = score
+        return best
+
+
+_INDEX = None
+
+
+def _index():
+    global _INDEX
+    if _INDEX is None or _INDEX.version != catalog_version():
+        _INDEX = _Index()
+    return _INDEX
+
+
+@lru_cache(maxsize=8192)
+def _ranked(normalized, version):
+    """Every item with a non-zero score, best first (memoized per normalized text and catalog version)."""
+    scores = _index().scores(normalized)
+    return tuple(
+        CatalogMatch(item_id, round(score, 3))
+        for item_id, score in sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+    )
+
+
+def match_catalog(text, section=None, limit=DEFAULT_LIMIT, min_score=DEFAULT_MIN_SCORE, exclude=()):
+    """
+    Up to ``limit`` catalog items closest to ``text`` (English or Spanish),
+    best first, as ``CatalogMatch(item_id, score)`` with a score in 0..1.
+    ``section`` ("occ" / "det" / "sys") restricts the items; IDs in
+    ``exclude`` (e.g. already picked in another slot) are skipped.
+    """
+    matches = []
+    for match in _ranked(fold_text(text), catalog_version()):
+        if match.score < min_score or len(matches) >= limit:
+            break
+        if (section is None or match.item_id.startswith(f"{section}-")) and match.item_id not in exclude:
+            matches.append(match)
+    return matches
+
+
+def best_catalog_id(text, section=None, min_score=AUTO_MATCH_SCORE):
+    """The single closest catalog ID when it scores at least ``min_score``, else None."""
+    matches = match_catalog(text, section, limit=1, min_score=min_score)
+    return matches[0].item_id if matches else None
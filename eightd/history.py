@@ -0,0 +1,100 @@
+"""
+Field-level change log of stored reports, for audits.
+
+Every save of a report to the store appends one event per field that
+changed, in the save's transaction: the step (``HEADER`` for the report
+date and author), the field (``whys.<section>`` for a D5 why section), the
+hashes of the old and new value, who saved it and when, plus the new value
+itself so the report can be rebuilt at any point of its history. A new
+report's first save is one ``CREATED`` event plus a snapshot of the report
+as created, so bulk imports do not log every field of every report.
+
+Every ``SNAPSHOT_EVERY`` events the store also keeps a snapshot of the whole
+report, so rebuilding it (``ReportStore.report_at``) reads the latest
+snapshot before that point and replays at most that many events, however
+long the report has been edited. ``ReportStore.compact_events`` folds events
+older than a retention period into one snapshot and drops them.
+
+The current report stays materialized in the ``reports`` table, so normal
+loads never replay anything.
+"""
+import hashlib
+import json
+from typing import NamedTuple
+
+from eightd.model import EightD
+
+SNAPSHOT_EVERY = 200
+HEADER = ""
+HEADER_FIELDS = ("report_date", "prepared_by")
+CREATED = "created"  # header "field" of a report's first save
+
+
+class Event(NamedTuple):
+    seq: int
+    at: float
+    user: str
+    step: str
+    field: str
+    old_hash: str
+    new_hash: str
+    value: str | None  # new value as JSON; None when the field went back to its default
+
+
+def _json(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def text_hash(text):
+    return "" if text is None else hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def value_hash(value):
+    """Short digest of a field value ("" for a field at its default)."""
+    return text_hash(None if value is None else _json(value))
+
+
+def report_fields(data):
+    """{(step, field): value} of a report's ``to_dict`` form; fields at their default are absent."""
+    fields = {(HEADER, name): data[name] for name in HEADER_FIELDS if data.get(name)}
+    for step, answer in data["steps"].items():
+        for name, value in answer.items():
+            fields[(step, name)] = value
+    for section, whys in data["whys"].items():
+        fields[("D5", f"whys.{section}")] = whys
+    return fields
+
+
+def diff(old_data, new_data):
+    """(step, field, old hash, new hash, new value JSON) of every field that differs between two ``to_dict`` forms."""
+    old = report_fields(old_data)
+    new = report_fields(new_data)
+    changes = []
+    for key in sorted(old.keys() | new.keys()):
+        before, after = old.get(key), new.get(key)
+        if before != after:
+            text = None if after is None else _json(after)
+            changes.append((*key, value_hash(before), text_hash(text), text))
+    return changes
+
+
+def replay(data, changes):
+    """Apply ``(step, field, value JSON)`` changes to a ``to_dict`` form in place; returns it."""
+    for step, name, value in changes:
+        if step == HEADER and name == CREATED:
+            continue
+        value = None if value is None else json.loads(value)
+        if step == HEADER:
+            data[name] = value or ""
+        elif name.startswith("whys."):
+            data["whys"][name[5:]] = value or []
+        elif value is None:
+            data["steps"].setdefault(step, {}).pop(name, None)
+        else:
+            data["steps"].setdefault(step, {})[name] = value
+    return data
+
+
+def empty_report():
+    """``to_dict`` form of a new report."""
+    return EightD().to_dict()
@@ -0,0 +1,246 @@
+"""
+Bulk import of 8D workbooks (our own exports and legacy spreadsheets) into the
+report store.
+
+    python -m eightd.ingest DIR [--workers 8] [--batch 200] [--store PATH]
+
+The parent process walks ``DIR`` for ``.xlsx`` / ``.xlsm`` files and hashes
+each one (sha256 of the bytes). Files whose hash the store has already seen
+are skipped, so an interrupted run is resumed by running it again and renamed
+or copied files are not loaded twice. The rest are parsed in a process pool
+(openpyxl ``read_only`` mode) and written to the store in batched
+transactions, together with their hash.
+
+A workbook in the layout of ``eightd.export`` is read by
+``eightd.xlsx_import``; anything else goes through ``parse_legacy``, which
+looks for "D1" … "D8" labels in any sheet and takes the text next to them.
+D5 whys are matched against the why catalogs (exact label, then fuzzy) and
+kept as "Other" free text when nothing matches well enough.
+"""
+import argparse
+import hashlib
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from openpyxl import load_workbook
+
+from eightd import plant
+from eightd.catalogs import find_catalog_id
+from eightd.fuzzy import best_catalog_id
+from eightd.model import DEFAULT_WHY_SLOTS, OTHER, WHY_SECTIONS, EightD, WhyEntry
+from eightd.store import ReportStore, default_store
+from eightd.xlsx_import import XlsxImportError, import_excel
+
+EXTENSIONS = (".xlsx", ".xlsm")
+DEFAULT_BATCH = 200
+
+_STEP_LABEL = re.compile(r"^\s*(D[1-8])(?![0-9])(.*)$", re.S | re.I)
+_SECTION_WORDS = {
+    "occ": ("occurrence", "ocurrencia"),
+    "det": ("detection", "detección", "deteccion"),
+    "sys": ("systemic", "sistémica", "sistemica"),
+}
+_WHY_PREFIX = re.compile(r"^\s*(?:why|por\s*qu[ée])\s*\d*\s*[:.)-]?\s*", re.I)
+_WHY_SPLIT = re.compile(r"\s+\|\s+|\n|;")
+
+
+# ---------------------------
+# Legacy layout
+# ---------------------------
+def _section_of(heading):
+    lowered = heading.lower()
+    for section, words in _SECTION_WORDS.items():
+        if any(w in lowered for w in words):
+            return section
+    return None
+
+
+def match_why(text, section=None):
+    """
+    A ``WhyEntry`` for a why found in a workbook: the catalog item whose label
+    it is or closely matches (``eightd.fuzzy``), else "Other" with the text.
+    """
+    text = " ".join(text.split())
+    item_id = find_catalog_id(text) or best_catalog_id(text, section)
+    return WhyEntry(item_id) if item_id else WhyEntry(OTHER, text)
+
+
+def _add_text(report, step, section, text):
+    if step == "D5":
+        parts = (_WHY_PREFIX.sub("", part) for part in _WHY_SPLIT.split(text))
+        section = section or "occ"
+        report.whys[section].extend(match_why(part, section) for part in parts if part.strip())
+        return
+    answer = report.step(step)
+    field = f"{section or 'occ'}_answer" if step in ("D6", "D7") else "answer"
+    current = getattr(answer, field)
+    setattr(answer, field, f"{current}\n{text}" if current else text)
+
+
+def parse_legacy(data):
+    """
+    Best-effort ``EightD`` from a workbook in an unknown layout. A row whose
+    first non-empty cell starts with a step label ("D4", "D4 - Containment",
+    "D5 Occurrence: …") starts that step; its text is whatever follows a ":"
+    in the label cell plus the other cells of the row, and every following
+    row without a label adds to it. Headings naming occurrence / detection /
+    systemic pick the D5 why list or the D6 / D7 answer. Rows before the
+    first label (titles, dates) are ignored. Raises ``XlsxImportError`` if no
+    step label is found.
+    """
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    report = EightD(whys={section: [] for section in WHY_SECTIONS})
+    step = section = None
+    try:
+        for ws in wb.worksheets:
+            for row in ws.iter_rows(values_only=True):
+                cells = [str(v).strip() for v in row if v is not None and str(v).strip()]
+                if not cells:
+                    continue
+                match = _STEP_LABEL.match(cells[0])
+                if match:
+                    step = match.group(1).upper()
+                    heading, _, content = match.group(2).partition(":")
+                    section = _section_of(heading)
+                    texts = ([content.strip()] if content.strip() else []) + cells[1:]
+                elif step is None:
+                    continue
+                else:
+                    texts = cells
+                if texts:
+                    _add_text(report, step, section, "\n".join(texts))
+    finally:
+        wb.close()
+    if step is None:
+        raise XlsxImportError("no D1-D8 step labels found")
+    for entries in report.whys.values():
+        entries += [WhyEntry() for _ in range(DEFAULT_WHY_SLOTS - len(entries))]
+    return report
+
+
+def parse_workbook(data):
+    """Our own export layout first, then the legacy heuristics."""
+    try:
+        return import_excel(data)
+    except XlsxImportError:
+        return parse_legacy(data)
+
+
+# ---------------------------
+# Pipeline
+# ---------------------------
+def find_workbooks(directory):
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(EXTENSIONS) and not name.startswith("~$"):
+                yield os.path.join(root, name)
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _parse_job(job):
+    """Worker: (digest, path, report_id, report or None, created_at, error)."""
+    digest, path = job
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        report = parse_workbook(data)
+        return digest, path, digest[:12], report, os.path.getmtime(path), None
+    except Exception as e:  # a broken workbook must not stop the run
+        return digest, path, None, None, None, f"{type(e).__name__}: {e}"
+
+
+class IngestStats:
+    __slots__ = ("seen", "skipped", "loaded", "failed", "bytes", "started")
+
+    def __init__(self):
+        self.seen = self.skipped = self.loaded = self.failed = self.bytes = 0
+        self.started = time.perf_counter()
+
+    def line(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        done = self.loaded + self.failed
+        return (
+            f"{self.seen} files: {self.loaded} loaded, {self.failed} failed, {self.skipped} already ingested"
+            f" | {done / elapsed:.1f} files/s, {self.bytes / elapsed / 1e6:.1f} MB/s, {elapsed:.1f} s"
+        )
+
+
+def ingest_directory(directory, store=None, workers=None, batch=DEFAULT_BATCH, progress=None):
+    """Load every new workbook under ``directory`` into the store. Returns ``IngestStats``."""
+    store = store or default_store()
+    known = store.ingested_digests()
+    stats = IngestStats()
+
+    jobs = []
+    for path in find_workbooks(directory):
+        stats.seen += 1
+        digest = _hash_file(path)
+        if digest in known:
+            stats.skipped += 1
+            continue
+        known.add(digest)  # identical copies in the same run are loaded once
+        jobs.append((digest, path))
+        stats.bytes += os.path.getsize(path)
+
+    def flush(pending):
+        if pending:
+            store.record_ingested(pending)
+            pending.clear()
+            if progress:
+                progress(stats)
+
+    pending = []
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 2:
+        results = map(_parse_job, jobs)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_parse_job, jobs, chunksize=max(1, min(16, len(jobs) // (workers * 4))))
+    try:
+        for result in results:
+            pending.append(result)
+            if result[3] is None:
+                stats.failed += 1
+            else:
+                stats.loaded += 1
+            if len(pending) >= batch:
+                flush(pending)
+        flush(pending)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="directory to scan (recursively) for .xlsx / .xlsm workbooks")
+    parser.add_argument("--store", help="SQLite store (default: $EIGHTD_STORE_PATH or data/eightd.sqlite3)")
+    parser.add_argument("--workers", type=int, help="parser processes (default: CPU count)")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="reports per store transaction")
+    args = parser.parse_args(argv)
+    plant.refresh()
+
+    store = ReportStore(args.store) if args.store else default_store()
+    stats = ingest_directory(
+        args.directory, store, workers=args.workers, batch=args.batch,
+        progress=lambda s: print(s.line(), file=sys.stderr, flush=True),
+    )
+    print(stats.line())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Background export jobs, so building a workbook never blocks a page run.
+
+    queue = default_queue()
+    job = queue.submit(report, "en")     # returns at once
+    job.status                           # queued / running / done / failed
+    job.data                             # the file, once done
+
+A job's ID is a digest of what the export will contain (the exported rows,
+header, attachment digests, language and format), so the same content asked
+for by several reruns or sessions coalesces onto one job, and a finished job
+is a cache hit for as long as it stays within ``$EIGHTD_EXPORT_CACHE_MB``
+(least recently used out first). The report is snapshotted when the job is
+submitted (``copy.deepcopy`` shares the immutable attachment bytes), so the
+page keeps editing while the export runs.
+
+Jobs run in a bounded thread pool (``$EIGHTD_EXPORT_WORKERS``, default 2):
+openpyxl and PIL work off the script thread, and at most that many exports
+compete with page runs for the CPU. A queued job nobody waits for any more
+(``release``) is cancelled before it starts.
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from eightd.export import build_rows, generate_excel
+from eightd.texts import t
+
+EXPORT_WORKERS_ENV = "EIGHTD_EXPORT_WORKERS"
+DEFAULT_EXPORT_WORKERS = 2
+EXPORT_CACHE_ENV = "EIGHTD_EXPORT_CACHE_MB"
+DEFAULT_EXPORT_CACHE_MB = 64
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# kind -> (exporter(report, lang) -> bytes, MIME type)
+EXPORTERS = {
+    "xlsx": (generate_excel, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+_log = logging.getLogger(__name__)
+
+
+def export_key(report, lang="en", kind="xlsx"):
+    """Digest of everything an export of ``report`` contains (the job ID)."""
+    content = {
+        "kind": kind,
+        "lang": lang,
+        "header": [t[lang]["Report_Date"], report.report_date, t[lang]["Prepared_By"], report.prepared_by],
+        "rows": build_rows(report, lang),
+        "files": [(step, a.name, a.mime, a.digest) for step, a in report.attachments()],
+    }
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False).encode("utf-8")).hexdigest()[:24]
+
+
+@dataclass(slots=True)
+class ExportJob:
+    job_id: str
+    kind: str
+    lang: str
+    submitted_at: float
+    status: str = QUEUED
+    started_at: float | None = None
+    finished_at: float | None = None
+    data: bytes | None = None
+    error: str | None = None
+    owners: set = field(default_factory=set)
+    future: object = field(default=None, repr=False)
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    @property
+    def mime(self):
+        return EXPORTERS[self.kind][1]
+
+
+class ExportQueue:
+    def __init__(self, workers=None, cache_bytes=None):
+        workers = workers or int(os.environ.get(EXPORT_WORKERS_ENV) or DEFAULT_EXPORT_WORKERS)
+        self.cache_bytes = (
+            cache_bytes if cache_bytes is not None
+            else int(float(os.environ.get(EXPORT_CACHE_ENV) or DEFAULT_EXPORT_CACHE_MB) * 1024 * 1024)
+        )
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="eightd-export")
+        self._jobs = OrderedDict()  # job_id -> ExportJob, least recently used first
+        self._lock = threading.Lock()
+
+    def submit(self, report, lang="en", kind="xlsx", owner=None, job_id=None):
+        """
+        The job exporting ``report``: an existing one for the same content
+        (running or finished), else a new one queued on the pool. ``owner``
+        (e.g. a session token) marks who waits for it, see ``release``;
+        ``job_id`` is the report's ``export_key`` if the caller has it already.
+        """
+        job_id = job_id or export_key(report, lang, kind)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status == FAILED:
+                job = ExportJob(job_id, kind, lang, time.time())
+                self._jobs[job_id] = job
+                job.future = self._pool.submit(self._run, job, copy.deepcopy(report))
+            else:
+                self._jobs.move_to_end(job_id)
+            if owner is not None:
+                job.owners.add(owner)
+            return job
+
+    def get(self, job_id):
+        """The job, or None once it has been evicted from the cache (or never existed)."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def release(self, job_id, owner):
+        """``owner`` no longer needs the job; a queued job left without owners is cancelled."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.owners.discard(owner)
+            if not job.owners and job.status == QUEUED and job.future.cancel():
+                del self._jobs[job_id]
+
+    def _run(self, job, report):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            data = EXPORTERS[job.kind][0](report, job.lang)
+        except Exception as e:  # reported on the job, the worker thread carries on
+            _log.exception("export %s failed", job.job_id)
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = FAILED
+        else:
+            job.data = data
+            job.status = DONE
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._evict()
+
+    def _evict(self):
+        """Drop the least recently used finished jobs until their bytes fit in the cache."""
+        total = sum(len(job.data) for job in self._jobs.values() if job.data is not None)
+        for job_id in list(self._jobs):
+            if total <= self.cache_bytes:
+                break
+            job = self._jobs[job_id]
+            if job.finished:
+                total -= len(job.data or b"")
+                del self._jobs[job_id]
+
+    def stats(self):
+        """{status: job count} plus the bytes of cached results."""
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            counts["cached_bytes"] = sum(len(job.data) for job in self._jobs.values() if job.data is not None)
+            return counts
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_queue():
+    """Process-wide export queue (``$EIGHTD_EXPORT_WORKERS`` threads)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ExportQueue()
+        return _default
@@ -0,0 +1,197 @@
+"""
+Typed 8D report model.
+
+The report type is ``EightD`` (the one name for it; there is no ``Report``
+alias). An ``EightD`` holds one ``StepAnswer`` per NPQP step (D1–D8) and the three D5
+why lists (occurrence, detection, systemic) as ``WhyEntry`` items. Uploaded
+evidence is kept as ``Attachment`` objects so nothing here depends on
+Streamlit's ``UploadedFile``.
+
+The page edits the active ``EightD`` of the session's ``Workspace`` and widgets
+write straight into it, so a rerun never copies the report. All classes use ``__slots__``
+and pickle as positional tuples with trailing defaults dropped, which keeps
+the per-session footprint and the serialized size small.
+"""
+import hashlib
+from dataclasses import dataclass, field
+
+from eightd.catalogs import catalog_label
+
+STEPS = ("D1", "D2", "D3", "D4", "D5", "D6", "D7", "D8")
+UPLOAD_STEPS = ("D1", "D3", "D4", "D7")
+WHY_SECTIONS = ("occ", "det", "sys")
+DEFAULT_WHY_SLOTS = 5
+OTHER = "Other"
+
+
+def _compact_args(obj, defaults):
+    """Field values in slot order, without the trailing ones still at their default."""
+    args = [getattr(obj, name) for name in obj.__slots__]
+    while args and args[-1] == defaults[len(args) - 1]:
+        args.pop()
+    return tuple(args)
+
+
+@dataclass(slots=True)
+class Attachment:
+    """
+    An uploaded file. ``digest`` (sha256) identifies the content; ``data`` is
+    ``None`` while the bytes are spilled to the attachment spool, and
+    ``getvalue()`` reads them back on first use.
+    """
+
+    name: str
+    mime: str
+    data: bytes | None = b""
+    digest: str = ""
+    size: int = 0
+
+    def __post_init__(self):
+        if self.data is not None and not self.digest:
+            self.digest = hashlib.sha256(self.data).hexdigest()
+            self.size = len(self.data)
+
+    @property
+    def is_image(self):
+        return self.mime.startswith("image/")
+
+    @property
+    def is_resident(self):
+        return self.data is not None
+
+    def getvalue(self):
+        if self.data is None:
+            from eightd.spool import default_spool
+
+            self.data = default_spool().load(self.digest)
+        return self.data
+
+    def __reduce__(self):
+        return Attachment, (self.name, self.mime, self.data, self.digest, self.size)
+
+    def to_dict(self):
+        """Metadata only; the bytes are stored by digest."""
+        return {"name": self.name, "mime": self.mime, "digest": self.digest, "size": self.size}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data["mime"], None, data["digest"], data["size"])
+
+
+@dataclass(slots=True)
+class WhyEntry:
+    """
+    One why slot: a catalog item ID ("occ-2.5"), ``OTHER`` with free text in
+    ``other``, or empty.
+    """
+
+    item_id: str = ""
+    other: str = ""
+
+    @property
+    def is_other(self):
+        return self.item_id == OTHER
+
+    def text(self, lang="en"):
+        """Catalog label in ``lang`` or the free text of an "Other" why, stripped."""
+        if self.is_other:
+            return self.other.strip()
+        return catalog_label(self.item_id, lang) if self.item_id else ""
+
+    def __reduce__(self):
+        return WhyEntry, _compact_args(self, ("", ""))
+
+
+@dataclass(slots=True)
+class StepAnswer:
+    answer: str = ""
+    attachments: list[Attachment] = field(default_factory=list)
+    # D3 (canonical English option values)
+    inspection_stage: list[str] = field(default_factory=list)
+    # D4 (canonical English option values)
+    location: list[str] = field(default_factory=list)
+    status: list[str] = field(default_factory=list)
+    # D6 / D7 (one answer per root cause type)
+    occ_answer: str = ""
+    det_answer: str = ""
+    sys_answer: str = ""
+
+    def __reduce__(self):
+        return StepAnswer, _compact_args(self, _STEP_DEFAULTS)
+
+    def to_dict(self):
+        """Fields that differ from their default (attachments as metadata)."""
+        data = {}
+        for name, default in zip(self.__slots__, _STEP_DEFAULTS):
+            value = getattr(self, name)
+            if value != default:
+                data[name] = [a.to_dict() for a in value] if name == "attachments" else value
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data["attachments"] = [Attachment.from_dict(a) for a in data.get("attachments", ())]
+        return cls(**data)
+
+
+_STEP_DEFAULTS = ("", [], [], [], [], "", "", "")
+
+
+def _default_steps():
+    return {step: StepAnswer() for step in STEPS}
+
+
+def _default_whys():
+    return {section: [WhyEntry() for _ in range(DEFAULT_WHY_SLOTS)] for section in WHY_SECTIONS}
+
+
+def _restore(report_date, prepared_by, steps, whys):
+    return EightD(report_date, prepared_by, dict(zip(STEPS, steps)), dict(zip(WHY_SECTIONS, whys)))
+
+
+@dataclass(slots=True, weakref_slot=True)
+class EightD:
+    report_date: str = ""
+    prepared_by: str = ""
+    steps: dict[str, StepAnswer] = field(default_factory=_default_steps)
+    whys: dict[str, list[WhyEntry]] = field(default_factory=_default_whys)
+
+    def step(self, name):
+        return self.steps[name]
+
+    def why_texts(self, section, lang="en"):
+        """Non-empty why texts of a D5 section, with "Other" resolved to its free text."""
+        return [text for text in (w.text(lang) for w in self.whys[section]) if text]
+
+    def attachments(self):
+        """(step, attachment) pairs for every uploaded file, in step order."""
+        return [(step, a) for step in UPLOAD_STEPS for a in self.steps[step].attachments]
+
+    def to_dict(self):
+        """JSON-ready form (attachment bytes excluded); ``from_dict`` reverses it."""
+        return {
+            "report_date": self.report_date,
+            "prepared_by": self.prepared_by,
+            "steps": {step: self.steps[step].to_dict() for step in STEPS},
+            "whys": {section: [[w.item_id, w.other] for w in self.whys[section]] for section in WHY_SECTIONS},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        steps = data.get("steps", {})
+        whys = data.get("whys", {})
+        return cls(
+            report_date=data.get("report_date", ""),
+            prepared_by=data.get("prepared_by", ""),
+            steps={step: StepAnswer.from_dict(steps.get(step, {})) for step in STEPS},
+            whys={section: [WhyEntry(*w) for w in whys.get(section, ())] for section in WHY_SECTIONS},
+        )
+
+    def __reduce__(self):
+        return _restore, (
+            self.report_date,
+            self.prepared_by,
+            tuple(self.steps[s] for s in STEPS),
+            tuple(self.whys[s] for s in WHY_SECTIONS),
+        )
@@ -0,0 +1,213 @@
+"""
+Unicode normalization of user text and text files.
+
+Text typed on tablets, pasted from mail or PDFs, or exported by other tools
+carries characters that look the same as their plain forms but do not compare
+equal: no-break and other fixed-width spaces (U+00A0, U+202F, ...),
+zero-width characters and byte-order marks, curly quotes, and accents in
+decomposed form (NFD, "e" + U+0301) next to composed ones (NFC, "é"). They
+break exact matches such as the D5 duplicate check and the 4M keyword
+classifier.
+
+``normalize_text`` maps them to one form (NFC, plain spaces and quotes) and
+is applied once where text enters: the page's text widgets, the API,
+workbook imports (``normalize_report``) and text extracted from uploaded
+files (``normalize_chunk``, not memoized). It is memoized per value, so a page
+rerun with unchanged fields costs one dict lookup per field. ``match_key`` is
+the case-folded, whitespace-collapsed form that exact matches compare.
+
+The same pipeline rewrites files and stores (``clean.py`` is a wrapper):
+
+    python -m eightd.normalize [--check] [--keep-quotes] PATH...   files or directories
+    python -m eightd.normalize --store [PATH]                     every saved report
+
+Files are streamed in chunks into a temporary file next to them and swapped
+in with ``os.replace``, so a large file is never held whole and never left
+half written; unchanged files are not touched. Reports are rewritten in
+batches, one transaction each, through the store's normal save (aggregates
+and change log stay consistent).
+"""
+import argparse
+import codecs
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unicodedata
+from functools import lru_cache
+
+CHUNK_SIZE = 1024 * 1024
+STORE_BATCH = 200
+FILE_SUFFIXES = (".py", ".md", ".txt", ".csv", ".json", ".yaml", ".yml", ".toml")
+NORMALIZE_USER = "normalize"  # author of store rewrites in the change log
+
+_SPACES = dict.fromkeys(map(ord, "\u00a0\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u202f\u205f\u3000"), " ")
+_INVISIBLE = dict.fromkeys(map(ord, "\u00ad\u200b\u200c\u200d\u2060\ufeff"), None)
+_QUOTES = {
+    **dict.fromkeys(map(ord, "\u2018\u2019\u201a\u201b\u2032"), "'"),
+    **dict.fromkeys(map(ord, "\u201c\u201d\u201e\u201f\u2033"), '"'),
+}
+_TABLE = str.maketrans({**_SPACES, **_INVISIBLE, **_QUOTES})
+_TABLE_KEEP_QUOTES = str.maketrans({**_SPACES, **_INVISIBLE})
+
+
+def normalize_chunk(text, quotes=True):
+    """``normalize_text`` without the memo, for large text seen once (file chunks, extracted file text)."""
+    if text.isascii():
+        return text
+    return unicodedata.normalize("NFC", text.translate(_TABLE if quotes else _TABLE_KEEP_QUOTES))
+
+
+@lru_cache(maxsize=16384)
+def normalize_text(text, quotes=True):
+    """NFC, with odd spaces as plain spaces, zero-width characters dropped and (``quotes``) curly quotes straight."""
+    return normalize_chunk(text, quotes)
+
+
+@lru_cache(maxsize=16384)
+def match_key(text):
+    """Key for exact matches: normalized, case-folded, whitespace collapsed."""
+    return " ".join(normalize_text(text).casefold().split())
+
+
+def normalize_report(report):
+    """Normalize every text field of an ``EightD`` in place; True if any changed."""
+    changed = False
+
+    def norm(value):
+        nonlocal changed
+        new = normalize_text(value)
+        changed |= new != value
+        return new
+
+    report.report_date = norm(report.report_date)
+    report.prepared_by = norm(report.prepared_by)
+    for answer in report.steps.values():
+        for name in ("answer", "occ_answer", "det_answer", "sys_answer"):
+            setattr(answer, name, norm(getattr(answer, name)))
+        for attachment in answer.attachments:
+            attachment.name = norm(attachment.name)
+    for whys in report.whys.values():
+        for why in whys:
+            why.other = norm(why.other)
+    return changed
+
+
+# ---------------------------
+# Files
+# ---------------------------
+def _split(text):
+    """(part safe to normalize now, tail to carry): cut after the last line break, so nothing composes across it."""
+    cut = text.rfind("\n") + 1
+    if cut == 0 and len(text) > 4 * CHUNK_SIZE:
+        cut = len(text) - 1  # no line break for a long while: cut anyway (only a split accent could suffer)
+    return text[:cut], text[cut:]
+
+
+def normalize_file(path, quotes=True, check=False):
+    """
+    Normalize a UTF-8 text file in place, streaming it in chunks. Returns True
+    if it changed (with ``check``, whether it would; the file is left alone).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    changed = False
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".normalize-")
+    try:
+        with open(path, "rb") as src, os.fdopen(fd, "w", encoding="utf-8", newline="") as dst:
+            carry = ""
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                text = carry + decoder.decode(chunk, final=not chunk)
+                ready, carry = _split(text) if chunk else (text, "")
+                new = normalize_chunk(ready, quotes)
+                changed |= new != ready
+                dst.write(new)
+                if not chunk:
+                    break
+        if changed and not check:
+            shutil.copymode(path, tmp)
+            os.replace(tmp, path)
+        return changed
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def text_files(paths, suffixes=FILE_SUFFIXES):
+    """The files among ``paths`` and, for directories, the text files under them (hidden ones skipped)."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "__pycache__")
+            for name in sorted(files):
+                if name.endswith(suffixes) and not name.startswith("."):
+                    yield os.path.join(root, name)
+
+
+# ---------------------------
+# Report store
+# ---------------------------
+def normalize_store(store, batch=STORE_BATCH, check=False):
+    """
+    Normalize every saved report, ``batch`` reports per transaction. Returns
+    (reports seen, changed); with ``check``, nothing is saved.
+    """
+    from eightd.model import EightD
+
+    seen = changed = 0
+    last = ""
+    while True:
+        _, rows = store.query(
+            "SELECT report_id, body FROM reports WHERE report_id > ? ORDER BY report_id LIMIT ?", (last, batch)
+        )
+        if not rows:
+            return seen, changed
+        updates = []
+        for report_id, body in rows:
+            report = EightD.from_dict(json.loads(body))
+            if normalize_report(report):
+                updates.append((report_id, report))
+        if updates and not check:
+            store.save_many(updates, user=NORMALIZE_USER)
+        seen += len(rows)
+        changed += len(updates)
+        last = rows[-1][0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m eightd.normalize", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("paths", nargs="*", help="files or directories to normalize in place")
+    parser.add_argument("--check", action="store_true", help="only list what would change (exit status 1 if anything)")
+    parser.add_argument("--keep-quotes", action="store_true", help="leave curly quotes as they are (source files)")
+    parser.add_argument("--store", nargs="?", const="", metavar="PATH",
+                        help="normalize the saved reports of a store (default: $EIGHTD_STORE_PATH)")
+    args = parser.parse_args(argv)
+    if not args.paths and args.store is None:
+        parser.error("give files, directories or --store")
+
+    pending = 0
+    for path in text_files(args.paths):
+        try:
+            changed = normalize_file(path, quotes=not args.keep_quotes, check=args.check)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"skipped {path}: {e}", file=sys.stderr)
+            continue
+        if changed:
+            pending += 1
+            print(f"{'would normalize' if args.check else 'normalized'} {path}")
+    if args.store is not None:
+        from eightd.store import ReportStore, default_store
+
+        store = ReportStore(args.store) if args.store else default_store()
+        seen, count = normalize_store(store, check=args.check)
+        print(f"{'would normalize' if args.check else 'normalized'} {count} of {seen} report(s)")
+        pending += count
+    return 1 if args.check and pending else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
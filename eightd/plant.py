@@ -0,0 +1,311 @@
+"""
+Plant-specific content (why catalogs, texts, guidance) loaded from a YAML or
+JSON file.
+
+    EIGHTD_PLANT_FILE=plants/juarez.yaml streamlit run app.backup.py
+    python -m eightd.plant dump plants/template.yaml   # the built-in content, to start from
+    python -m eightd.plant check plants/juarez.yaml
+
+A plant file may hold any of these top-level sections. Each entry it names
+replaces the built-in entry of the same name; everything else keeps the
+built-in content, so a file only needs what the plant changes:
+
+- ``catalogs``: ``{occ|det|sys: {en: {Category: [item, ...]}, es: {...}}}``,
+  the D5 why catalogs. A section replaces the built-in section as a whole;
+  its English and Spanish dicts must be parallel (same categories in the same
+  order, same number of items each) because item IDs are positional
+  ("occ-2.5"). Append new items and categories at the end to keep the
+  meaning of the IDs in saved reports.
+- ``translations``: ``{en: {key: text}, es: {...}}``, merged over ``texts.t``.
+- ``steps``: ``{D1: {note: {en, es}, example: {en, es}}}``, the guidance card.
+- ``guidance``: ``{D1: {en: {title, tips}, es: {title, tips}}}``.
+- ``suggestions``: ``{Method: {en: [...], es: [...]}, ...}``, the
+  root-cause suggestion table of ``smart_root_cause_suggestion``.
+
+A file is parsed and validated once and the result is copied into the
+existing dicts in place (``texts.t``, ``WHY_CATALOGS`` ...), so modules that
+imported them by name see the new content. ``refresh()`` is called once per
+page run: it stats the file (at most every ``RECHECK_SECONDS``) and reloads
+it when its mtime changed, without restarting the server. A file that fails
+to load leaves the previous content in place; ``status()`` has the error.
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+from eightd import analysis, catalogs, texts
+from eightd.model import STEPS, WHY_SECTIONS
+
+PLANT_FILE_ENV = "EIGHTD_PLANT_FILE"
+RECHECK_SECONDS = 2.0
+LANGS = ("en", "es")
+SECTIONS = ("catalogs", "translations", "steps", "guidance", "suggestions")
+
+_log = logging.getLogger(__name__)
+
+
+class PlantFileError(ValueError):
+    """The plant file cannot be read or does not have the expected shape."""
+
+
+def builtin_content():
+    """The content shipped with the app, in plant-file form."""
+    return _BUILTIN
+
+
+def _current_content():
+    return {
+        "catalogs": {section: catalogs.WHY_CATALOGS[section] for section in WHY_SECTIONS},
+        "translations": texts.t,
+        "steps": {step: {"note": note, "example": example} for step, note, example in texts.npqp_steps},
+        "guidance": texts.guidance_content,
+        "suggestions": analysis.ROOT_CAUSE_SUGGESTIONS,
+    }
+
+
+# Taken at import, before any plant file is applied
+_BUILTIN = copy.deepcopy(_current_content())
+
+
+# ---------------------------
+# Parsing and validation
+# ---------------------------
+def _parse(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = f.read()
+    except OSError as e:
+        raise PlantFileError(f"cannot read {path}: {e}") from e
+    if path.lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError as e:
+            raise PlantFileError("reading a YAML plant file needs PyYAML (pip install pyyaml); JSON works without it") from e
+        try:
+            return yaml.safe_load(data) or {}
+        except yaml.YAMLError as e:
+            raise PlantFileError(f"{path}: {e}") from e
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError as e:
+        raise PlantFileError(f"{path}: {e}") from e
+
+
+def _expect(condition, where, message):
+    if not condition:
+        raise PlantFileError(f"{where}: {message}")
+
+
+def _text(value, where):
+    _expect(isinstance(value, str) and value.strip(), where, "expected a non-empty string")
+    return value
+
+
+def _mapping(value, where, keys=None):
+    _expect(isinstance(value, dict), where, "expected a mapping")
+    if keys is not None:
+        unknown = sorted(set(value) - set(keys))
+        _expect(not unknown, where, f"unknown key(s) {unknown}; expected some of {list(keys)}")
+    return value
+
+
+def _per_lang(value, where, check):
+    _mapping(value, where, LANGS)
+    _expect(set(value) == set(LANGS), where, f"needs both {LANGS[0]!r} and {LANGS[1]!r}")
+    return {lang: check(value[lang], f"{where}.{lang}") for lang in LANGS}
+
+
+def _text_list(value, where):
+    _expect(isinstance(value, list) and value, where, "expected a non-empty list")
+    return [_text(v, f"{where}[{i}]") for i, v in enumerate(value)]
+
+
+def _check_catalog_section(value, where):
+    by_lang = _per_lang(
+        value, where,
+        lambda cats, w: {_text(c, w): _text_list(items, f"{w}.{c}") for c, items in _mapping(cats, w).items()},
+    )
+    en, es = by_lang["en"], by_lang["es"]
+    _expect(en, f"{where}.en", "has no categories")
+    _expect(len(en) == len(es), where, f"{len(en)} English vs {len(es)} Spanish categories")
+    for (cat_en, items_en), (cat_es, items_es) in zip(en.items(), es.items()):
+        _expect(
+            len(items_en) == len(items_es), where,
+            f"category {cat_en!r} has {len(items_en)} items but {cat_es!r} has {len(items_es)}",
+        )
+    return by_lang
+
+
+def validate(content):
+    """The checked sections of a parsed plant file (raises ``PlantFileError``)."""
+    _mapping(content, "plant file", SECTIONS)
+    checked = {}
+    if "catalogs" in content:
+        sections = _mapping(content["catalogs"], "catalogs", WHY_SECTIONS)
+        checked["catalogs"] = {s: _check_catalog_section(v, f"catalogs.{s}") for s, v in sections.items()}
+    if "translations" in content:
+        checked["translations"] = _per_lang(
+            content["translations"], "translations",
+            lambda d, w: {_text(k, w): _text(v, f"{w}.{k}") for k, v in _mapping(d, w).items()},
+        )
+    if "steps" in content:
+        steps = _mapping(content["steps"], "steps", STEPS)
+        checked["steps"] = {
+            step: {
+                part: _per_lang(v[part], f"steps.{step}.{part}", _text)
+                for part in ("note", "example")
+                if part in _mapping(v, f"steps.{step}", ("note", "example"))
+            }
+            for step, v in steps.items()
+        }
+    if "guidance" in content:
+        guidance = _mapping(content["guidance"], "guidance", STEPS)
+        checked["guidance"] = {
+            step: _per_lang(
+                v, f"guidance.{step}",
+                lambda d, w: {k: _text(d[k], f"{w}.{k}") for k in _mapping(d, w, ("title", "tips"))},
+            )
+            for step, v in guidance.items()
+        }
+    if "suggestions" in content:
+        suggestions = _mapping(content["suggestions"], "suggestions")
+        checked["suggestions"] = {
+            _text(name, "suggestions"): _per_lang(v, f"suggestions.{name}", _text_list)
+            for name, v in suggestions.items()
+        }
+    return checked
+
+
+def load_file(path):
+    """Parse and validate a plant file; returns its checked sections."""
+    return validate(_parse(path))
+
+
+# ---------------------------
+# Applying
+# ---------------------------
+def _replace(target, value):
+    target.clear()
+    target.update(value)
+
+
+def apply(content):
+    """Built-in content overlaid with the checked plant ``content``, copied into the live dicts."""
+    merged = copy.deepcopy(_BUILTIN)
+    merged["catalogs"].update(content.get("catalogs", {}))
+    for lang, values in content.get("translations", {}).items():
+        merged["translations"][lang].update(values)
+    for step, parts in content.get("steps", {}).items():
+        merged["steps"][step].update(parts)
+    for step, by_lang in content.get("guidance", {}).items():
+        for lang, parts in by_lang.items():
+            merged["guidance"][step][lang].update(parts)
+    merged["suggestions"].update(content.get("suggestions", {}))
+
+    catalogs.replace_catalogs(merged["catalogs"])
+    for lang in LANGS:
+        _replace(texts.t[lang], merged["translations"][lang])
+    texts.npqp_steps[:] = [(step, merged["steps"][step]["note"], merged["steps"][step]["example"]) for step in STEPS]
+    _replace(texts.guidance_content, merged["guidance"])
+    _replace(analysis.ROOT_CAUSE_SUGGESTIONS, merged["suggestions"])
+
+
+@dataclass(slots=True)
+class PlantStatus:
+    path: str | None = None
+    mtime: float | None = None
+    loaded_at: float | None = None
+    error: str | None = None
+
+
+_status = PlantStatus()
+_lock = threading.Lock()
+_last_check = float("-inf")
+
+
+def status():
+    """Which plant file is applied, when it was loaded and the last load error, if any."""
+    return _status
+
+
+def refresh(force=False):
+    """
+    Load ``$EIGHTD_PLANT_FILE`` if it is new or changed since the last call;
+    back to the built-in content when the variable is unset. Cheap enough to
+    call on every page run.
+    """
+    global _last_check
+    now = time.monotonic()
+    if not force and now - _last_check < RECHECK_SECONDS:
+        return _status
+    with _lock:
+        _last_check = now
+        path = os.environ.get(PLANT_FILE_ENV) or None
+        if path is None:
+            if _status.path is not None:
+                apply({})
+                _status.path = _status.mtime = _status.loaded_at = _status.error = None
+            return _status
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError as e:
+            _status.error = f"cannot read {path}: {e}"
+            return _status
+        if path == _status.path and mtime == _status.mtime:
+            return _status
+        try:
+            content = load_file(path)
+        except PlantFileError as e:
+            # Keep whatever was applied; retry when the file changes again
+            _log.warning("plant file not loaded: %s", e)
+            _status.path, _status.mtime, _status.error = path, mtime, str(e)
+            return _status
+        apply(content)
+        _status.path, _status.mtime, _status.loaded_at, _status.error = path, mtime, time.time(), None
+        _log.info("plant file %s loaded", path)
+        return _status
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+def _dump(content, path):
+    if path.lower().endswith((".yaml", ".yml")):
+        import yaml
+
+        text = yaml.safe_dump(content, allow_unicode=True, sort_keys=False, width=120)
+    else:
+        text = json.dumps(content, ensure_ascii=False, indent=2) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    dump = commands.add_parser("dump", help="write the built-in content as a plant file (.yaml/.yml or .json)")
+    dump.add_argument("path")
+    check = commands.add_parser("check", help="parse and validate a plant file")
+    check.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "dump":
+        _dump(builtin_content(), args.path)
+        print(f"built-in content written to {args.path}")
+        return
+    try:
+        content = load_file(args.path)
+    except PlantFileError as e:
+        sys.exit(f"invalid: {e}")
+    sizes = {s: sum(map(len, cats["en"].values())) for s, cats in content.get("catalogs", {}).items()}
+    print(f"ok: sections {sorted(content)}" + (f", catalog items {sizes}" if sizes else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Per-session memory accounting and idle eviction.
+
+Every page run registers its session's ``Workspace`` with the process-wide
+``registry`` (``eightd.ui.track_session``). The registry estimates what each
+session holds and, once a session has been idle for
+``$EIGHTD_IDLE_EVICT_SECONDS`` (default 15 minutes), spills the active
+report's attachment bytes to the ``AttachmentSpool`` (parked reports are
+already spilled). They are read back lazily by
+``Attachment.getvalue`` when that session is used again.
+
+Sweeps piggyback on page runs of other sessions (at most every
+``SWEEP_INTERVAL_SECONDS``), so there is no background thread.
+"""
+import os
+import sys
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+
+from eightd.model import WHY_SECTIONS
+from eightd.spool import default_spool
+
+IDLE_EVICT_ENV = "EIGHTD_IDLE_EVICT_SECONDS"
+DEFAULT_IDLE_EVICT_SECONDS = 15 * 60
+SWEEP_INTERVAL_SECONDS = 30
+
+
+# ---------------------------
+# Footprint estimate
+# ---------------------------
+@dataclass(slots=True)
+class Footprint:
+    """Estimated bytes held by one session (``spilled`` is on disk, not in memory)."""
+
+    text: int = 0
+    whys: int = 0
+    attachments: int = 0
+    parked: int = 0
+    spilled: int = 0
+    attachment_count: int = 0
+    reports: int = 0
+
+    @property
+    def total(self):
+        return self.text + self.whys + self.attachments + self.parked
+
+    def add(self, other):
+        self.text += other.text
+        self.whys += other.whys
+        self.attachments += other.attachments
+        self.parked += other.parked
+        self.spilled += other.spilled
+        self.attachment_count += other.attachment_count
+        self.reports += other.reports
+
+
+def report_footprint(report):
+    fp = Footprint(reports=1)
+    size = sys.getsizeof
+    fp.text = size(report.report_date) + size(report.prepared_by)
+    for answer in report.steps.values():
+        for value in (answer.answer, answer.occ_answer, answer.det_answer, answer.sys_answer):
+            fp.text += size(value)
+        for values in (answer.inspection_stage, answer.location, answer.status):
+            fp.text += size(values) + sum(size(v) for v in values)
+        for a in answer.attachments:
+            fp.attachment_count += 1
+            if a.data is None:
+                fp.spilled += a.size
+            else:
+                fp.attachments += len(a.data)
+    for section in WHY_SECTIONS:
+        entries = report.whys[section]
+        fp.whys += size(entries) + sum(size(w) + size(w.item_id) + size(w.other) for w in entries)
+    return fp
+
+
+def workspace_footprint(workspace):
+    """The active report's footprint plus the compressed blobs of the parked ones."""
+    fp = report_footprint(workspace.active)
+    fp.parked = workspace.parked_bytes()
+    fp.reports = len(workspace)
+    for summary in workspace.summaries():
+        if summary.report_id != workspace.active_id:
+            fp.attachment_count += summary.attachments
+    return fp
+
+
+# ---------------------------
+# Session registry
+# ---------------------------
+@dataclass(slots=True)
+class SessionInfo:
+    session_id: str
+    idle_seconds: float
+    evicted: bool
+    footprint: Footprint
+
+
+class _Entry:
+    __slots__ = ("workspace_ref", "last_seen", "evicted")
+
+    def __init__(self, workspace, now):
+        self.workspace_ref = weakref.ref(workspace)
+        self.last_seen = now
+        self.evicted = False
+
+
+def _idle_timeout_from_env():
+    try:
+        return float(os.environ.get(IDLE_EVICT_ENV, DEFAULT_IDLE_EVICT_SECONDS))
+    except ValueError:
+        return DEFAULT_IDLE_EVICT_SECONDS
+
+
+class SessionRegistry:
+    def __init__(self, idle_timeout=None, spool=None):
+        self.idle_timeout = _idle_timeout_from_env() if idle_timeout is None else idle_timeout
+        self._spool = spool
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._entries = {}
+        self._last_sweep = 0.0
+
+    @property
+    def spool(self):
+        return self._spool or default_spool()
+
+    def touch(self, session_id, workspace, now=None):
+        """Mark a session as active; its spilled attachments come back on first access."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry.workspace_ref() is not workspace:
+                self._entries[session_id] = _Entry(workspace, now)
+            else:
+                entry.last_seen = now
+                entry.evicted = False
+
+    def forget(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def _live(self):
+        """(session_id, entry, workspace) for sessions whose workspace is still alive; drops the rest."""
+        with self._lock:
+            live = []
+            for session_id, entry in list(self._entries.items()):
+                workspace = entry.workspace_ref()
+                if workspace is None:
+                    del self._entries[session_id]
+                else:
+                    live.append((session_id, entry, workspace))
+            return live
+
+    def sessions(self, now=None):
+        now = time.time() if now is None else now
+        return [
+            SessionInfo(session_id, now - entry.last_seen, entry.evicted, workspace_footprint(workspace))
+            for session_id, entry, workspace in self._live()
+        ]
+
+    def totals(self, now=None):
+        total = Footprint()
+        for info in self.sessions(now):
+            total.add(info.footprint)
+        return total
+
+    def sweep(self, now=None, idle_timeout=None, exclude=()):
+        """
+        Spill the attachments of every session idle for longer than
+        ``idle_timeout`` and drop spool files nobody refers to any more.
+        Returns (sessions evicted, bytes freed).
+        """
+        now = time.time() if now is None else now
+        idle_timeout = self.idle_timeout if idle_timeout is None else idle_timeout
+        spool = self.spool
+        evicted = freed = 0
+        with self._sweep_lock:
+            spool.start_collect()  # files spilled by other sessions from here on are kept
+            live_digests = set()
+            for session_id, entry, workspace in self._live():
+                attachments = [a for _, a in workspace.active.attachments()]
+                live_digests.update(workspace.digests())
+                if session_id in exclude or entry.evicted or now - entry.last_seen < idle_timeout:
+                    continue
+                freed += sum(spool.evict(a) for a in attachments)
+                entry.evicted = True
+                evicted += 1
+            spool.collect(live_digests)
+        self._last_sweep = now
+        return evicted, freed
+
+    def maybe_sweep(self, now=None, exclude=()):
+        """``sweep`` at most once every ``SWEEP_INTERVAL_SECONDS``."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if now - self._last_sweep < SWEEP_INTERVAL_SECONDS:
+                return 0, 0
+            self._last_sweep = now
+        return self.sweep(now=now, exclude=exclude)
+
+
+registry = SessionRegistry()
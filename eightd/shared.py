@@ -0,0 +1,236 @@
+"""
+Shared editing of one 8D by several sessions through the report store.
+
+A shared report is split into parts: one per step, with D5 split into its
+three why sections (``PARTS``). Every part has a row in the store with an
+optimistic version counter and a short lease:
+
+- committing a part is a compare-and-set on its version, so it fails with a
+  conflict when someone else committed the part since this session last saw
+  it, and it is refused while another session holds the lease;
+- a commit takes (or renews) the lease for ``LEASE_SECONDS``; other sessions
+  show the part as being edited and disable its widgets until it runs out;
+- every commit bumps the report's stamp. Sessions poll that one integer
+  (a primary-key lookup) and read the part rows only when it has moved.
+
+``SharedState`` is what one session knows about one shared report: the stamp
+it has seen and, per part, the version and JSON its local copy is based on.
+``pull`` applies other sessions' changes to parts this session has not
+touched; ``push`` commits the parts it has. A remote change to a part with
+local edits becomes a ``Conflict``, listed per field until the user keeps
+their version or takes the other one.
+"""
+import json
+import time
+from dataclasses import dataclass, field
+
+from eightd.model import STEPS, WHY_SECTIONS, StepAnswer, WhyEntry
+
+PARTS = tuple(
+    part for step in STEPS for part in ([f"D5.{s}" for s in WHY_SECTIONS] if step == "D5" else [step])
+)
+LEASE_SECONDS = 30.0
+
+COMMITTED = "committed"
+CONFLICT = "conflict"
+LOCKED = "locked"
+
+
+def step_parts(step):
+    """The parts a step tab edits ("D5" -> its three why sections)."""
+    return tuple(f"D5.{s}" for s in WHY_SECTIONS) if step == "D5" else (step,)
+
+
+# ---------------------------
+# Parts <-> report
+# ---------------------------
+def part_value(report, part):
+    if part.startswith("D5."):
+        return [[w.item_id, w.other] for w in report.whys[part[3:]]]
+    return report.step(part).to_dict()
+
+
+def part_body(report, part):
+    """Canonical JSON of one part of a report (attachments as metadata)."""
+    return json.dumps(part_value(report, part), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def apply_part(report, part, body, attachment_data=None):
+    """
+    Replace one part of ``report`` with ``body``. Attachments the report
+    already holds keep their bytes; ``attachment_data(digest)`` supplies the
+    bytes of new ones.
+    """
+    value = json.loads(body)
+    if part.startswith("D5."):
+        report.whys[part[3:]] = [WhyEntry(*w) for w in value]
+        return
+    held = {a.digest: a for a in report.step(part).attachments}
+    answer = StepAnswer.from_dict(value)
+    for i, attachment in enumerate(answer.attachments):
+        if attachment.digest in held:
+            answer.attachments[i] = held[attachment.digest]
+        elif attachment_data is not None:
+            attachment.data = attachment_data(attachment.digest)
+    report.steps[part] = answer
+
+
+def changed_fields(part, mine, theirs):
+    """Fields that differ between two bodies of a part: step field names, or "Why N"."""
+    a, b = json.loads(mine), json.loads(theirs)
+    if part.startswith("D5."):
+        return [
+            f"Why {i + 1}" for i in range(max(len(a), len(b)))
+            if (a[i] if i < len(a) else None) != (b[i] if i < len(b) else None)
+        ]
+    return [name for name in StepAnswer.__slots__ if a.get(name) != b.get(name)]
+
+
+def field_text(part, body, name, lang="en"):
+    """Display text of one field of a part body (see ``changed_fields``)."""
+    value = json.loads(body)
+    if part.startswith("D5."):
+        i = int(name.split()[-1]) - 1
+        return WhyEntry(*value[i]).text(lang) if i < len(value) else ""
+    value = value.get(name, "")
+    if name == "attachments":
+        return ", ".join(a["name"] for a in value)
+    return ", ".join(value) if isinstance(value, list) else value
+
+
+# ---------------------------
+# Session state
+# ---------------------------
+@dataclass(slots=True)
+class Conflict:
+    """Another session committed ``theirs`` (at ``version``) over a part with local edits."""
+
+    version: int
+    theirs: str
+    editor: str
+    fields: list[str]
+
+
+@dataclass(slots=True)
+class PartLock:
+    editor: str
+    until: float
+
+
+@dataclass(slots=True)
+class SharedState:
+    report_id: str
+    holder: str
+    stamp: int = 0
+    base: dict[str, tuple[int, str]] = field(default_factory=dict)
+    conflicts: dict[str, Conflict] = field(default_factory=dict)
+    locks: dict[str, PartLock] = field(default_factory=dict)
+
+    def locked_by(self, part, now=None):
+        """Name of the other session's editor holding the part's lease, or None."""
+        lock = self.locks.get(part)
+        if lock is None or lock.until <= (time.time() if now is None else now):
+            return None
+        return lock.editor or "another user"
+
+
+def _rebase(state, rows, report, store, now):
+    """Bring the state (and clean parts of the report) up to ``rows``; returns the parts applied."""
+    applied = []
+    state.locks = {}
+    for row in rows:
+        if row.holder and row.holder != state.holder and row.lease_until > now:
+            state.locks[row.part] = PartLock(row.editor, row.lease_until)
+        version, base_body = state.base.get(row.part, (0, None))
+        if row.version <= version:
+            continue
+        mine = part_body(report, row.part)
+        if base_body is None or mine in (base_body, row.body):
+            if mine != row.body:
+                apply_part(report, row.part, row.body, store.attachment_data)
+                applied.append(row.part)
+            state.base[row.part] = (row.version, row.body)
+            state.conflicts.pop(row.part, None)
+        else:
+            state.conflicts[row.part] = Conflict(
+                row.version, row.body, row.editor, changed_fields(row.part, mine, row.body)
+            )
+    return applied
+
+
+def share(store, report_id, report, editor, holder, now=None):
+    """Start sharing a report: its parts go to the store at version 1."""
+    now = time.time() if now is None else now
+    bodies = {part: part_body(report, part) for part in PARTS}
+    stamp = store.share(report_id, report, bodies, editor, now)
+    state = SharedState(report_id, holder, stamp)
+    _rebase(state, store.shared_parts(report_id), report, store, now)
+    return state
+
+
+def join(store, report_id, holder, now=None):
+    """(report, state) for opening a shared report in another session."""
+    now = time.time() if now is None else now
+    stamp = store.shared_stamp(report_id)
+    report = store.load(report_id)
+    if stamp is None or report is None:
+        raise KeyError(report_id)
+    state = SharedState(report_id, holder, stamp)
+    _rebase(state, store.shared_parts(report_id), report, store, now)
+    return report, state
+
+
+def pull(store, state, report, now=None):
+    """
+    Apply other sessions' commits to the parts this session has not edited.
+    Costs one stamp lookup when nothing changed. Returns the parts applied.
+    """
+    stamp = store.shared_stamp(state.report_id)
+    if stamp is None or stamp == state.stamp:
+        return []
+    now = time.time() if now is None else now
+    applied = _rebase(state, store.shared_parts(state.report_id), report, store, now)
+    state.stamp = stamp
+    return applied
+
+
+def push(store, state, report, editor, now=None):
+    """Commit every locally edited part that is neither in conflict nor leased by someone else."""
+    now = time.time() if now is None else now
+    committed = []
+    for part in PARTS:
+        version, base_body = state.base[part]
+        if part in state.conflicts or state.locked_by(part, now):
+            continue
+        mine = part_body(report, part)
+        if mine == base_body:
+            continue
+        attachments = () if part.startswith("D5.") else report.step(part).attachments
+        result = store.commit_part(
+            state.report_id, part, version, mine, editor, state.holder, now, LEASE_SECONDS, attachments
+        )
+        if result.status == COMMITTED:
+            state.base[part] = (result.version, mine)
+            if result.stamp == state.stamp + 1:  # nobody else committed in between
+                state.stamp = result.stamp
+            committed.append(part)
+        elif result.status == CONFLICT:
+            state.conflicts[part] = Conflict(
+                result.version, result.body, result.editor, changed_fields(part, mine, result.body)
+            )
+        else:
+            state.locks[part] = PartLock(result.editor, result.lease_until)
+    return committed
+
+
+def keep_mine(state, part):
+    """Resolve a conflict in favour of the local edits: the next ``push`` overwrites theirs."""
+    conflict = state.conflicts.pop(part)
+    state.base[part] = (conflict.version, conflict.theirs)
+
+
+def take_theirs(store, state, report, part):
+    """Resolve a conflict by dropping the local edits of the part."""
+    conflict = state.conflicts.pop(part)
+    apply_part(report, part, conflict.theirs, store.attachment_data)
+    state.base[part] = (conflict.version, conflict.theirs)
@@ -0,0 +1,134 @@
+"""
+Content-addressed on-disk spool for attachment bytes.
+
+Idle sessions hand their attachment bytes to the spool; ``Attachment.getvalue``
+reads them back when the session is used again. Files are named by sha256
+digest, so identical uploads from different sessions share one file.
+
+Bytes the spool never held (attachments of reports cloned from the store,
+``eightd.templates``) come from its ``sources``: callables ``digest -> bytes
+or None`` asked in turn, such as ``ReportStore.attachment_data``.
+
+Sessions spill while the registry sweeps: ``start_collect`` (before the
+sweep gathers live digests) makes the spool remember every digest stored
+from then on, and ``collect`` keeps those files, so a report parked during
+the sweep never loses its bytes.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+
+SPOOL_DIR_ENV = "EIGHTD_SPOOL_DIR"
+
+
+class AttachmentSpool:
+    def __init__(self, directory):
+        self.directory = directory
+        self.sources = []
+        self._lock = threading.Lock()
+        self._stored = None  # digests stored since ``start_collect``, while a collect is pending
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def store(self, digest, data):
+        """Write ``data`` under ``digest`` (atomically; a no-op if it is already there)."""
+        path = self.path(digest)
+        with self._lock:
+            if os.path.exists(path):
+                self._remember(digest)
+                return path
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            with self._lock:
+                os.replace(tmp, path)
+                self._remember(digest)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return path
+
+    def _remember(self, digest):
+        if self._stored is not None:
+            self._stored.add(digest)
+
+    def load(self, digest):
+        try:
+            with open(self.path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            for source in self.sources:
+                data = source(digest)
+                if data is not None:
+                    return data
+            raise
+
+    def evict(self, attachment):
+        """Spill an attachment's bytes and drop them from memory. Returns the bytes freed."""
+        if attachment.data is None:
+            return 0
+        self.store(attachment.digest, attachment.data)
+        freed = len(attachment.data)
+        attachment.data = None
+        return freed
+
+    def start_collect(self):
+        """Remember the digests stored from now on; call before gathering the live digests for ``collect``."""
+        with self._lock:
+            self._stored = set()
+
+    def collect(self, live_digests):
+        """
+        Delete spooled files no live attachment refers to, except those stored
+        since ``start_collect``. Returns the number removed.
+        """
+        removed = 0
+        for name in os.listdir(self.directory):
+            if name.startswith(".tmp-") or name in live_digests:
+                continue
+            with self._lock:
+                if self._stored is not None and name in self._stored:
+                    continue
+                try:
+                    os.unlink(self.path(name))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        with self._lock:
+            self._stored = None
+        return removed
+
+    def disk_usage(self):
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                total += entry.stat().st_size
+        return total
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_spool():
+    """
+    Process-wide spool in ``$EIGHTD_SPOOL_DIR``, or else in a directory of
+    this process's own under <tmp>, removed when it exits. ``collect``
+    deletes every file this process does not refer to, so a directory must
+    not be shared by several app processes.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            directory = os.environ.get(SPOOL_DIR_ENV)
+            if not directory:
+                directory = tempfile.mkdtemp(prefix=f"eightd-spool-{os.getpid()}-")
+                atexit.register(shutil.rmtree, directory, ignore_errors=True)
+            _default = AttachmentSpool(directory)
+        return _default
@@ -0,0 +1,949 @@
+"""
+Local SQLite store for saved 8D reports and their analytics aggregates.
+
+Reports are stored as JSON (``EightD.to_dict``) and attachment bytes once per
+sha256 digest. Saving a report also keeps a few small aggregate tables up to
+date, so the analytics page never scans report bodies:
+
+- ``why_facts``: one row per filled why (section, catalog item, catalog
+  category, 4M class, month the report was opened);
+- ``category_counts`` / ``item_counts``: counts per category and month and
+  per catalog item, adjusted by the difference between the report's old and
+  new whys on every save;
+- ``step_completions`` / ``step_close_stats``: when each step of a report was
+  first filled and the running totals of time-to-close per step.
+
+``containments`` indexes the D4 containment of every report: one row per
+location with the report's containment status, owner and when it was first
+recorded, kept up to date by every save. The containment board reads it with
+an index range scan on (status, location, opened_at) and never loads a report
+body.
+
+``ingested_files`` remembers which workbooks ``eightd.ingest`` has already
+loaded (by content hash), so bulk imports can be resumed.
+
+``shared_reports`` / ``report_parts`` back shared editing (``eightd.shared``):
+one row per part of a shared report with its version, JSON and lease, and a
+stamp per report that every part commit bumps. A commit also folds the part
+into the report's row, so loading, listing and the aggregates see it.
+
+``report_events`` / ``report_snapshots`` are the append-only change log of
+each report (``eightd.history``): one row per changed field per save, and a
+full snapshot every ``SNAPSHOT_EVERY`` events.
+
+``templates`` holds the team's named templates (``eightd.templates``): report
+JSON like ``reports``, with the attachments referenced by digest.
+
+``draft_cache`` keeps finished AI drafts (``eightd.drafts``) by prompt digest.
+
+``attachment_text`` caches the text extracted from TXT/XLSX/PDF attachments
+(``eightd.extract``) by content digest, and ``report_files`` lists the
+digests of each report's attachments, so the saved-report search can take in
+the text of their evidence without loading report bodies.
+
+``rebuild_aggregates`` recomputes the counts from ``why_facts`` with pandas,
+for a store written by an older version or after a bulk import.
+
+The database is ``$EIGHTD_STORE_PATH`` (default: ``data/eightd.sqlite3`` next
+to the app).
+"""
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import NamedTuple
+
+from eightd.analysis import classify_4m, is_step_filled
+from eightd.catalogs import catalog_category
+from eightd.history import CREATED, HEADER, SNAPSHOT_EVERY, Event, diff, empty_report, replay, text_hash
+from eightd.model import OTHER, STEPS, WHY_SECTIONS, EightD
+from eightd.shared import COMMITTED, CONFLICT, LOCKED, apply_part
+from eightd.spool import default_spool
+from eightd.workspace import report_title
+
+STORE_PATH_ENV = "EIGHTD_STORE_PATH"
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "eightd.sqlite3")
+
+OTHER_CATEGORY = "Other (free text)"
+PENDING, IN_PROGRESS, COMPLETED = "Pending", "In Progress", "Completed"
+OPEN_STATUSES = (PENDING, IN_PROGRESS)
+KIND_CATALOG = "catalog"
+KIND_4M = "4m"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    report_id   TEXT PRIMARY KEY,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    closed_at   REAL,
+    report_date TEXT NOT NULL DEFAULT '',
+    prepared_by TEXT NOT NULL DEFAULT '',
+    title       TEXT NOT NULL DEFAULT '',
+    completed   INTEGER NOT NULL DEFAULT 0,
+    body        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_updated ON reports (updated_at);
+
+CREATE TABLE IF NOT EXISTS attachments (
+    digest TEXT PRIMARY KEY,
+    size   INTEGER NOT NULL,
+    data   BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS why_facts (
+    report_id TEXT NOT NULL,
+    section   TEXT NOT NULL,
+    position  INTEGER NOT NULL,
+    item_id   TEXT NOT NULL,
+    category  TEXT NOT NULL,
+    m4        TEXT NOT NULL,
+    month     TEXT NOT NULL,
+    PRIMARY KEY (report_id, section, position)
+);
+
+CREATE TABLE IF NOT EXISTS category_counts (
+    kind     TEXT NOT NULL,
+    section  TEXT NOT NULL,
+    category TEXT NOT NULL,
+    month    TEXT NOT NULL,
+    n        INTEGER NOT NULL,
+    PRIMARY KEY (kind, section, category, month)
+);
+
+CREATE TABLE IF NOT EXISTS item_counts (
+    item_id TEXT PRIMARY KEY,
+    n       INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS step_completions (
+    report_id    TEXT NOT NULL,
+    step         TEXT NOT NULL,
+    completed_at REAL NOT NULL,
+    PRIMARY KEY (report_id, step)
+);
+
+CREATE TABLE IF NOT EXISTS step_close_stats (
+    step          TEXT PRIMARY KEY,
+    n             INTEGER NOT NULL,
+    total_seconds REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS containments (
+    report_id TEXT NOT NULL,
+    location  TEXT NOT NULL,
+    status    TEXT NOT NULL,
+    owner     TEXT NOT NULL DEFAULT '',
+    title     TEXT NOT NULL DEFAULT '',
+    opened_at REAL NOT NULL,
+    PRIMARY KEY (report_id, location)
+);
+CREATE INDEX IF NOT EXISTS containments_board ON containments (status, location, opened_at);
+
+CREATE TABLE IF NOT EXISTS ingested_files (
+    digest      TEXT PRIMARY KEY,
+    path        TEXT NOT NULL,
+    report_id   TEXT,
+    error       TEXT,
+    ingested_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS shared_reports (
+    report_id TEXT PRIMARY KEY,
+    stamp     INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS report_parts (
+    report_id   TEXT NOT NULL,
+    part        TEXT NOT NULL,
+    version     INTEGER NOT NULL,
+    body        TEXT NOT NULL,
+    editor      TEXT NOT NULL DEFAULT '',
+    holder      TEXT NOT NULL DEFAULT '',
+    lease_until REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (report_id, part)
+);
+
+CREATE TABLE IF NOT EXISTS report_events (
+    report_id TEXT NOT NULL,
+    seq       INTEGER NOT NULL,
+    at        REAL NOT NULL,
+    user      TEXT NOT NULL DEFAULT '',
+    step      TEXT NOT NULL,
+    field     TEXT NOT NULL,
+    old_hash  TEXT NOT NULL,
+    new_hash  TEXT NOT NULL,
+    value     TEXT,
+    PRIMARY KEY (report_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS report_snapshots (
+    report_id TEXT NOT NULL,
+    seq       INTEGER NOT NULL,
+    at        REAL NOT NULL,
+    body      TEXT NOT NULL,
+    PRIMARY KEY (report_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS templates (
+    template_id TEXT PRIMARY KEY,
+    name        TEXT NOT NULL,
+    title       TEXT NOT NULL DEFAULT '',
+    created_by  TEXT NOT NULL DEFAULT '',
+    updated_at  REAL NOT NULL,
+    body        TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS draft_cache (
+    key        TEXT PRIMARY KEY,
+    provider   TEXT NOT NULL,
+    text       TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS attachment_text (
+    digest       TEXT PRIMARY KEY,
+    text         TEXT NOT NULL,
+    extracted_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS report_files (
+    report_id TEXT NOT NULL,
+    digest    TEXT NOT NULL,
+    PRIMARY KEY (report_id, digest)
+);
+"""
+
+
+class PartRow(NamedTuple):
+    part: str
+    version: int
+    body: str
+    editor: str
+    holder: str
+    lease_until: float
+
+
+class CommitResult(NamedTuple):
+    """Outcome of ``commit_part``; on a conflict or lock, the part row as it is now."""
+
+    status: str
+    version: int
+    stamp: int
+    body: str
+    editor: str
+    lease_until: float
+
+
+def _month(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m")
+
+
+def why_facts(report, month):
+    """(section, position, item_id, category, 4M class, month) for every filled why of a report."""
+    facts = []
+    for section in WHY_SECTIONS:
+        for position, why in enumerate(report.whys[section]):
+            text = why.text()
+            if not text:
+                continue
+            category = OTHER_CATEGORY if why.is_other else catalog_category(why.item_id) or OTHER_CATEGORY
+            facts.append((section, position, why.item_id, category, classify_4m(text), month))
+    return facts
+
+
+def containment_status(statuses):
+    """One status for a D4 status multiselect: the least advanced one ticked (Pending if none)."""
+    for status in (PENDING, IN_PROGRESS, COMPLETED):
+        if status in statuses:
+            return status
+    return PENDING
+
+
+def containments(report, user=""):
+    """(location, status, owner, title) per D4 location ("" if none is ticked); nothing while D4 is empty."""
+    d4 = report.step("D4")
+    if not (d4.location or d4.status or d4.answer.strip()):
+        return []
+    status = containment_status(d4.status)
+    owner = report.prepared_by.strip() or user
+    title = report_title(report)
+    return [(location, status, owner, title) for location in (d4.location or [""])]
+
+
+def _counts(facts):
+    """Aggregate-table deltas a set of facts contributes."""
+    categories = Counter()
+    items = Counter()
+    for section, _, item_id, category, m4, month in facts:
+        categories[(KIND_CATALOG, section, category, month)] += 1
+        categories[(KIND_4M, section, m4, month)] += 1
+        if item_id and item_id != OTHER:
+            items[item_id] += 1
+    return categories, items
+
+
+class ReportStore:
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        tables = {name for (name,) in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self._conn.executescript(SCHEMA)
+        if "containments" not in tables:
+            self._index_containments()
+        if "report_files" not in tables:
+            self._index_report_files()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------------------------
+    # Reports
+    # ---------------------------
+    def save(self, report_id, report, now=None, user=""):
+        """
+        Insert or update a report, apply its changes to the aggregate tables
+        and log them (``user`` is recorded as their author).
+        """
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            self._save(self._conn, report_id, report, now, user)
+
+    def save_many(self, items, now=None, user=""):
+        """Save ``(report_id, report)`` pairs in one transaction."""
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            for report_id, report in items:
+                self._save(self._conn, report_id, report, now, user)
+
+    def ingested_digests(self):
+        """Content hashes of every file a bulk import has already handled (loaded or failed)."""
+        with self._lock:
+            return {digest for (digest,) in self._conn.execute("SELECT digest FROM ingested_files")}
+
+    def record_ingested(self, items, now=None):
+        """
+        Save a batch of bulk-imported files in one transaction. ``items`` are
+        ``(digest, path, report_id, report, created_at, error)``; failed files
+        have ``report`` None and are only recorded, so they are not retried.
+        """
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            for digest, path, report_id, report, created_at, error in items:
+                if report is not None:
+                    self._save(self._conn, report_id, report, now, created_at=created_at)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ingested_files (digest, path, report_id, error, ingested_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (digest, path, report_id if report is not None else None, error, now),
+                )
+
+    def _save(self, conn, report_id, report, now, user="", created_at=None):
+        """
+        Write ``report`` and its aggregates at time ``now``. ``created_at``
+        backdates a new report (bulk imports: the workbook's mtime); the
+        updated and closed stamps stay ``now``, which the columnar export's
+        watermark follows.
+        """
+        filled_at = now if created_at is None else created_at  # imported steps were filled by the file's date
+        row = conn.execute(
+            "SELECT created_at, closed_at, body FROM reports WHERE report_id = ?", (report_id,)
+        ).fetchone()
+        created_at, closed_at, old_body = row if row else (now if created_at is None else created_at, None, None)
+        month = _month(created_at)
+        data = report.to_dict()
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+        # Why facts and the category / item counts
+        old_facts = conn.execute(
+            "SELECT section, position, item_id, category, m4, month FROM why_facts WHERE report_id = ?", (report_id,)
+        ).fetchall()
+        new_facts = why_facts(report, month)
+        old_categories, old_items = _counts(old_facts)
+        new_categories, new_items = _counts(new_facts)
+        category_delta = Counter(new_categories)
+        category_delta.subtract(old_categories)
+        item_delta = Counter(new_items)
+        item_delta.subtract(old_items)
+        conn.executemany(
+            "INSERT INTO category_counts (kind, section, category, month, n) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (kind, section, category, month) DO UPDATE SET n = n + excluded.n",
+            [(*key, n) for key, n in category_delta.items() if n],
+        )
+        conn.executemany(
+            "INSERT INTO item_counts (item_id, n) VALUES (?, ?)"
+            " ON CONFLICT (item_id) DO UPDATE SET n = n + excluded.n",
+            [(item_id, n) for item_id, n in item_delta.items() if n],
+        )
+        conn.execute("DELETE FROM why_facts WHERE report_id = ?", (report_id,))
+        conn.executemany(
+            "INSERT INTO why_facts (report_id, section, position, item_id, category, m4, month)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(report_id, *fact) for fact in new_facts],
+        )
+
+        # First time each step was filled, and the running time-to-close per step
+        done = {step for (step,) in conn.execute("SELECT step FROM step_completions WHERE report_id = ?", (report_id,))}
+        filled = [step for step in STEPS if is_step_filled(report, step)]
+        newly_filled = [step for step in filled if step not in done]
+        conn.executemany(
+            "INSERT INTO step_completions (report_id, step, completed_at) VALUES (?, ?, ?)",
+            [(report_id, step, filled_at) for step in newly_filled],
+        )
+        conn.executemany(
+            "INSERT INTO step_close_stats (step, n, total_seconds) VALUES (?, 1, ?)"
+            " ON CONFLICT (step) DO UPDATE SET n = n + 1, total_seconds = total_seconds + excluded.total_seconds",
+            [(step, filled_at - created_at) for step in newly_filled],
+        )
+        if closed_at is None and len(filled) == len(STEPS):
+            closed_at = now
+
+        self._save_containments(conn, report_id, report, now, user)
+        self._save_report_files(conn, report_id, report)
+
+        # Attachments (content-addressed) and the report itself
+        self._store_attachments(conn, (a for _, a in report.attachments()))
+        conn.execute(
+            "INSERT INTO reports (report_id, created_at, updated_at, closed_at, report_date, prepared_by, title,"
+            " completed, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (report_id) DO UPDATE SET updated_at = excluded.updated_at,"
+            " closed_at = excluded.closed_at, report_date = excluded.report_date,"
+            " prepared_by = excluded.prepared_by, title = excluded.title, completed = excluded.completed,"
+            " body = excluded.body",
+            (report_id, created_at, now, closed_at, report.report_date, report.prepared_by, report_title(report),
+             len(filled), body),
+        )
+
+        # Change log: one event per changed field, a snapshot every SNAPSHOT_EVERY events
+        if old_body is None:
+            conn.execute(
+                "INSERT INTO report_snapshots (report_id, seq, at, body) VALUES (?, 0, ?, ?)", (report_id, now, body)
+            )
+            conn.execute(
+                "INSERT INTO report_events (report_id, seq, at, user, step, field, old_hash, new_hash)"
+                " VALUES (?, 1, ?, ?, ?, ?, '', ?)",
+                (report_id, now, user, HEADER, CREATED, text_hash(body)),
+            )
+            return
+        if old_body == body:
+            return
+        changes = diff(json.loads(old_body), data)
+        if not changes:
+            return
+        last_event, last_snapshot = conn.execute(
+            "SELECT (SELECT MAX(seq) FROM report_events WHERE report_id = ?),"
+            " (SELECT MAX(seq) FROM report_snapshots WHERE report_id = ?)",
+            (report_id, report_id),
+        ).fetchone()
+        if last_event is None and last_snapshot is None:
+            # Saved before the change log existed: its current body is where the history starts
+            conn.execute(
+                "INSERT INTO report_snapshots (report_id, seq, at, body) VALUES (?, 0, ?, ?)", (report_id, now, old_body)
+            )
+            last_snapshot = 0
+        seq = max(last_event or 0, last_snapshot or 0)
+        conn.executemany(
+            "INSERT INTO report_events (report_id, seq, at, user, step, field, old_hash, new_hash, value)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(report_id, seq + i, now, user, *change) for i, change in enumerate(changes, 1)],
+        )
+        seq += len(changes)
+        if seq - (last_snapshot or 0) >= SNAPSHOT_EVERY:
+            conn.execute(
+                "INSERT INTO report_snapshots (report_id, seq, at, body) VALUES (?, ?, ?, ?)", (report_id, seq, now, body)
+            )
+
+    @staticmethod
+    def _save_containments(conn, report_id, report, now, user=""):
+        """Bring the report's ``containments`` rows up to date (no writes when D4 did not change)."""
+        old = {
+            location: (status, owner, title, opened_at)
+            for location, status, owner, title, opened_at in conn.execute(
+                "SELECT location, status, owner, title, opened_at FROM containments WHERE report_id = ?", (report_id,)
+            )
+        }
+        new = containments(report, user)
+        if sorted(new) == sorted((location, *row[:3]) for location, row in old.items()):
+            return
+        conn.execute("DELETE FROM containments WHERE report_id = ?", (report_id,))
+        conn.executemany(
+            "INSERT INTO containments (report_id, location, status, owner, title, opened_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(report_id, *row, old[row[0]][3] if row[0] in old else now) for row in new],
+        )
+
+    def _index_containments(self):
+        """Fill ``containments`` from the stored reports (a store created before the board existed)."""
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT report_id, created_at, body FROM reports").fetchall()
+            for report_id, created_at, body in rows:
+                self._save_containments(self._conn, report_id, EightD.from_dict(json.loads(body)), created_at)
+
+    @staticmethod
+    def _save_report_files(conn, report_id, report):
+        digests = {a.digest for _, a in report.attachments()}
+        old = {digest for (digest,) in conn.execute("SELECT digest FROM report_files WHERE report_id = ?", (report_id,))}
+        if digests == old:
+            return
+        conn.execute("DELETE FROM report_files WHERE report_id = ?", (report_id,))
+        conn.executemany("INSERT INTO report_files (report_id, digest) VALUES (?, ?)", [(report_id, d) for d in digests])
+
+    def _index_report_files(self):
+        """Fill ``report_files`` from the stored reports (a store created before text extraction existed)."""
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT report_id, body FROM reports").fetchall()
+            for report_id, body in rows:
+                self._save_report_files(self._conn, report_id, EightD.from_dict(json.loads(body)))
+
+    @staticmethod
+    def _store_attachments(conn, attachments):
+        """Insert the bytes of attachments the store does not have yet (others are not read)."""
+        missing = {a.digest: a for a in attachments}
+        if not missing:
+            return
+        digests = list(missing)
+        stored = {
+            digest for (digest,) in conn.execute(
+                f"SELECT digest FROM attachments WHERE digest IN ({','.join('?' * len(digests))})", digests
+            )
+        }
+        conn.executemany(
+            "INSERT OR IGNORE INTO attachments (digest, size, data) VALUES (?, ?, ?)",
+            [(a.digest, a.size, a.getvalue()) for digest, a in missing.items() if digest not in stored],
+        )
+
+    def attachment_data(self, digest):
+        """Bytes of a stored attachment, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM attachments WHERE digest = ?", (digest,)).fetchone()
+            return row[0] if row else None
+
+    def attachment_chunks(self, digest, chunk_size):
+        """Bytes of a stored attachment in chunks of ``chunk_size``, read incrementally from the BLOB."""
+        with self._lock:
+            row = self._conn.execute("SELECT rowid, size FROM attachments WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(digest)
+        rowid, size = row
+        for offset in range(0, size, chunk_size):
+            with self._lock, self._conn.blobopen("attachments", "data", rowid, readonly=True) as blob:
+                blob.seek(offset)
+                chunk = blob.read(chunk_size)
+            yield chunk
+
+    def load(self, report_id, with_data=True):
+        """
+        The stored report, or None. ``with_data`` False leaves the attachment
+        bytes unread (``Attachment.getvalue`` fetches them through the spool).
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM reports WHERE report_id = ?", (report_id,)).fetchone()
+            if row is None:
+                return None
+            report = EightD.from_dict(json.loads(row[0]))
+            return self._with_data(report) if with_data else report
+
+    def _with_data(self, report):
+        for _, attachment in report.attachments():
+            data = self._conn.execute("SELECT data FROM attachments WHERE digest = ?", (attachment.digest,)).fetchone()
+            if data is not None:
+                attachment.data = data[0]
+        return report
+
+    def delete(self, report_id):
+        """Remove a report (and its sharing) and take its whys and step times back out of the aggregates."""
+        with self._lock, self._conn:
+            conn = self._conn
+            row = conn.execute("SELECT created_at FROM reports WHERE report_id = ?", (report_id,)).fetchone()
+            if row is None:
+                return False
+            facts = conn.execute(
+                "SELECT section, position, item_id, category, m4, month FROM why_facts WHERE report_id = ?",
+                (report_id,),
+            ).fetchall()
+            categories, items = _counts(facts)
+            conn.executemany(
+                "UPDATE category_counts SET n = n - ? WHERE kind = ? AND section = ? AND category = ? AND month = ?",
+                [(n, *key) for key, n in categories.items()],
+            )
+            conn.executemany("UPDATE item_counts SET n = n - ? WHERE item_id = ?", [(n, k) for k, n in items.items()])
+            conn.executemany(
+                "UPDATE step_close_stats SET n = n - 1, total_seconds = total_seconds - ? WHERE step = ?",
+                [
+                    (completed_at - row[0], step)
+                    for step, completed_at in conn.execute(
+                        "SELECT step, completed_at FROM step_completions WHERE report_id = ?", (report_id,)
+                    )
+                ],
+            )
+            for table in ("why_facts", "step_completions", "containments", "report_files", "report_parts",
+                          "shared_reports", "report_events", "report_snapshots", "reports"):
+                conn.execute(f"DELETE FROM {table} WHERE report_id = ?", (report_id,))
+            return True
+
+    def list_reports(self, limit=200):
+        """(report_id, title, report_date, completed, updated_at), most recently saved first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT report_id, title, report_date, completed, updated_at FROM reports"
+                " ORDER BY updated_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM reports").fetchone()[0]
+
+    def version(self):
+        """Changes whenever a report is saved or deleted (cache key for the dashboards)."""
+        with self._lock:
+            return tuple(self._conn.execute("SELECT count(*), max(updated_at) FROM reports").fetchone())
+
+    # ---------------------------
+    # Containment board
+    # ---------------------------
+    def open_containments(self, statuses=OPEN_STATUSES, locations=None, limit=500):
+        """
+        (report_id, location, status, owner, title, opened_at) of the
+        containments in ``statuses`` (and ``locations``), oldest first per
+        status and location: a range scan of the board index.
+        """
+        sql = "SELECT report_id, location, status, owner, title, opened_at FROM containments WHERE status IN ({})"
+        params = list(statuses)
+        sql = sql.format(", ".join("?" * len(params)))
+        if locations is not None:
+            sql += " AND location IN ({})".format(", ".join("?" * len(locations)))
+            params += list(locations)
+        with self._lock:
+            return self._conn.execute(sql + " ORDER BY status, location, opened_at LIMIT ?", (*params, limit)).fetchall()
+
+    def containment_counts(self):
+        """{(status, location): containments}, counted from the board index alone."""
+        with self._lock:
+            return {
+                (status, location): n for status, location, n in self._conn.execute(
+                    "SELECT status, location, count(*) FROM containments GROUP BY status, location"
+                )
+            }
+
+    # ---------------------------
+    # Shared editing
+    # ---------------------------
+    def share(self, report_id, report, bodies, editor="", now=None):
+        """
+        Save a report and open it for shared editing with ``bodies`` ({part:
+        JSON}) at version 1. Sharing an already shared report changes nothing.
+        Returns the report's stamp.
+        """
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            conn = self._conn
+            row = conn.execute("SELECT stamp FROM shared_reports WHERE report_id = ?", (report_id,)).fetchone()
+            if row is not None:
+                return row[0]
+            self._save(conn, report_id, report, now, editor)
+            conn.executemany(
+                "INSERT INTO report_parts (report_id, part, version, body, editor) VALUES (?, ?, 1, ?, ?)",
+                [(report_id, part, body, editor) for part, body in bodies.items()],
+            )
+            conn.execute("INSERT INTO shared_reports (report_id, stamp) VALUES (?, 1)", (report_id,))
+            return 1
+
+    def shared_stamp(self, report_id):
+        """The report's change stamp (what sessions poll), or None if it is not shared."""
+        with self._lock:
+            row = self._conn.execute("SELECT stamp FROM shared_reports WHERE report_id = ?", (report_id,)).fetchone()
+            return row[0] if row else None
+
+    def shared_parts(self, report_id):
+        """``PartRow`` of every part of a shared report."""
+        with self._lock:
+            return [
+                PartRow(*row) for row in self._conn.execute(
+                    "SELECT part, version, body, editor, holder, lease_until FROM report_parts WHERE report_id = ?",
+                    (report_id,),
+                )
+            ]
+
+    def list_shared(self, limit=200):
+        """(report_id, title, updated_at) of the shared reports, most recently changed first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT r.report_id, r.title, r.updated_at FROM shared_reports s JOIN reports r USING (report_id)"
+                " ORDER BY r.updated_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def commit_part(self, report_id, part, base_version, body, editor, holder, now=None, lease_seconds=30.0,
+                    attachments=()):
+        """
+        Compare-and-set one part of a shared report: it is written only if its
+        version is still ``base_version`` and no other holder has an unexpired
+        lease. A successful commit takes the lease for ``lease_seconds``, bumps
+        the part's version and the report's stamp, stores new ``attachments``
+        and updates the report row. Returns a ``CommitResult``.
+        """
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            conn = self._conn
+            cursor = conn.execute(
+                "UPDATE report_parts SET version = version + 1, body = ?, editor = ?, holder = ?, lease_until = ?"
+                " WHERE report_id = ? AND part = ? AND version = ? AND (holder IN ('', ?) OR lease_until <= ?)",
+                (body, editor, holder, now + lease_seconds, report_id, part, base_version, holder, now),
+            )
+            if cursor.rowcount == 0:
+                row = conn.execute(
+                    "SELECT version, body, editor, lease_until FROM report_parts WHERE report_id = ? AND part = ?",
+                    (report_id, part),
+                ).fetchone()
+                if row is None:
+                    raise KeyError(f"{report_id} {part}")
+                version, current, current_editor, lease_until = row
+                stamp = conn.execute(
+                    "SELECT stamp FROM shared_reports WHERE report_id = ?", (report_id,)
+                ).fetchone()[0]
+                status = CONFLICT if version != base_version else LOCKED
+                return CommitResult(status, version, stamp, current, current_editor, lease_until)
+            (stamp,) = conn.execute(
+                "UPDATE shared_reports SET stamp = stamp + 1 WHERE report_id = ? RETURNING stamp", (report_id,)
+            ).fetchone()
+            self._store_attachments(conn, attachments)
+            (stored,) = conn.execute("SELECT body FROM reports WHERE report_id = ?", (report_id,)).fetchone()
+            report = EightD.from_dict(json.loads(stored))
+            apply_part(report, part, body)
+            self._save(conn, report_id, report, now, editor)
+            return CommitResult(COMMITTED, base_version + 1, stamp, body, editor, now + lease_seconds)
+
+    # ---------------------------
+    # Change log
+    # ---------------------------
+    def events(self, report_id, limit=100):
+        """The report's latest logged changes (``history.Event``), newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, at, user, step, field, old_hash, new_hash, value FROM report_events"
+                " WHERE report_id = ? ORDER BY seq DESC LIMIT ?",
+                (report_id, limit),
+            ).fetchall()
+        return [Event(*row) for row in rows]
+
+    def _data_at(self, conn, report_id, seq):
+        """``to_dict`` form of a report after event ``seq``: the snapshot before it plus the events since."""
+        snapshot = conn.execute(
+            "SELECT seq, body FROM report_snapshots WHERE report_id = ? AND seq <= ? ORDER BY seq DESC LIMIT 1",
+            (report_id, seq),
+        ).fetchone()
+        base, data = (snapshot[0], json.loads(snapshot[1])) if snapshot else (0, empty_report())
+        return replay(data, conn.execute(
+            "SELECT step, field, value FROM report_events WHERE report_id = ? AND seq > ? AND seq <= ? ORDER BY seq",
+            (report_id, base, seq),
+        ))
+
+    def report_at(self, report_id, at=None, seq=None):
+        """
+        The report as it was at time ``at`` (or right after event ``seq``;
+        neither: its latest logged state), rebuilt from the change log. None
+        if nothing was logged for it by then.
+        """
+        with self._lock:
+            if seq is None:
+                # Newest first along the primary key: stops at the first row logged by then
+                found = [
+                    row[0] for table in ("report_events", "report_snapshots")
+                    for row in self._conn.execute(
+                        f"SELECT seq FROM {table} WHERE report_id = ? AND at <= ? ORDER BY seq DESC LIMIT 1",
+                        (report_id, float("inf") if at is None else at),
+                    )
+                ]
+                if not found:
+                    return None
+                seq = max(found)
+            return self._with_data(EightD.from_dict(self._data_at(self._conn, report_id, seq)))
+
+    def compact_events(self, before):
+        """
+        Fold every event logged before time ``before`` into one snapshot per
+        report and drop them (and the snapshots they supersede). Returns the
+        number of events folded.
+        """
+        folded = 0
+        with self._lock, self._conn:
+            conn = self._conn
+            targets = conn.execute(
+                "SELECT report_id, MAX(seq), MAX(at), COUNT(*) FROM report_events WHERE at < ? GROUP BY report_id",
+                (before,),
+            ).fetchall()
+            for report_id, seq, at, count in targets:
+                body = json.dumps(self._data_at(conn, report_id, seq), ensure_ascii=False, separators=(",", ":"))
+                conn.execute(
+                    "INSERT OR REPLACE INTO report_snapshots (report_id, seq, at, body) VALUES (?, ?, ?, ?)",
+                    (report_id, seq, at, body),
+                )
+                conn.execute("DELETE FROM report_events WHERE report_id = ? AND seq <= ?", (report_id, seq))
+                conn.execute("DELETE FROM report_snapshots WHERE report_id = ? AND seq < ?", (report_id, seq))
+                folded += count
+        return folded
+
+    def history_stats(self):
+        """(events, snapshots) kept in the change log."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM report_events), (SELECT COUNT(*) FROM report_snapshots)"
+            ).fetchone()
+
+    # ---------------------------
+    # Templates
+    # ---------------------------
+    def save_template(self, template_id, name, report, user="", now=None):
+        """Insert or replace a named template; only attachments the store lacks are written."""
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            self._store_attachments(self._conn, (a for _, a in report.attachments()))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO templates (template_id, name, title, created_by, updated_at, body)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (template_id, name, report_title(report), user, now,
+                 json.dumps(report.to_dict(), ensure_ascii=False, separators=(",", ":"))),
+            )
+
+    def list_templates(self):
+        """(template_id, name, title, created_by, updated_at) of every template, by name."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT template_id, name, title, created_by, updated_at FROM templates ORDER BY name COLLATE NOCASE"
+            ).fetchall()
+
+    def load_template(self, template_id):
+        """A template as an ``EightD`` (attachment bytes unread), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM templates WHERE template_id = ?", (template_id,)).fetchone()
+        return EightD.from_dict(json.loads(row[0])) if row else None
+
+    def delete_template(self, template_id):
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM templates WHERE template_id = ?", (template_id,)).rowcount > 0
+
+    def library_version(self):
+        """
+        Changes whenever a template is saved or deleted, a report saved or an
+        attachment's text extracted (cache key of the template picker).
+        """
+        with self._lock:
+            return tuple(self._conn.execute(
+                "SELECT count(*), max(updated_at), (SELECT max(updated_at) FROM reports),"
+                " (SELECT max(extracted_at) FROM attachment_text) FROM templates"
+            ).fetchone())
+
+    # ---------------------------
+    # AI drafts
+    # ---------------------------
+    def draft_text(self, key):
+        """Text of a cached draft, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM draft_cache WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def save_draft(self, key, provider, text, now=None):
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO draft_cache (key, provider, text, created_at) VALUES (?, ?, ?, ?)",
+                (key, provider, text, now),
+            )
+
+    # ---------------------------
+    # Attachment text
+    # ---------------------------
+    def attachment_text(self, digest):
+        """Text extracted from an attachment, or None if it never was."""
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM attachment_text WHERE digest = ?", (digest,)).fetchone()
+            return row[0] if row else None
+
+    def save_attachment_text(self, digest, text, now=None):
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO attachment_text (digest, text, extracted_at) VALUES (?, ?, ?)",
+                (digest, text, now),
+            )
+
+    def report_texts(self, report_ids):
+        """{report_id: [text, ...]} extracted from the attachments of the given reports."""
+        texts = {}
+        report_ids = list(report_ids)
+        with self._lock:
+            for first in range(0, len(report_ids), 500):
+                batch = report_ids[first:first + 500]
+                for report_id, text in self._conn.execute(
+                    "SELECT f.report_id, t.text FROM report_files f JOIN attachment_text t ON t.digest = f.digest"
+                    f" WHERE f.report_id IN ({','.join('?' * len(batch))})",
+                    batch,
+                ):
+                    texts.setdefault(report_id, []).append(text)
+        return texts
+
+    # ---------------------------
+    # Aggregates
+    # ---------------------------
+    def query(self, sql, params=()):
+        """(column names, rows) of a read-only query."""
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            return [d[0] for d in cursor.description], cursor.fetchall()
+
+    def rebuild_aggregates(self):
+        """Recompute the count tables from ``why_facts`` and ``step_completions`` (vectorized)."""
+        import pandas as pd
+
+        columns, rows = self.query("SELECT section, item_id, category, m4, month FROM why_facts")
+        facts = pd.DataFrame(rows, columns=columns)
+        by_category = facts.groupby(["section", "category", "month"]).size().reset_index(name="n")
+        by_4m = facts.groupby(["section", "m4", "month"]).size().reset_index(name="n")
+        by_item = facts[~facts["item_id"].isin(["", OTHER])].groupby("item_id").size()
+
+        columns, rows = self.query(
+            "SELECT s.step, s.completed_at - r.created_at AS seconds"
+            " FROM step_completions s JOIN reports r USING (report_id)"
+        )
+        steps = pd.DataFrame(rows, columns=columns).groupby("step")["seconds"].agg(n="size", total="sum")
+
+        with self._lock, self._conn:
+            conn = self._conn
+            for table in ("category_counts", "item_counts", "step_close_stats"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.executemany(
+                "INSERT INTO category_counts (kind, section, category, month, n) VALUES (?, ?, ?, ?, ?)",
+                [(KIND_CATALOG, section, category, month, int(n)) for section, category, month, n in
+                 by_category.itertuples(index=False)]
+                + [(KIND_4M, section, m4, month, int(n)) for section, m4, month, n in by_4m.itertuples(index=False)],
+            )
+            conn.executemany(
+                "INSERT INTO item_counts (item_id, n) VALUES (?, ?)", [(k, int(n)) for k, n in by_item.items()]
+            )
+            conn.executemany(
+                "INSERT INTO step_close_stats (step, n, total_seconds) VALUES (?, ?, ?)",
+                [(step, int(n), float(total)) for step, n, total in steps.itertuples()],
+            )
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    """Process-wide store at ``$EIGHTD_STORE_PATH`` (default: data/eightd.sqlite3)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ReportStore(os.environ.get(STORE_PATH_ENV) or DEFAULT_STORE_PATH)
+            default_spool().sources.append(_default.attachment_data)  # bytes of cloned attachments
+        return _default
@@ -0,0 +1,93 @@
+"""
+New 8Ds from team templates and past reports.
+
+``clone_report`` copies the text fields and D5 whys of a report into a new
+``EightD``. Attachments are referenced, not copied: the clone gets new
+``Attachment`` objects with the source's digest and the same bytes object,
+or none when the source's bytes were never read (``ReportStore.load`` with
+``with_data=False``, ``ReportStore.load_template``). Cloning therefore costs
+the same with fifty photos as with none; bytes are read on first use
+(``Attachment.getvalue``, through the spool and its store source), and
+saving the clone writes no attachment the store already has. Bytes are never
+edited in place: a changed file is a new upload with a new digest.
+
+Templates are reports saved under a name in the store's ``templates`` table.
+The picker lists ``TemplateEntry`` rows for templates and saved reports, and
+``search`` filters them by every word of a query. A saved report's entry
+also holds the text extracted from its TXT/XLSX/PDF evidence
+(``eightd.extract``), so a report can be found by what its files say.
+"""
+from typing import NamedTuple
+
+from eightd.model import STEPS, WHY_SECTIONS, Attachment, EightD, StepAnswer, WhyEntry
+from eightd.normalize import match_key
+
+TEMPLATE = "template"
+REPORT = "report"
+
+
+def clone_report(source, report_date="", steps=STEPS):
+    """A new report with the given steps of ``source`` (text, options, whys; attachments by reference)."""
+    report = EightD(report_date=report_date)
+    for step in steps:
+        answer = source.step(step)
+        report.steps[step] = StepAnswer(
+            answer=answer.answer,
+            attachments=[Attachment(a.name, a.mime, a.data, a.digest, a.size) for a in answer.attachments],
+            inspection_stage=list(answer.inspection_stage),
+            location=list(answer.location),
+            status=list(answer.status),
+            occ_answer=answer.occ_answer,
+            det_answer=answer.det_answer,
+            sys_answer=answer.sys_answer,
+        )
+    if "D5" in steps:
+        report.whys = {s: [WhyEntry(w.item_id, w.other) for w in source.whys[s]] for s in WHY_SECTIONS}
+    return report
+
+
+def template_id(name):
+    """Templates are keyed by name (case, spacing and Unicode form ignored): saving under a used name replaces it."""
+    return match_key(name)
+
+
+class TemplateEntry(NamedTuple):
+    kind: str  # TEMPLATE or REPORT
+    key: str   # template_id / report_id
+    label: str
+    text: str  # case-folded name, title and author (reports: and evidence text), for ``search``
+
+
+def template_entries(store, reports=200):
+    """Picker entries: every template (by name), then the latest saved reports."""
+    entries = [
+        TemplateEntry(TEMPLATE, template_id, f"📄 {name}", f"{name} {title} {author}".casefold())
+        for template_id, name, title, author, _ in store.list_templates()
+    ]
+    rows = store.list_reports(reports)
+    evidence = store.report_texts(report_id for report_id, *_ in rows)
+    entries += [
+        TemplateEntry(
+            REPORT, report_id, f"🗂️ {title} ({date})" if date else f"🗂️ {title}",
+            " ".join([title, date, *evidence.get(report_id, ())]).casefold(),
+        )
+        for report_id, title, date, _, _ in rows
+    ]
+    return entries
+
+
+def search(entries, query, limit=50):
+    """Entries containing every word of ``query`` (case-insensitive), at most ``limit``."""
+    words = match_key(query).split()
+    found = []
+    for entry in entries:
+        if all(word in entry.text for word in words):
+            found.append(entry)
+            if len(found) == limit:
+                break
+    return found
+
+
+def load_source(store, kind, key):
+    """The template or saved report behind a picker entry (attachment bytes unread), or None."""
+    return store.load_template(key) if kind == TEMPLATE else store.load(key, with_data=False)
@@ -0,0 +1,252 @@
+"""
+User-facing texts: translations, NPQP step notes and step guidance.
+"""
+
+# ---------------------------
+# Language dictionary
+# ---------------------------
+t = {
+    "en": {
+        "Inspection_Stage": "Inspection Stage",
+        "D1": "D1: Concern Details",
+        "D2": "D2: Similar Part Considerations",
+        "D3": "D3: Initial Analysis",
+        "D4": "D4: Implement Containment",
+        "D5": "D5: Final Analysis",
+        "D6": "D6: Permanent Corrective Actions",
+        "D7": "D7: Countermeasure Confirmation",
+        "D8": "D8: Follow-up Activities (Lessons Learned / Recurrence Prevention)",
+        "Report_Date": "Report Date",
+        "Prepared_By": "Prepared By",
+        "Root_Cause_Occ": "Root Cause (Occurrence)",
+        "Root_Cause_Det": "Root Cause (Detection)",
+        "Root_Cause_Sys": "Root Cause (Systemic)",
+        "Occurrence_Why": "Occurrence Why",
+        "Detection_Why": "Detection Why",
+        "Systemic_Why": "Systemic Why",
+        "Save": "💾 Save 8D Report",
+        "Download": "📥 Download XLSX",
+        "Evidence": "🗂️ Download evidence package (ZIP)",
+        "Training_Guidance": "Training Guidance",
+        "Example": "Example",
+        "FMEA_Failure": "FMEA Failure Occurrence",
+        "Location": "Material Location",
+        "Status": "Activity Status",
+        "Containment_Actions": "Containment Actions"
+    },
+    "es": {
+        "Inspection_Stage": "Etapa de Inspección",
+        "D1": "D1: Detalles de la preocupación",
+        "D2": "D2: Consideraciones de partes similares",
+        "D3": "D3: Análisis inicial",
+        "D4": "D4: Implementar contención",
+        "D5": "D5: Análisis final",
+        "D6": "D6: Acciones correctivas permanentes",
+        "D7": "D7: Confirmación de contramedidas",
+        "D8": "D8: Actividades de seguimiento (Lecciones aprendidas / Prevención de recurrencia)",
+        "Report_Date": "Fecha del informe",
+        "Prepared_By": "Preparado por",
+        "Root_Cause_Occ": "Causa raíz (Ocurrencia)",
+        "Root_Cause_Det": "Causa raíz (Detección)",
+        "Root_Cause_Sys": "Causa raíz (Sistémica)",
+        "Occurrence_Why": "Por qué Ocurrencia",
+        "Detection_Why": "Por qué Detección",
+        "Systemic_Why": "Por qué Sistémico",
+        "Save": "💾 Guardar Informe 8D",
+        "Download": "📥 Descargar XLSX",
+        "Evidence": "🗂️ Descargar paquete de evidencias (ZIP)",
+        "Training_Guidance": "Guía de Entrenamiento",
+        "Example": "Ejemplo",
+        "FMEA_Failure": "Ocurrencia de falla FMEA",
+        "Location": "Ubicación del material",
+        "Status": "Estado de la actividad",
+        "Containment_Actions": "Acciones de contención"
+    }
+}
+# English
+t["en"].update({
+    "Concern_Details": "Concern Details",
+    "Similar_Part_Considerations": "Similar Part Considerations",
+    "Initial_Analysis": "Initial Analysis",
+    "Follow_up_Activities": "Follow-up Activities"
+})
+
+# Spanish
+t["es"].update({
+    "Concern_Details": "Detalles de la Preocupación",
+    "Similar_Part_Considerations": "Consideraciones de Piezas Similares",
+    "Initial_Analysis": "Análisis Inicial",
+    "Follow_up_Activities": "Actividades de Seguimiento"
+})
+
+# ---------------------------
+# NPQP 8D steps with examples
+# ---------------------------
+npqp_steps = [
+    ("D1", {"en":"Describe the customer concerns clearly.", "es":"Describa claramente las preocupaciones del cliente."}, {"en":"Customer reported static noise in amplifier during end-of-line test.", "es":"El cliente reportó ruido estático en el amplificador durante la prueba final."}),
+    ("D2", {"en":"Check for similar parts, models, generic parts, other colors, etc.", "es":"Verifique partes similares, modelos, partes genéricas, otros colores, etc."}, {"en":"Similar model radio, Front vs. rear speaker.", "es":"Radio de modelo similar, altavoz delantero vs trasero."}),
+    ("D3", {"en":"Perform an initial investigation to identify obvious issues.", "es":"Realice una investigación inicial para identificar problemas evidentes."}, {"en":"Visual inspection of solder joints, initial functional tests.", "es":"Inspección visual de soldaduras, pruebas funcionales iniciales."}),
+    ("D4", {"en":"Define temporary containment actions and material location.", "es":"Defina acciones de contención temporales y ubicación del material."}, {"en":"Post Quality Alert, Increase Inspection, Inventory Certification","es":"Implementar Ayuda Visual, Incrementar Inspeccion, Certificar Inventario"}),
+    ("D5", {"en": "Use 5-Why analysis to determine the root cause.", "es": "Use el análisis de 5 Porqués para determinar la causa raíz."}, {"en": "Final 'Why' from the Analysis will give a good indication of the True Root Cause", "es": "El último \"Por qué\" del análisis proporcionará una idea clara de la causa raíz del problema"}),
+    ("D6", {"en":"Define corrective actions that eliminate the root cause permanently.", "es":"Defina acciones correctivas que eliminen la causa raíz permanentemente."}, {"en":"Update soldering process, redesign fixture.", "es":"Actualizar proceso de soldadura, rediseñar herramienta."}),
+    ("D7", {"en":"Verify that corrective actions effectively resolve the issue.", "es":"Verifique que las acciones correctivas resuelvan efectivamente el problema."}, {"en":"Functional tests on corrected amplifiers.", "es":"Pruebas funcionales en amplificadores corregidos."}),
+    ("D8", {"en":"Document lessons learned, update standards, FMEAs.", "es":"Documente lecciones aprendidas, actualice estándares, FMEAs."}, {"en":"Update SOPs, PFMEA, work instructions.", "es":"Actualizar SOPs, PFMEA, instrucciones de trabajo."})
+]
+
+# ---------------------------
+# Step-specific guidance content (bilingual)
+# ---------------------------
+guidance_content = {
+    "D1": {
+        "en": {"title": "Define the Team & Describe the Problem","tips": """ 
+- **Define the Team**:
+  - Identify all team members involved in solving the issue.
+  - Include functions like Quality, Engineering, Production, Supplier, etc.
+  - Assign clear roles and responsibilities.
+  - Example: *John (Quality) – Team Leader; Maria (Engineering) – Root Cause Analyst*.
+
+- **Describe the Problem**:
+  - Focus on **facts and measurable data** (avoid assumptions).
+  - Use 5W2H (Who, What, Where, When, Why, How, How Many).
+  - Example: *Customer reports radio does not power on after 2 hours of use in hot conditions*.
+"""
+        },
+        "es": {"title": "Definir el Equipo y Describir el Problema","tips": """
+- **Definir el Equipo**:
+  - Identifica a todos los miembros del equipo involucrados.
+  - Incluye áreas como Calidad, Ingeniería, Producción, Proveedor, etc.
+  - Asigna roles y responsabilidades claras.
+  - Ejemplo: *Juan (Calidad) – Líder del Equipo; María (Ingeniería) – Análisis de Causa Raíz*.
+
+- **Describir el Problema**:
+  - Enfócate en **hechos y datos medibles** (evita suposiciones).
+  - Usa 5W2H (Quién, Qué, Dónde, Cuándo, Por qué, Cómo, Cuántos).
+  - Ejemplo: *El cliente reporta que el radio no enciende después de 2 horas de uso en condiciones de calor*.
+"""
+        }
+    },
+    "D2": {
+        "en": {"title": "Similar Parts That Could Be Affected","tips": """
+- Identify parts, models, colors, or assemblies that could also be affected.
+- Consider variations in suppliers, batches, or production lines.
+- Example: *Front vs. rear speaker, similar model radios, alternate supplier components.*
+"""
+        },
+        "es": {"title": "Partes Similares que Podrían Verse Afectadas","tips": """
+- Identifica piezas, modelos, colores o ensamblajes que también podrían verse afectados.
+- Considera variaciones de proveedores, lotes o líneas de producción.
+- Ejemplo: *Altavoz delantero vs trasero, radios de modelo similar, componentes de proveedor alternativo.*
+"""
+        }
+    },
+    "D3": {
+        "en": {"title": "Initial Analysis","tips": """
+- Gather and review all relevant data.
+- Look for patterns, trends, or unusual occurrences.
+- Example: *Review production logs and defect reports to identify common failure points.*
+"""
+        },
+        "es": {"title": "Análisis Inicial","tips": """
+- Recolecta y revisa todos los datos relevantes.
+- Busca patrones, tendencias o sucesos inusuales.
+- Ejemplo: *Revisar registros de producción e informes de defectos para identificar puntos de falla comunes.*
+"""
+        }
+    },
+    "D4": {
+        "en": {"title": "Implement Containment","tips": """
+- Describe temporary actions to isolate defective material.
+- Example: *Quarantined 200 pcs in warehouse, stopped shipments to customer.*
+"""
+        },
+        "es": {"title": "Implementar Contención","tips": """
+- Describe las acciones temporales para aislar material defectuoso.
+- Ejemplo: *Se pusieron en cuarentena 200 piezas en almacén, se detuvieron envíos al cliente.*
+"""
+        }
+    },
+    "D5": {
+        "en": {"title": "Identify Root Cause","tips": """
+- Use tools like 5 Why’s or Fishbone Diagram.
+- Verify the root cause with evidence.
+- Example: *Incorrect torque due to missing calibration on assembly tool.*
+"""
+        },
+        "es": {"title": "Identificar la Causa Raíz","tips": """
+- Usa herramientas como 5 Porqués o Diagrama de Ishikawa.
+- Verifica la causa raíz con evidencia.
+- Ejemplo: *Par incorrecto debido a falta de calibración en herramienta de ensamble.*
+"""
+        }
+    },
+    "D6": {
+        "en": {"title": "Verify Permanent Corrective Actions","tips": """
+- Define permanent solutions to eliminate the root cause.
+- Validate with testing or simulation.
+- Example: *Implemented torque monitoring system to prevent missed calibrations.*
+"""
+        },
+        "es": {"title": "Verificar Acciones Correctivas Permanentes","tips": """
+- Define soluciones permanentes para eliminar la causa raíz.
+- Valida con pruebas o simulaciones.
+- Ejemplo: *Se implementó sistema de monitoreo de torque para evitar calibraciones omitidas.*
+"""
+        }
+    },
+    "D7": {
+        "en": {"title": "Prevent Recurrence","tips": """
+- Update documentation, training, and procedures.
+- Example: *Updated Work Instruction #WI-321 and retrained all operators.*
+"""
+        },
+        "es": {"title": "Prevenir Recurrencia","tips": """
+- Actualiza documentación, entrenamiento y procedimientos.
+- Ejemplo: *Se actualizó la Instrucción de Trabajo #WI-321 y se capacitó a todos los operadores.*
+"""
+        }
+    },
+    "D8": {
+        "en": {"title": "Follow-Up Activities (Lessons Learned / Recurrence Prevention)","tips": """
+- Document lessons learned from this 8D process.
+- Identify opportunities to prevent similar issues in other products or lines.
+- Example: *Standardized torque verification checklist applied to all new model launches.*
+- Ensure sustainability of corrective actions through regular audits or reviews.
+"""
+        },
+        "es": {"title": "Actividades de Seguimiento (Lecciones Aprendidas / Prevención de Recurrencia)","tips": """
+- Documenta las lecciones aprendidas de este proceso 8D.
+- Identifica oportunidades para prevenir problemas similares en otros productos o líneas.
+- Ejemplo: *Lista de verificación de torque estandarizada aplicada a todos los nuevos lanzamientos de modelo.*
+- Asegura la sostenibilidad de las acciones correctivas mediante auditorías o revisiones regulares.
+"""
+        }
+    }
+}
+
+# ---------------------------
+# Option lists for D3 / D4 multiselects
+# ---------------------------
+# Reports store the English value; the lists are parallel so the index maps
+# it to the Spanish label.
+inspection_stage_options = {
+    "en": ["During Process / Manufacture", "After manufacture (e.g. Final Inspection)", "Prior dispatch"],
+    "es": ["Durante el proceso / fabricación", "Después de la fabricación (por ejemplo, inspección final)", "Antes del envío"],
+}
+
+location_options = {
+    "en": ["Work in progress", "Stores stock", "Warehouse stock", "Service parts"],
+    "es": ["En proceso", "Stock de almacén", "Stock de bodega", "Piezas de servicio"],
+}
+
+status_options = {
+    "en": ["Pending", "In Progress", "Completed"],
+    "es": ["Pendiente", "En Progreso", "Completado"],
+}
+
+
+def translate_option(options, value, lang="en"):
+    """Label of a stored (English) option value in ``lang``; unknown values pass through."""
+    try:
+        return options["es" if lang == "es" else "en"][options["en"].index(value)]
+    except ValueError:
+        return value
@@ -0,0 +1,41 @@
+"""
+Theme stylesheet for the page.
+
+The CSS lives in ``static/theme.css`` and is served by Streamlit's static file
+server, so each rerun only emits a one-line ``@import`` (versioned by content
+hash, so browsers cache it until the file changes) plus a marker element that
+switches the dark variant on. Set ``EIGHTD_INLINE_CSS=1`` to inline the sheet
+instead when static serving is not enabled.
+"""
+import hashlib
+import os
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+THEME_FILE = "theme.css"
+INLINE_ENV = "EIGHTD_INLINE_CSS"
+
+_cache = {}
+
+
+def _bundle():
+    """(css text, short content hash), re-read only when the file's mtime changes."""
+    path = os.path.join(STATIC_DIR, THEME_FILE)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            raw = f.read()
+        cached = (mtime, raw.decode("utf-8"), hashlib.sha256(raw).hexdigest()[:12])
+        _cache[path] = cached
+    return cached[1], cached[2]
+
+
+def theme_html(dark=False, inline=None):
+    """HTML for ``st.markdown(..., unsafe_allow_html=True)`` that applies the light or dark theme."""
+    if inline is None:
+        inline = os.environ.get(INLINE_ENV, "") not in ("", "0")
+    css, version = _bundle()
+    marker = f'<span class="eightd-theme{" eightd-dark" if dark else ""}"></span>'
+    if inline:
+        return f"<style>{css}</style>{marker}"
+    return f'<style>@import url("app/static/{THEME_FILE}?v={version}");</style>{marker}'
@@ -0,0 +1,774 @@
+"""
+Streamlit view helpers shared by the page script.
+
+This is the only module in the package that imports Streamlit. Widgets read
+their initial value from the active ``EightD`` of the session's ``Workspace``
+and write the result straight back into it. Their keys go through
+``widget_key`` so that loading another report gives them fresh state.
+
+A shared report (``eightd.shared``) is synced at the end of the page run,
+once the widgets have written this run's edits into the report: co-editors'
+commits are pulled, then local edits pushed. Parts changed by someone else
+only drop their own widgets' state (``_PART_WIDGETS``), and a fragment polls
+the report's stamp so their edits show up without the user doing anything.
+
+AI drafts (``eightd.drafts``), exports and the text extraction of uploaded
+files (``eightd.extract``) run off the script thread; the page keeps the job
+ID in session state (or the file's digest) and a fragment polls the job.
+"""
+import copy
+import datetime
+import time
+import uuid
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from eightd import bundle, drafts, extract, shared, templates
+from eightd.catalogs import (
+    catalog_category,
+    catalog_item,
+    catalog_label,
+    category_ids,
+    category_of,
+    search_catalog,
+)
+from eightd.fuzzy import match_catalog
+from eightd.jobs import DONE, FAILED, default_queue, export_key
+from eightd.model import OTHER, Attachment, EightD, WhyEntry
+from eightd.normalize import normalize_text
+from eightd.sessions import registry
+from eightd.store import default_store
+from eightd.workspace import Workspace
+
+WORKSPACE_KEY = "eightd"
+SHARED_KEY = "eightd_shared"   # {report_id: SharedState} of the shared reports open in this session
+EDITOR_KEY = "eightd_editor"
+HOLDER_KEY = "eightd_holder"   # this session's token (lease holder, export job owner)
+EXPORT_JOB_KEY = "eightd_export_job"
+EXPORT_PENDING_KEY = "eightd_export_pending"  # (export key, since) of content not exported yet
+EXPORT_POLL_SECONDS = 1
+EXPORT_SETTLE_SECONDS = 1
+POLL_SECONDS = 3
+DRAFT_POLL_SECONDS = 0.5
+EXTRACT_POLL_SECONDS = 1
+
+
+def current_workspace():
+    return st.session_state[WORKSPACE_KEY]
+
+
+def current_report():
+    return st.session_state[WORKSPACE_KEY].active
+
+
+def widget_key(name):
+    """Key for a widget bound to the active report; it changes whenever another report is loaded."""
+    return f"{name}@{st.session_state[WORKSPACE_KEY].generation}"
+
+
+def init_workspace(report_date):
+    """Create the session's workspace (one blank report) on first run."""
+    if WORKSPACE_KEY not in st.session_state:
+        st.session_state[WORKSPACE_KEY] = Workspace(EightD(report_date=report_date))
+    return current_workspace()
+
+
+def track_session(workspace):
+    """Register this run with the session registry and give idle sessions a chance to be evicted."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    registry.touch(ctx.session_id, workspace)
+    registry.maybe_sweep(exclude={ctx.session_id})
+
+
+def attachment_from_upload(uploaded_file):
+    return Attachment(name=normalize_text(uploaded_file.name), mime=uploaded_file.type or "", data=uploaded_file.getvalue())
+
+
+# ---------------------------
+# D5: render WHY slots
+# ---------------------------
+PICKER_PAGE_SIZE = 50
+_MORE = "__more__"
+
+
+def _use_suggestion(entry, select_key, item_id):
+    """Button callback: turn an "Other" why into the suggested catalog item."""
+    entry.item_id, entry.other = item_id, ""
+    del st.session_state[select_key]  # the category select starts again from the entry
+
+
+def _next_page(item_key, page_key):
+    """Item select callback: picking the "… more" option shows another page instead."""
+    if st.session_state[item_key] == _MORE:
+        st.session_state[page_key] = st.session_state.get(page_key, 1) + 1
+        del st.session_state[item_key]  # back to the slot's current item
+
+
+def render_whys(whys, section, label_prefix, lang_key, query="", disabled=False):
+    """
+    Two selectboxes per slot: a category (or "Other", with free text) and an
+    item. Items come from ``search_catalog`` for the chosen category and/or
+    the section's search ``query``, one page of ``PICKER_PAGE_SIZE`` at a
+    time, so a slot only ever sends a page of options however large the
+    catalog is. Under an "Other"
+    text box the closest catalog items are offered as one-click replacements.
+    """
+    categories = [""] + category_ids(section) + [OTHER]
+
+    def category_name(value):
+        if value in ("", OTHER):
+            return value or "—"
+        return catalog_category(value, lang_key) or value
+
+    for idx, entry in enumerate(whys):
+        # No-duplicate options: hide items already picked in other slots
+        selected_so_far = {w.item_id for i, w in enumerate(whys) if i != idx and w.item_id and not w.is_other}
+        current = "" if entry.is_other else entry.item_id
+        category_key = widget_key(f"d5_{section}_sel_{idx}")
+        col_category, col_item = st.columns([2, 3])
+        initial = OTHER if entry.is_other else category_of(current) if current else ""
+        category = col_category.selectbox(
+            f"{label_prefix} {idx+1}",
+            categories,
+            index=categories.index(initial) if initial in categories else 0,  # a plant file may drop categories
+            format_func=category_name,
+            key=category_key,
+            disabled=disabled,
+        )
+
+        if category == OTHER:
+            entry.item_id = OTHER
+            entry.other = normalize_text(col_item.text_input(
+                f"Please specify {label_prefix} {idx+1}",
+                value=entry.other,
+                key=widget_key(f"d5_{section}_other_{idx}"),
+                disabled=disabled,
+            ))
+            suggestions = match_catalog(entry.other, section, exclude=selected_so_far) if entry.other.strip() else []
+            if suggestions:
+                st.caption("Closest catalog items:")
+            for match in suggestions:
+                st.button(
+                    f"↪ {catalog_label(match.item_id, lang_key)}",
+                    key=widget_key(f"d5_{section}_suggest_{idx}_{match.item_id}"),
+                    type="tertiary",
+                    disabled=disabled,
+                    on_click=_use_suggestion,
+                    args=(entry, category_key, match.item_id),
+                )
+            continue
+
+        entry.other = ""  # clear previous Other if changed
+        page_key = widget_key(f"d5_{section}_page_{idx}_{category}")
+        limit = st.session_state.get(page_key, 1) * PICKER_PAGE_SIZE
+        # Pick a category or search first: no options until one narrows the catalog
+        matches = search_catalog(section, query, category, exclude=selected_so_far) if category or query else []
+        options = [""] + matches[:limit]
+        if current and current not in options and (not category or category_of(current) == category):
+            options.insert(1, current)  # keep the slot's item even when the search hides it
+        if len(matches) > limit:
+            options.append(_MORE)
+
+        def item_name(value, remaining=len(matches) - limit, short=bool(category)):
+            if value == _MORE:
+                return f"… {remaining} more (narrow the search)"
+            if not value:
+                return ""
+            return catalog_item(value, lang_key) if short else catalog_label(value, lang_key)
+
+        item_key = widget_key(f"d5_{section}_item_{idx}_{category}")
+        selection = col_item.selectbox(
+            f"{label_prefix} {idx+1} item",
+            options,
+            index=options.index(current) if current in options else 0,
+            format_func=item_name,
+            key=item_key,
+            label_visibility="hidden",
+            disabled=disabled,
+            on_change=_next_page,
+            args=(item_key, page_key),
+        )
+        entry.item_id = "" if selection == _MORE else selection
+
+
+# --- WHY section wrapper ---
+def render_why_section(whys, section, label, lang_key):
+    st.markdown(f"### {label}")
+    locked = render_part_status(f"D5.{section}", lang_key)
+    query = st.text_input(
+        f"🔎 Search {label} items",
+        key=widget_key(f"d5_{section}_search"),
+        placeholder="Start of a word, or any part of a category or item",
+    )
+    render_whys(whys, section, label, lang_key, query, disabled=locked)
+
+    st.markdown("<div class='why-divider'></div>", unsafe_allow_html=True)
+    # Add-button: ONLY place that appends.
+    if st.button(f"➕ Add another {label}", key=widget_key(f"add_d5_{section}_whys_btn"), disabled=locked):
+        whys.append(WhyEntry())
+        st.session_state["_force_d5_tab"] = True
+
+
+# ---------------------------
+# Workspace: switch / new / close / compare
+# ---------------------------
+def _switch_report(picker_key):
+    current_workspace().switch(st.session_state[picker_key])
+
+
+def reset_report(report_date):
+    """Button callback: replace the active report with a blank one (same slot in the workspace)."""
+    workspace = current_workspace()
+    if _shared_states().pop(workspace.active_id, None) is not None:
+        # Never blank a shared report for everyone: leave it and start a new one instead
+        workspace.close(workspace.active_id)
+        workspace.new(EightD(report_date=report_date))
+        return
+    workspace.reset(EightD(report_date=report_date))
+
+
+def _new_report(report_date):
+    current_workspace().new(EightD(report_date=report_date))
+
+
+def _close_report(report_date):
+    workspace = current_workspace()
+    _shared_states().pop(workspace.active_id, None)
+    workspace.close(workspace.active_id, report_date=report_date)
+
+
+def render_workspace_switcher(workspace, report_date):
+    """Sidebar picker over the open reports plus New / Close buttons (all applied in callbacks)."""
+    st.sidebar.header("🗂️ Open 8D Reports")
+    titles = {s.report_id: f"{s.title} ({s.completed}/8)" for s in workspace.summaries()}
+    picker_key = widget_key("workspace_pick")
+    st.sidebar.selectbox(
+        f"Active report ({len(workspace)} open)",
+        workspace.ids,
+        index=workspace.ids.index(workspace.active_id),
+        format_func=titles.get,
+        key=picker_key,
+        on_change=_switch_report,
+        args=(picker_key,),
+    )
+    col_new, col_close = st.sidebar.columns(2)
+    col_new.button("➕ New 8D", key="workspace_new", on_click=_new_report, args=(report_date,))
+    col_close.button("✖ Close 8D", key="workspace_close", on_click=_close_report, args=(report_date,))
+
+
+def _save_report():
+    workspace = current_workspace()
+    default_store().save(workspace.active_id, workspace.active, user=_editor())
+    st.toast("💾 8D saved")
+
+
+def _import_report(uploader_key):
+    from eightd.xlsx_import import XlsxImportError, import_excel
+
+    uploaded = st.session_state.get(uploader_key)
+    if uploaded is None:
+        return
+    try:
+        report = import_excel(uploaded.getvalue())
+    except XlsxImportError as e:
+        st.toast(f"⚠️ Could not import {uploaded.name}: {e}")
+        return
+    current_workspace().new(report)
+    st.toast(f"📥 Imported {uploaded.name}")
+
+
+def render_import_uploader():
+    """Open a previously downloaded 8D workbook as a new report in the workspace."""
+    st.sidebar.file_uploader(
+        "📥 Import 8D from Excel",
+        type=["xlsx"],
+        key="workspace_import",
+        on_change=_import_report,
+        args=("workspace_import",),
+    )
+
+
+def render_save_button():
+    """Save the active report to the local store (feeds the Analytics page); shared reports save as they are edited."""
+    if shared_state() is None:
+        st.sidebar.button("💾 Save 8D", key="workspace_save", on_click=_save_report)
+
+
+def _export_status(job_id, label, file_name, polling):
+    """Download button once the job is done; "preparing…" until then."""
+    job = default_queue().get(job_id)
+    if job is None or (polling and job.finished):
+        st.rerun()  # evicted (resubmit), or done: the full run shows it and stops the polling
+    if job.status == DONE:
+        st.download_button(label, data=job.data, file_name=file_name, mime=job.mime)
+    elif job.status == FAILED:
+        st.error(f"⚠️ Export failed: {job.error}")
+    else:
+        st.button(label, disabled=True, key="export_pending")
+        st.caption("⏳ Preparing the Excel report…")
+
+
+def _export_due(key):
+    """True once the content has been ``key`` for ``EXPORT_SETTLE_SECONDS``; each edit restarts the wait."""
+    pending_key, since = st.session_state.get(EXPORT_PENDING_KEY, (None, 0.0))
+    if pending_key != key:
+        st.session_state[EXPORT_PENDING_KEY] = (key, time.time())
+        return False
+    return time.time() - since >= EXPORT_SETTLE_SECONDS
+
+
+def _export_settle(key, label):
+    """Disabled button and "preparing…" while edits come in; a full run submits the export once they settle."""
+    if _export_due(key):
+        st.rerun()
+    st.button(label, disabled=True, key="export_pending")
+    st.caption("⏳ Preparing the Excel report…")
+
+
+def render_export_download(report, lang_key, label, file_name):
+    """
+    Sidebar download of the active report's workbook. The export runs on the
+    export queue (``eightd.jobs``), off the script thread; a fragment polls
+    the job until the file is ready, and unchanged content is served from
+    the queue's cache without exporting again. New content is only submitted
+    once it has not changed for ``EXPORT_SETTLE_SECONDS``, so a burst of
+    edits does not start a build per rerun (running builds cannot be
+    cancelled).
+    """
+    queue = default_queue()
+    owner = _holder()
+    key = export_key(report, lang_key)
+    previous = st.session_state.get(EXPORT_JOB_KEY)
+    if previous not in (None, key):
+        queue.release(previous, owner)  # an export of content edited since is not waited for any more
+        st.session_state[EXPORT_JOB_KEY] = None
+    if queue.get(key) is None and not _export_due(key):
+        with st.sidebar:
+            st.fragment(_export_settle, run_every=EXPORT_POLL_SECONDS)(key, label)
+        return
+    job = queue.submit(report, lang_key, owner=owner, job_id=key)
+    st.session_state[EXPORT_JOB_KEY] = job.job_id
+    polling = not job.finished
+    with st.sidebar:
+        st.fragment(_export_status, run_every=EXPORT_POLL_SECONDS if polling else None)(
+            job.job_id, label, file_name, polling
+        )
+
+
+def _evidence_file(report, lang_key):
+    return bundle.bundle_file(copy.deepcopy(report), lang_key, default_store())  # the copy shares the attachment bytes
+
+
+def render_evidence_download(report, lang_key, label):
+    """
+    Sidebar download of the evidence package (``eightd.bundle``): the ZIP is
+    only built when the button is clicked, off the script thread, from a
+    copy of the report taken then.
+    """
+    st.sidebar.download_button(
+        label,
+        data=lambda: _evidence_file(report, lang_key),
+        file_name=bundle.bundle_name(report, lang_key),
+        mime=bundle.BUNDLE_MIME,
+        on_click="ignore",
+        key="evidence_download",
+    )
+
+
+# ---------------------------
+# Templates
+# ---------------------------
+@st.cache_data(show_spinner=False)
+def _template_entries(_store, version):
+    return templates.template_entries(_store)
+
+
+def _new_from_template(picker_key, report_date):
+    kind, key = st.session_state[picker_key].split(":", 1)
+    del st.session_state[picker_key]
+    source = templates.load_source(default_store(), kind, key)
+    if source is None:
+        st.toast("⚠️ That template or report no longer exists")
+        return
+    current_workspace().new(templates.clone_report(source, report_date))
+    st.toast("📄 New 8D created from the template")
+
+
+def _save_template():
+    name = st.session_state.get("template_name", "").strip()
+    if not name:
+        st.toast("✍️ Name the template first")
+        return
+    default_store().save_template(
+        templates.template_id(name), name, templates.clone_report(current_report()), user=_editor()
+    )
+    st.session_state["template_name"] = ""
+    st.toast(f"📄 Template “{name}” saved")
+
+
+def render_template_controls(report_date):
+    """
+    Sidebar: start a new 8D from a team template or a saved report (texts and
+    whys copied, attachments referenced by digest), or save the active one as
+    a template. The list is cached until a template or report is saved.
+    """
+    st.sidebar.header("📄 Templates")
+    store = default_store()
+    query = st.sidebar.text_input("Search templates and saved 8Ds", key="template_search")
+    entries = templates.search(_template_entries(store, store.library_version()), query)
+    if entries:
+        labels = {f"{e.kind}:{e.key}": e.label for e in entries}
+        st.sidebar.selectbox(
+            "New 8D from",
+            list(labels),
+            index=None,
+            format_func=lambda value: labels.get(value, value),
+            placeholder="Choose a template or report",
+            key="template_pick",
+            on_change=_new_from_template,
+            args=("template_pick", report_date),
+        )
+    elif query:
+        st.sidebar.caption("No template or saved 8D matches.")
+    st.sidebar.text_input("Template name", key="template_name", placeholder="e.g. Connector crimp issue")
+    st.sidebar.button("📄 Save this 8D as a template", key="template_save", on_click=_save_template)
+
+
+# ---------------------------
+# Evidence text
+# ---------------------------
+def _extract_status(digest, lang_key, polling):
+    job = extract.default_extractor().get(digest)
+    if job is None or (polling and job.finished):
+        st.rerun()  # dropped (resubmit), or done: the full run shows it and stops the polling
+    if job.status == extract.DONE:
+        if not job.text.strip():
+            st.caption("🔎 No text found in this file (scanned PDF?)")
+            return
+        mentions = ", ".join(f"{category} {n}" for category, n in extract.mentions_4m(job.text, lang_key)[:3])
+        st.caption(f"🔎 {len(job.text):,} characters of text indexed" + (f" · 4M mentions: {mentions}" if mentions else ""))
+    elif job.status == extract.UNSUPPORTED:
+        st.caption(f"ℹ️ {job.error}")
+    elif job.status == extract.FAILED:
+        st.caption(f"⚠️ Could not read the text: {job.error}")
+    else:
+        st.caption("⏳ Reading the text…")
+
+
+def render_attachment_text(attachment, lang_key):
+    """
+    Caption under an uploaded TXT/XLSX/PDF: how much text was extracted for
+    the search and what the 4M classifier finds in it, polled while the
+    extractor reads the file. Files seen before come from the store's cache.
+    """
+    job = extract.default_extractor().submit(attachment)
+    if job is None:
+        return
+    polling = not job.finished
+    st.fragment(_extract_status, run_every=EXTRACT_POLL_SECONDS if polling else None)(job.digest, lang_key, polling)
+
+
+# ---------------------------
+# AI drafts
+# ---------------------------
+_DRAFT_LABELS = {
+    drafts.ROOT_CAUSE: "✨ AI draft: root-cause statement ({})",
+    drafts.ACTIONS: "✨ AI draft: corrective actions ({})",
+}
+
+
+def _drafts():
+    try:
+        api_key = st.secrets.get(drafts.API_KEY_ENV)
+    except FileNotFoundError:  # no secrets file: the provider falls back to the environment
+        api_key = None
+    try:
+        return drafts.default_drafts(api_key)
+    except ValueError as e:  # e.g. $EIGHTD_DRAFT_PROVIDER=openai without a key: drafts stay available offline
+        st.toast(f"⚠️ {e}; using offline drafts")
+        return drafts.default_drafts(provider="offline")
+
+
+def _request_draft(kind, section, lang_key):
+    prompt = drafts.draft_prompt(current_report(), kind, section, lang_key)
+    if not prompt.whys:
+        st.toast("✍️ Add the whys of this section before asking for a draft")
+        return
+    try:
+        job = _drafts().submit(prompt, user=_holder())
+    except drafts.DraftRateLimited as e:
+        st.toast(f"⏳ Too many AI drafts, try again in {e.retry_after:.0f} s")
+        return
+    st.session_state[widget_key(f"draft_{kind}_{section}")] = job.job_id
+
+
+def _use_draft(section, text):
+    setattr(current_report().step("D6"), f"{section}_answer", text)
+    st.session_state.pop(widget_key(f"d6_{section}"), None)
+
+
+def _draft_status(job_id, kind, section, polling, disabled):
+    """The draft as it streams in; once done, D6 drafts can be copied into their answer."""
+    job = _drafts().get(job_id)
+    if job is None or (polling and job.finished):
+        st.rerun()  # dropped, or done: the full run shows it and stops the polling
+    st.text_area(_DRAFT_LABELS[kind].format(section), value=job.text, height=120, disabled=True)
+    if job.status == drafts.FAILED:
+        st.error(f"⚠️ Draft failed: {job.error}")
+    elif not job.finished:
+        st.caption("✍️ Drafting…")
+    elif job.cached:
+        st.caption("⚡ From the draft cache")
+    if job.status == drafts.DONE and kind == drafts.ACTIONS:
+        st.button(
+            "Use this draft", key=widget_key(f"draft_use_{section}"), on_click=_use_draft,
+            args=(section, job.text), disabled=disabled,
+        )
+
+
+def render_draft(kind, section, lang_key, disabled=False):
+    """
+    "Draft with AI" button for one why section (``drafts.ROOT_CAUSE`` or
+    ``drafts.ACTIONS``) and the latest draft asked for, streamed in by a
+    polling fragment while the provider writes it.
+    """
+    st.button(
+        "✨ Draft with AI", key=widget_key(f"draft_ask_{kind}_{section}"), on_click=_request_draft,
+        args=(kind, section, lang_key), disabled=disabled,
+    )
+    key = widget_key(f"draft_{kind}_{section}")
+    job_id = st.session_state.get(key)
+    if job_id is None:
+        return
+    job = _drafts().get(job_id)
+    if job is None:
+        del st.session_state[key]
+        return
+    polling = not job.finished
+    st.fragment(_draft_status, run_every=DRAFT_POLL_SECONDS if polling else None)(
+        job_id, kind, section, polling, disabled
+    )
+
+
+def render_workspace_compare(workspace):
+    """Side-by-side overview of every open report, built from the cached summaries."""
+    if len(workspace) < 2:
+        return
+    with st.expander(f"📊 Compare open 8D reports ({len(workspace)})"):
+        st.dataframe(
+            [
+                {
+                    "Active": "▶" if s.report_id == workspace.active_id else "",
+                    "Concern (D1)": s.title,
+                    "Date": s.report_date,
+                    "Completed": f"{s.completed}/8",
+                    "Whys": s.whys,
+                    "Files": s.attachments,
+                }
+                for s in workspace.summaries()
+            ],
+            hide_index=True,
+            width="stretch",
+        )
+
+
+def render_change_history(report_id, limit=50):
+    """Who changed which field of the active report when, from the store's change log."""
+    events = default_store().events(report_id, limit)
+    if not events:
+        return
+    with st.expander("🕑 Change history"):
+        st.dataframe(
+            [
+                {
+                    "When": datetime.datetime.fromtimestamp(e.at).strftime("%Y-%m-%d %H:%M:%S"),
+                    "Who": e.user or "—",
+                    "Step": e.step or "Header",
+                    "Field": e.field.replace("_", " "),
+                    "Change": f"{e.old_hash or '∅'} → {e.new_hash or '∅'}",
+                }
+                for e in events
+            ],
+            hide_index=True,
+            width="stretch",
+        )
+
+
+# ---------------------------
+# Shared editing
+# ---------------------------
+# Widget names (before the "@generation" of widget_key) that show each part
+_PART_WIDGETS = {
+    "D1": ("d1_answer",),
+    "D2": ("ans_D2",),
+    "D3": ("d3_",),
+    "D4": ("d4_",),
+    "D5.occ": ("d5_occ_",),
+    "D5.det": ("d5_det_",),
+    "D5.sys": ("d5_sys_",),
+    "D6": ("d6_",),
+    "D7": ("d7_",),
+    "D8": ("ans_D8",),
+}
+
+
+def _shared_states():
+    return st.session_state.setdefault(SHARED_KEY, {})
+
+
+def shared_state():
+    """``SharedState`` of the active report, or None if it is not shared."""
+    return _shared_states().get(current_workspace().active_id)
+
+
+def _holder():
+    if HOLDER_KEY not in st.session_state:
+        st.session_state[HOLDER_KEY] = uuid.uuid4().hex
+    return st.session_state[HOLDER_KEY]
+
+
+def _editor():
+    return st.session_state.get(EDITOR_KEY, "").strip()
+
+
+def _reset_part_widgets(parts):
+    """Drop the widget state of the given parts so they show the report's new values."""
+    suffix = f"@{current_workspace().generation}"
+    prefixes = tuple(prefix for part in parts for prefix in _PART_WIDGETS[part])
+    for key in [k for k in st.session_state if isinstance(k, str) and k.endswith(suffix)]:
+        if key[:-len(suffix)].startswith(prefixes):
+            del st.session_state[key]
+
+
+def _share_report():
+    workspace = current_workspace()
+    _shared_states()[workspace.active_id] = shared.share(
+        default_store(), workspace.active_id, workspace.active, _editor(), _holder()
+    )
+    st.toast("🤝 8D shared: others can open it from the sidebar")
+
+
+def _open_shared(picker_key):
+    report_id = st.session_state[picker_key]
+    del st.session_state[picker_key]
+    workspace = current_workspace()
+    if report_id in workspace:
+        workspace.switch(report_id)
+        return
+    try:
+        report, state = shared.join(default_store(), report_id, _holder())
+    except KeyError:
+        st.toast("⚠️ That 8D is no longer shared")
+        return
+    workspace.new(report, report_id=report_id)
+    _shared_states()[report_id] = state
+
+
+def _keep_mine(part):
+    shared.keep_mine(shared_state(), part)
+
+
+def _take_theirs(part):
+    shared.take_theirs(default_store(), shared_state(), current_report(), part)
+    _reset_part_widgets([part])
+
+
+def sync_shared():
+    """
+    End of the page run: apply co-editors' commits to the parts this session
+    has not edited, then commit the ones it has. Reruns the page when that
+    changed what it shows (new values, locks or conflicts).
+    """
+    state = shared_state()
+    if state is None:
+        return
+    store = default_store()
+    shown = (set(state.conflicts), set(state.locks))
+    applied = shared.pull(store, state, current_report())
+    shared.push(store, state, current_report(), _editor())
+    if applied:
+        _reset_part_widgets(applied)
+    if applied or (set(state.conflicts), set(state.locks)) != shown:
+        st.rerun()
+    # After the sync, so in a full run it finds nothing new; it only pulls on its own ticks
+    _poll_shared()
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def _poll_shared():
+    """
+    One stamp lookup per tick; the page reruns only when the shared report
+    changed or a lease shown as held ran out. Widget edits rerun the whole
+    page, never just this fragment, so on a tick the report holds every
+    local edit and is safe to pull into.
+    """
+    state = shared_state()
+    if state is None:
+        return
+    now = time.time()
+    expired = [part for part, lock in state.locks.items() if lock.until <= now]
+    for part in expired:
+        del state.locks[part]
+    if expired or default_store().shared_stamp(state.report_id) != state.stamp:
+        applied = shared.pull(default_store(), state, current_report(), now)
+        if applied:
+            _reset_part_widgets(applied)
+        st.rerun()
+
+
+def render_share_controls(workspace):
+    """Sidebar: your name, share the active report, open a report someone else shared."""
+    st.sidebar.header("🤝 Shared Editing")
+    st.sidebar.text_input("Your name (shown to co-editors)", key=EDITOR_KEY)
+    if shared_state() is None:
+        st.sidebar.button("🤝 Share this 8D", key="shared_share", on_click=_share_report)
+    else:
+        st.sidebar.caption("Shared: your changes are saved for everyone as you edit.")
+    titles = {
+        report_id: title for report_id, title, _ in default_store().list_shared()
+        if report_id != workspace.active_id
+    }
+    if titles:
+        st.sidebar.selectbox(
+            "Open a shared 8D",
+            list(titles),
+            index=None,
+            format_func=lambda report_id: titles.get(report_id, report_id),
+            placeholder="Choose a report",
+            key="shared_open",
+            on_change=_open_shared,
+            args=("shared_open",),
+        )
+
+
+def render_part_status(part, lang_key):
+    """
+    Lock banner and per-field conflict panel of one part of a shared report.
+    Returns True while another session holds the part's lease (its widgets
+    should be disabled).
+    """
+    state = shared_state()
+    if state is None:
+        return False
+    editor = state.locked_by(part)
+    if editor:
+        st.info(f"🔒 {editor} is editing this part. It unlocks {int(shared.LEASE_SECONDS)} s after their last change.")
+    conflict = state.conflicts.get(part)
+    if conflict is not None:
+        with st.container(border=True):
+            st.warning(f"⚠️ {conflict.editor or 'Someone'} changed this part while you were editing it.")
+            mine = shared.part_body(current_report(), part)
+            for name in conflict.fields:
+                st.markdown(f"**{name.replace('_', ' ').capitalize()}**")
+                col_mine, col_theirs = st.columns(2)
+                col_mine.caption("Yours")
+                col_mine.text(shared.field_text(part, mine, name, lang_key) or "—")
+                col_theirs.caption(conflict.editor or "Theirs")
+                col_theirs.text(shared.field_text(part, conflict.theirs, name, lang_key) or "—")
+            col_keep, col_take = st.columns(2)
+            col_keep.button("Keep mine", key=widget_key(f"shared_keep_{part}"), on_click=_keep_mine, args=(part,))
+            col_take.button("Take theirs", key=widget_key(f"shared_take_{part}"), on_click=_take_theirs, args=(part,))
+    return editor is not None
@@ -0,0 +1,180 @@
+"""
+Several open 8D reports in one session.
+
+A ``Workspace`` keeps exactly one report live (``active``, the one the widgets
+edit). Every other open report is parked as a zlib-compressed pickle whose
+attachments have been spilled to the attachment spool first, so a parked
+report costs a few hundred bytes plus its text. Switching parks the active
+report and unpickles the target: the cost depends only on those two reports,
+not on how many are open, and no session-state keys are deleted.
+
+``generation`` changes every time a different report is loaded into
+``active`` (including a reset, which swaps in a blank one); the page derives widget keys from it (``eightd.ui.widget_key``)
+so widget state left over from the previous report is simply never read
+again.
+"""
+import pickle
+import uuid
+import zlib
+from dataclasses import dataclass
+
+from eightd.analysis import completed_steps
+from eightd.model import EightD
+from eightd.spool import default_spool
+
+UNTITLED = "Untitled 8D"
+TITLE_LENGTH = 40
+
+
+@dataclass(slots=True)
+class ReportSummary:
+    """What the switcher and the comparison table show, kept without unpickling the report."""
+
+    report_id: str
+    title: str
+    report_date: str
+    completed: int
+    whys: int
+    attachments: int
+    digests: frozenset = frozenset()
+
+
+def report_title(report):
+    concern = report.step("D1").answer.strip().splitlines()
+    if not concern:
+        return UNTITLED
+    title = concern[0].strip()
+    return title if len(title) <= TITLE_LENGTH else title[:TITLE_LENGTH - 1] + "…"
+
+
+def summarize(report_id, report):
+    attachments = [a for _, a in report.attachments()]
+    return ReportSummary(
+        report_id=report_id,
+        title=report_title(report),
+        report_date=report.report_date,
+        completed=completed_steps(report),
+        whys=sum(1 for entries in report.whys.values() for w in entries if w.item_id),
+        attachments=len(attachments),
+        digests=frozenset(a.digest for a in attachments),
+    )
+
+
+def new_report_id():
+    return uuid.uuid4().hex[:12]
+
+
+class Workspace:
+    __slots__ = ("active_id", "active", "generation", "_parked", "_summaries", "_spool", "__weakref__")
+
+    def __init__(self, report=None, spool=None):
+        self._spool = spool
+        self._parked = {}
+        self._summaries = {}
+        self.generation = 0
+        self.active_id = new_report_id()
+        self.active = report if report is not None else EightD()
+        self._summaries[self.active_id] = None
+
+    @property
+    def spool(self):
+        return self._spool or default_spool()
+
+    # ---------------------------
+    # Listing
+    # ---------------------------
+    @property
+    def ids(self):
+        """Open report IDs in the order they were opened."""
+        return list(self._summaries)
+
+    def __len__(self):
+        return len(self._summaries)
+
+    def __contains__(self, report_id):
+        return report_id in self._summaries
+
+    def summary(self, report_id):
+        if report_id == self.active_id:
+            return summarize(report_id, self.active)
+        return self._summaries[report_id]
+
+    def summaries(self):
+        return [self.summary(report_id) for report_id in self._summaries]
+
+    def parked_bytes(self):
+        return sum(len(blob) for blob in self._parked.values())
+
+    def digests(self):
+        """Digests of every attachment of every open report (parked ones included)."""
+        live = {a.digest for _, a in self.active.attachments()}
+        for report_id, summary in self._summaries.items():
+            if report_id != self.active_id:
+                live |= summary.digests
+        return live
+
+    # ---------------------------
+    # Switching
+    # ---------------------------
+    def _park_active(self):
+        spool = self.spool
+        for _, attachment in self.active.attachments():
+            spool.evict(attachment)
+        self._summaries[self.active_id] = summarize(self.active_id, self.active)
+        self._parked[self.active_id] = zlib.compress(pickle.dumps(self.active, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _activate(self, report_id, report):
+        self.active_id = report_id
+        self.active = report
+        self._summaries[report_id] = None
+        self.generation += 1
+
+    def switch(self, report_id):
+        """Make ``report_id`` the active report. Its attachments reload lazily from the spool."""
+        if report_id == self.active_id:
+            return self.active
+        blob = self._parked.pop(report_id)  # KeyError for unknown IDs, before anything is parked
+        try:
+            self._park_active()
+        except BaseException:
+            self._parked[report_id] = blob
+            raise
+        self._activate(report_id, pickle.loads(zlib.decompress(blob)))
+        return self.active
+
+    def reset(self, report=None):
+        """Replace the active report with ``report`` (blank by default) under the same ID."""
+        self._activate(self.active_id, report if report is not None else EightD())
+        return self.active
+
+    def new(self, report=None, report_id=None):
+        """
+        Open a new (blank unless given) report and make it active, under
+        ``report_id`` (e.g. a shared report's) or a fresh ID. Returns its ID.
+        """
+        if report_id in self._summaries:
+            raise ValueError(f"report {report_id} is already open")
+        self._park_active()
+        report_id = report_id or new_report_id()
+        self._activate(report_id, report if report is not None else EightD())
+        return report_id
+
+    def close(self, report_id, report_date=""):
+        """
+        Drop a report. Closing the active one switches to the most recently
+        opened remaining report, or to a fresh one if it was the last.
+        """
+        if report_id != self.active_id:
+            del self._summaries[report_id]
+            del self._parked[report_id]
+            return
+        del self._summaries[report_id]
+        if self._summaries:
+            next_id = list(self._summaries)[-1]
+            blob = self._parked.pop(next_id)
+            self._activate(next_id, pickle.loads(zlib.decompress(blob)))
+        else:
+            self._activate(new_report_id(), EightD(report_date=report_date))
+
+    def __repr__(self):
+        return f"Workspace(active={self.active_id!r}, open={len(self)})"
@@ -0,0 +1,223 @@
+"""
+Load an 8D back from an XLSX written by ``eightd.export.generate_excel``.
+
+Cells are streamed with openpyxl's ``read_only`` mode, which never builds the
+full worksheet in memory and skips the embedded pictures. The pictures are
+then read straight from the zip: the sheet's drawing part gives each picture's
+anchor row, and a picture belongs to the upload section ("D3 Uploaded Files /
+Photos") whose title row is the closest one above it. The export scales images
+to 300 px wide, so that is the size that comes back. Non-image attachments are
+only listed by name in the workbook and cannot be recovered.
+"""
+import io
+import mimetypes
+import posixpath
+import re
+import zipfile
+from xml.etree import ElementTree
+
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from eightd.catalogs import find_catalog_id
+from eightd.export import SHEET_TITLE, WHY_SEPARATOR
+from eightd.model import DEFAULT_WHY_SLOTS, OTHER, UPLOAD_STEPS, WHY_SECTIONS, Attachment, EightD, WhyEntry
+from eightd.normalize import normalize_chunk
+from eightd.texts import inspection_stage_options, location_options, status_options, t
+
+_NS = {
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "xdr": "http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing",
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+}
+
+# Column A labels of the D5-D7 rows -> (step, section)
+_SECTION_ROWS = {
+    "D5 - Root Cause (Occurrence)": ("D5", "occ"),
+    "D5 - Root Cause (Detection)": ("D5", "det"),
+    "D5 - Root Cause (Systemic)": ("D5", "sys"),
+    "D6 - Occurrence Countermeasure": ("D6", "occ"),
+    "D6 - Detection Countermeasure": ("D6", "det"),
+    "D6 - Systemic Countermeasure": ("D6", "sys"),
+    "D7 - Occurrence Countermeasure Verification": ("D7", "occ"),
+    "D7 - Detection Countermeasure Verification": ("D7", "det"),
+    "D7 - Systemic Countermeasure Verification": ("D7", "sys"),
+}
+_UPLOAD_TITLE = re.compile(r"^(D\d) (?:Uploaded Files / Photos|Archivos / Fotos Adjuntas)$")
+_D3_EXTRA = re.compile(r"^(?:Inspection Stage\(s\)|Etapa\(s\) de Inspección):\s*(.*)$", re.S)
+_D4_EXTRA = re.compile(r"^Location\(s\):\s*(.*?)\s*\|\s*Status\(es\):\s*(.*)$", re.S)
+
+
+class XlsxImportError(ValueError):
+    """The workbook is not an 8D report written by this app."""
+
+
+def _canonical(options):
+    """Displayed option (either language) -> canonical English value."""
+    return {label: en for lang in ("en", "es") for label, en in zip(options[lang], options["en"])}
+
+
+_STAGES = _canonical(inspection_stage_options)
+_LOCATIONS = _canonical(location_options)
+_STATUSES = _canonical(status_options)
+
+
+def _option_pattern(canonical):
+    """Any known label as a whole item of a ", "-joined list; longest first, as labels may contain commas."""
+    labels = "|".join(re.escape(label) for label in sorted(canonical, key=len, reverse=True))
+    return re.compile(rf"(?:^|(?<=,))\s*({labels})\s*(?=,|$)")
+
+
+_STAGE_PATTERN = _option_pattern(_STAGES)
+_LOCATION_PATTERN = _option_pattern(_LOCATIONS)
+_STATUS_PATTERN = _option_pattern(_STATUSES)
+
+
+def _options(text, canonical, pattern):
+    return [canonical[match.group(1)] for match in pattern.finditer(text)]
+
+
+def _whys(text):
+    entries = []
+    for label in (part.strip().replace("\\|", "|") for part in text.split(WHY_SEPARATOR)):
+        if not label:
+            continue
+        item_id = find_catalog_id(label)
+        entries.append(WhyEntry(item_id) if item_id else WhyEntry(OTHER, label))
+    entries += [WhyEntry() for _ in range(DEFAULT_WHY_SLOTS - len(entries))]
+    return entries
+
+
+def _str(value):
+    return "" if value is None else normalize_chunk(str(value))  # before the catalog lookups
+
+
+# ---------------------------
+# Cells (streamed)
+# ---------------------------
+def _read_cells(data):
+    """(report without attachments, sheet name, {upload step: title row}) from the cell values."""
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        titles = set(SHEET_TITLE.values())
+        name = next((n for n in wb.sheetnames if n in titles), None)
+        if name is None:
+            raise XlsxImportError(f"no '{SHEET_TITLE['en']}' / '{SHEET_TITLE['es']}' sheet found")
+        report = EightD(whys={section: [] for section in WHY_SECTIONS})
+        date_labels = {t[lang]["Report_Date"] for lang in ("en", "es")}
+        author_labels = {t[lang]["Prepared_By"] for lang in ("en", "es")}
+        upload_rows = {}
+        seen_steps = False
+        for row_number, row in enumerate(wb[name].iter_rows(min_row=1, max_col=3, values_only=True), start=1):
+            label, answer, extra = (_str(v) for v in (tuple(row) + (None, None, None))[:3])
+            label = label.strip()
+            if label in date_labels:
+                report.report_date = answer
+            elif label in author_labels:
+                report.prepared_by = answer
+            elif label in ("D1", "D2", "D8"):
+                report.step(label).answer = answer
+                seen_steps = True
+            elif label == "D3":
+                report.step("D3").answer = answer
+                match = _D3_EXTRA.match(extra)
+                if match:
+                    report.step("D3").inspection_stage = _options(match.group(1), _STAGES, _STAGE_PATTERN)
+            elif label == "D4":
+                report.step("D4").answer = answer
+                match = _D4_EXTRA.match(extra)
+                if match:
+                    report.step("D4").location = _options(match.group(1), _LOCATIONS, _LOCATION_PATTERN)
+                    report.step("D4").status = _options(match.group(2), _STATUSES, _STATUS_PATTERN)
+            elif label in _SECTION_ROWS:
+                step, section = _SECTION_ROWS[label]
+                if step == "D5":
+                    report.whys[section] = _whys(extra)
+                else:
+                    setattr(report.step(step), f"{section}_answer", answer)
+            elif (match := _UPLOAD_TITLE.match(label)) and match.group(1) in UPLOAD_STEPS:
+                upload_rows[match.group(1)] = row_number
+        if not seen_steps:
+            raise XlsxImportError("no 8D step rows (D1, D2, D8) found")
+        for section in WHY_SECTIONS:
+            if not report.whys[section]:
+                report.whys[section] = _whys("")
+        return report, name, upload_rows
+    finally:
+        wb.close()
+
+
+# ---------------------------
+# Pictures (from the zip)
+# ---------------------------
+def _rels(archive, part):
+    """Relationship Id -> absolute part name for ``part``."""
+    directory, filename = posixpath.split(part)
+    rels_name = posixpath.join(directory, "_rels", filename + ".rels")
+    if rels_name not in archive.namelist():
+        return {}
+    rels = {}
+    for rel in ElementTree.fromstring(archive.read(rels_name)).findall("rel:Relationship", _NS):
+        target = rel.get("Target")
+        target = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(directory, target))
+        rels[rel.get("Id")] = target
+    return rels
+
+
+def _pictures(archive, sheet_name):
+    """(anchor row, 1-based; media part name) of every picture on the sheet, top to bottom."""
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    sheet = next(
+        (s for s in workbook.iterfind("main:sheets/main:sheet", _NS) if s.get("name") == sheet_name), None
+    )
+    if sheet is None:
+        return []
+    sheet_part = _rels(archive, "xl/workbook.xml").get(sheet.get(f"{{{_NS['r']}}}id"))
+    if sheet_part is None:
+        return []
+    pictures = []
+    for drawing_part in _rels(archive, sheet_part).values():
+        if "/drawings/" not in drawing_part:
+            continue
+        media = _rels(archive, drawing_part)
+        drawing = ElementTree.fromstring(archive.read(drawing_part))
+        for anchor in list(drawing):
+            row = anchor.find("xdr:from/xdr:row", _NS)
+            blip = anchor.find(".//a:blip", _NS)
+            if row is None or blip is None:
+                continue
+            target = media.get(blip.get(f"{{{_NS['r']}}}embed"))
+            if target in archive.namelist():
+                pictures.append((int(row.text) + 1, target))
+    return sorted(pictures)
+
+
+def _attach_pictures(report, archive, sheet_name, upload_rows):
+    sections = sorted((row, step) for step, row in upload_rows.items())
+    counts = {}
+    for row, target in _pictures(archive, sheet_name):
+        owner = [step for title_row, step in sections if title_row < row]
+        if not owner:
+            continue  # e.g. the logo above the table
+        step = owner[-1]
+        counts[step] = counts.get(step, 0) + 1
+        extension = posixpath.splitext(target)[1]
+        report.step(step).attachments.append(Attachment(
+            name=f"{step}_photo_{counts[step]}{extension}",
+            mime=mimetypes.guess_type(target)[0] or "application/octet-stream",
+            data=archive.read(target),
+        ))
+
+
+def import_excel(data):
+    """An ``EightD`` from the bytes of an exported 8D workbook (raises ``XlsxImportError``)."""
+    try:
+        report, sheet_name, upload_rows = _read_cells(data)
+        if upload_rows:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                _attach_pictures(report, archive, sheet_name, upload_rows)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+        raise XlsxImportError(f"not a readable XLSX workbook ({e})") from e
+    return report
@@ -0,0 +1,118 @@
+import datetime
+import time
+
+import pandas as pd
+import streamlit as st
+
+from eightd import plant
+from eightd.jobs import default_queue
+from eightd.sessions import registry
+from eightd.store import default_store
+from eightd.theme import theme_html
+
+# ---------------------------
+# Page config
+# ---------------------------
+st.set_page_config(page_title="8D Admin – Sessions", page_icon="🛠️", layout="wide")
+
+st.markdown(theme_html(), unsafe_allow_html=True)
+st.markdown("<h1 class='eightd-title'>🛠️ Session Memory</h1>", unsafe_allow_html=True)
+st.caption(
+    f"Attachments of sessions idle for more than {registry.idle_timeout / 60:.0f} min are spilled to "
+    f"`{registry.spool.directory}` and reloaded when the session is used again."
+)
+
+
+def _mb(n):
+    return n / (1024 * 1024)
+
+
+# ---------------------------
+# Totals
+# ---------------------------
+sessions = registry.sessions()
+totals = registry.totals()
+
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("Open sessions", len(sessions))
+c2.metric("In memory", f"{_mb(totals.total):.1f} MB")
+c3.metric("Attachments in memory", f"{_mb(totals.attachments):.1f} MB")
+c4.metric("Spilled to disk", f"{_mb(registry.spool.disk_usage()):.1f} MB")
+
+# ---------------------------
+# Per-session table
+# ---------------------------
+if sessions:
+    rows = [
+        {
+            "Session": info.session_id[:8],
+            "Idle (min)": round(info.idle_seconds / 60, 1),
+            "Evicted": info.evicted,
+            "Reports": info.footprint.reports,
+            "Text (KB)": round(info.footprint.text / 1024, 1),
+            "Whys (KB)": round(info.footprint.whys / 1024, 1),
+            "Parked (KB)": round(info.footprint.parked / 1024, 1),
+            "Files": info.footprint.attachment_count,
+            "Files in memory (MB)": round(_mb(info.footprint.attachments), 2),
+            "Files on disk (MB)": round(_mb(info.footprint.spilled), 2),
+            "Total in memory (MB)": round(_mb(info.footprint.total), 2),
+        }
+        for info in sorted(sessions, key=lambda i: i.footprint.total, reverse=True)
+    ]
+    st.dataframe(pd.DataFrame(rows), hide_index=True, width="stretch")
+else:
+    st.info("No 8D sessions registered yet.")
+
+# ---------------------------
+# Manual eviction
+# ---------------------------
+st.markdown("---")
+col_a, col_b = st.columns(2)
+if col_a.button("🧹 Evict idle sessions now", type="primary"):
+    evicted, freed = registry.sweep()
+    st.success(f"Evicted {evicted} session(s), freed {_mb(freed):.1f} MB.")
+if col_b.button("🧹 Evict every session (idle > 1 min)"):
+    evicted, freed = registry.sweep(idle_timeout=60)
+    st.success(f"Evicted {evicted} session(s), freed {_mb(freed):.1f} MB.")
+
+# ---------------------------
+# Plant content
+# ---------------------------
+st.markdown("---")
+st.markdown("### 🏭 Plant catalogs & texts")
+plant_status = plant.refresh()
+if plant_status.path is None:
+    st.caption(f"Built-in catalogs and texts (set `${plant.PLANT_FILE_ENV}` to load a plant file).")
+elif plant_status.loaded_at is not None:
+    loaded = datetime.datetime.fromtimestamp(plant_status.loaded_at).strftime("%Y-%m-%d %H:%M:%S")
+    st.caption(f"Loaded `{plant_status.path}` at {loaded}; edits to the file are picked up on the next page run.")
+if plant_status.error:
+    st.error(f"Plant file not applied: {plant_status.error}")
+
+# ---------------------------
+# Export jobs
+# ---------------------------
+st.markdown("---")
+st.markdown("### 📤 Export jobs")
+export_stats = default_queue().stats()
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("Queued", export_stats["queued"])
+c2.metric("Running", export_stats["running"])
+c3.metric("Cached files", export_stats["done"])
+c4.metric("Cache size", f"{_mb(export_stats['cached_bytes']):.1f} MB")
+if export_stats["failed"]:
+    st.warning(f"{export_stats['failed']} export(s) failed; see the server log.")
+
+# ---------------------------
+# Change log
+# ---------------------------
+st.markdown("---")
+st.markdown("### 🕑 Change log")
+events, snapshots = default_store().history_stats()
+c1, c2 = st.columns(2)
+c1.metric("Logged changes", events)
+c2.metric("Snapshots", snapshots)
+keep_days = st.number_input("Keep individual changes for (days)", min_value=1, value=365, step=30)
+if st.button("🗜️ Fold older changes into snapshots"):
+    folded = default_store().compact_events(time.time() - keep_days * 86400)
+    st.success(f"Folded {folded} change(s) into snapshots.")
@@ -0,0 +1,106 @@
+import streamlit as st
+
+from eightd import analytics, plant
+from eightd.analytics import KIND_LABELS, SECTION_LABELS
+from eightd.catalogs import catalog_version
+from eightd.store import default_store
+from eightd.theme import theme_html
+
+# ---------------------------
+# Page config
+# ---------------------------
+st.set_page_config(page_title="8D Analytics", page_icon="📊", layout="wide")
+plant.refresh()
+
+st.markdown(theme_html(), unsafe_allow_html=True)
+st.markdown("<h1 class='eightd-title'>📊 Quality Analytics</h1>", unsafe_allow_html=True)
+
+store = default_store()
+version = store.version()
+report_count = version[0]
+st.caption(f"{report_count} saved 8D report(s) in `{store.path}`. Save a report from the sidebar of the main page.")
+
+
+# Aggregates only change when a report is saved, so cache per store version
+@st.cache_data(show_spinner=False)
+def _counts(_store, version):
+    return analytics.category_counts(_store)
+
+
+@st.cache_data(show_spinner=False)
+def _top_items(_store, version, catalogs, limit):
+    return analytics.top_items(_store, limit)
+
+
+@st.cache_data(show_spinner=False)
+def _close_times(_store, version):
+    return analytics.close_times(_store)
+
+
+if not report_count:
+    st.info("No saved 8D reports yet.")
+    st.stop()
+
+counts = _counts(store, version)
+
+# ---------------------------
+# Filters
+# ---------------------------
+col_kind, col_sections = st.columns([1, 2])
+kind = col_kind.radio("Group whys by", list(KIND_LABELS), format_func=KIND_LABELS.get, horizontal=True)
+sections = col_sections.multiselect(
+    "D5 sections", list(SECTION_LABELS), default=list(SECTION_LABELS), format_func=SECTION_LABELS.get
+)
+
+# ---------------------------
+# Pareto
+# ---------------------------
+st.markdown(f"### Pareto of root-cause categories ({KIND_LABELS[kind]})")
+pareto = analytics.pareto(counts, kind, sections)
+if pareto.empty:
+    st.info("No whys recorded for this selection.")
+else:
+    st.vega_lite_chart(
+        pareto,
+        {
+            "encoding": {"x": {"field": "category", "type": "nominal", "sort": None, "title": None}},
+            "layer": [
+                {"mark": "bar", "encoding": {"y": {"field": "n", "type": "quantitative", "title": "Whys"}}},
+                {
+                    "mark": {"type": "line", "point": True, "color": "#E4572E"},
+                    "encoding": {
+                        "y": {
+                            "field": "cumulative_pct", "type": "quantitative", "title": "Cumulative %",
+                            "scale": {"domain": [0, 100]},
+                        }
+                    },
+                },
+            ],
+            "resolve": {"scale": {"y": "independent"}},
+        },
+        width="stretch",
+    )
+    st.dataframe(pareto, hide_index=True, width="stretch")
+
+# ---------------------------
+# Trend
+# ---------------------------
+st.markdown("### Trend per category (by month the 8D was opened)")
+trend = analytics.trend(counts, kind, sections)
+if trend.empty:
+    st.info("No whys recorded for this selection.")
+else:
+    st.line_chart(trend)
+
+# ---------------------------
+# Top catalog items / time to close
+# ---------------------------
+col_items, col_steps = st.columns(2)
+with col_items:
+    st.markdown("### Most common D5 catalog items")
+    st.dataframe(_top_items(store, version, catalog_version(), 15), hide_index=True, width="stretch")
+with col_steps:
+    st.markdown("### Average days until each step is filled")
+    close_times = _close_times(store, version)
+    st.bar_chart(close_times, x="step", y="mean_days")
+    st.dataframe(close_times, hide_index=True, width="stretch")
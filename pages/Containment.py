@@ -0,0 +1,91 @@
+import datetime
+import os
+import time
+
+import pandas as pd
+import streamlit as st
+
+from eightd import plant
+from eightd.store import COMPLETED, OPEN_STATUSES, default_store
+from eightd.texts import location_options, status_options
+from eightd.theme import theme_html
+
+BOARD_REFRESH_ENV = "EIGHTD_BOARD_REFRESH"
+refresh_seconds = float(os.environ.get(BOARD_REFRESH_ENV) or 5)
+
+# ---------------------------
+# Page config
+# ---------------------------
+st.set_page_config(page_title="8D Containment Board", page_icon="🚧", layout="wide")
+plant.refresh()
+
+st.markdown(theme_html(), unsafe_allow_html=True)
+st.markdown("<h1 class='eightd-title'>🚧 Containment Board (D4)</h1>", unsafe_allow_html=True)
+st.caption(
+    f"D4 containments of every saved 8D by location and status, refreshed every {refresh_seconds:g} s "
+    f"(set `${BOARD_REFRESH_ENV}` to change). Reports appear here once saved from the main page."
+)
+
+NOT_SPECIFIED = "Not specified"
+
+# ---------------------------
+# Filters
+# ---------------------------
+col_loc, col_done = st.columns([3, 1])
+locations = col_loc.multiselect(
+    "Locations", location_options["en"] + [""], format_func=lambda v: v or NOT_SPECIFIED,
+    placeholder="All locations",
+)
+statuses = status_options["en"] if col_done.toggle("Show completed") else list(OPEN_STATUSES)
+
+
+def _age(seconds):
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.1f} d"
+
+
+# ---------------------------
+# Board (the index is re-read on every tick; nothing else reruns)
+# ---------------------------
+@st.fragment(run_every=refresh_seconds)
+def board(locations, statuses):
+    store = default_store()
+    counts = store.containment_counts()
+    columns = location_options["en"] + [""]
+    cols = st.columns(len(columns))
+    for col, location in zip(cols, columns):
+        open_count = sum(counts.get((status, location), 0) for status in OPEN_STATUSES)
+        col.metric(location or NOT_SPECIFIED, open_count, help="Open containments (Pending + In Progress)")
+
+    rows = store.open_containments(statuses, locations or None)
+    if not rows:
+        st.success("✅ No open containments.")
+    else:
+        now = time.time()
+        oldest_first = sorted(rows, key=lambda row: row[5])
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {
+                        "Status": status,
+                        "Location": location or NOT_SPECIFIED,
+                        "Age": _age(now - opened_at),
+                        "Owner": owner or "—",
+                        "8D": title,
+                        "Report": report_id,
+                        "Since": datetime.datetime.fromtimestamp(opened_at).strftime("%Y-%m-%d %H:%M"),
+                    }
+                    for report_id, location, status, owner, title, opened_at in oldest_first
+                ]
+            ),
+            hide_index=True,
+            width="stretch",
+        )
+    completed = sum(n for (status, _), n in counts.items() if status == COMPLETED)
+    st.caption(f"{completed} completed containment(s) · updated {datetime.datetime.now():%H:%M:%S}")
+
+
+board(locations, statuses)
@@ -0,0 +1,18 @@
+import pytest
+
+from eightd.model import EightD
+from eightd.store import ReportStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ReportStore(str(tmp_path / "store.sqlite3"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def report():
+    report = EightD(report_date="2026-10-19", prepared_by="Ann")
+    report.step("D1").answer = "Radio dead on arrival"
+    return report
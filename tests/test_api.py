@@ -0,0 +1,167 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from eightd import jobs, shared
+from eightd.api import make_server
+from eightd.jobs import ExportQueue
+
+TOKEN = "test-token"
+
+
+@pytest.fixture
+def api(store):
+    queue = ExportQueue(workers=1)
+    server = make_server(port=0, store=store, queue=queue, token=TOKEN)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def call(method, path, body=None, headers=None, raw=None, auth=True):
+        headers = dict(headers or {})
+        if auth:
+            headers["Authorization"] = f"Bearer {TOKEN}"
+        data = raw if raw is not None else (json.dumps(body).encode() if body is not None else None)
+        request = urllib.request.Request(base + path, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+    yield call
+    server.shutdown()
+    server.server_close()
+    queue.shutdown()
+
+
+def _create(api, report_id="R-1", **fields):
+    status, headers, body = api("POST", "/reports", {"report_id": report_id, **fields})
+    assert status == 201, body
+    return headers["ETag"], json.loads(body)
+
+
+def test_token_is_required(api):
+    assert api("GET", "/health", auth=False)[0] == 401
+    assert api("GET", "/health")[0] == 200
+
+
+def test_create_get_and_etag(api):
+    etag, report = _create(api, steps={"D1": {"answer": "Connector cracked"}})
+    assert report["steps"]["D1"]["answer"] == "Connector cracked"
+    status, headers, _ = api("GET", "/reports/R-1")
+    assert (status, headers["ETag"]) == (200, etag)
+    assert api("GET", "/reports/R-1", headers={"If-None-Match": etag})[0] == 304
+    assert api("GET", "/reports/missing")[0] == 404
+
+
+def test_duplicate_report_id_is_409(api):
+    _create(api)
+    assert api("POST", "/reports", {"report_id": "R-1"})[0] == 409
+
+
+def test_patch_with_if_match(api):
+    etag, _ = _create(api)
+    status, headers, body = api("PATCH", "/reports/R-1", {"steps": {"D2": {"answer": "Team"}}}, {"If-Match": etag})
+    assert status == 200 and json.loads(body)["steps"]["D2"]["answer"] == "Team"
+    assert headers["ETag"] != etag
+
+    # The client's copy is stale now
+    status, _, _ = api("PATCH", "/reports/R-1", {"prepared_by": "Bob"}, {"If-Match": etag})
+    assert status == 412
+    assert json.loads(api("GET", "/reports/R-1")[2])["prepared_by"] == ""
+
+
+@pytest.mark.parametrize("body", [
+    {"steps": {"D9": {"answer": "x"}}},
+    {"steps": {"D1": {"colour": "x"}}},
+    {"steps": {"D4": {"location": ["On the moon"]}}},
+    {"steps": {"D1": {"location": ["Warehouse stock"]}}},
+    {"whys": {"occ": ["occ-99.99"]}},
+    {"whys": {"occ": ["det-1.1"]}},
+    {"unknown": 1},
+])
+def test_invalid_changes_are_400(api, body):
+    _create(api)
+    assert api("PATCH", "/reports/R-1", body)[0] == 400
+
+
+def test_valid_options_and_whys_are_stored(api):
+    _create(api)
+    body = {
+        "steps": {"D4": {"location": ["Warehouse stock"]}},
+        "whys": {"occ": ["occ-1.1", {"item_id": "Other", "other": "operator not trained"}, ""]},
+    }
+    status, _, data = api("PATCH", "/reports/R-1", body)
+    report = json.loads(data)
+    assert status == 200
+    assert report["steps"]["D4"]["location"] == ["Warehouse stock"]
+    assert [w[0] for w in report["whys"]["occ"][:2]] == ["occ-1.1", "Other"]
+
+
+def test_limit_is_validated(api):
+    _create(api)
+    assert api("GET", "/reports?limit=abc")[0] == 400
+    assert api("GET", "/reports/R-1/events?limit=x")[0] == 400
+    status, _, body = api("GET", "/reports?limit=-5")
+    assert status == 200 and len(json.loads(body)["reports"]) == 1
+
+
+def test_shared_part_under_lease_is_409(api, store):
+    _create(api)
+    state = shared.share(store, "R-1", store.load("R-1"), "Ann", "session-a")
+    report = store.load("R-1")
+    report.step("D8").answer = "Thanks team"
+    assert shared.push(store, state, report, "Ann") == ["D8"]
+
+    status, _, body = api("PATCH", "/reports/R-1", {"steps": {"D8": {"answer": "overwritten"}}})
+    assert status == 409 and "Ann" in json.loads(body)["error"]
+    # Other parts are free
+    assert api("PATCH", "/reports/R-1", {"steps": {"D2": {"answer": "Team"}}})[0] == 200
+
+
+def test_attachment_download_name_is_escaped(api):
+    _create(api)
+    name = 'Prüf"bericht; x=1.txt'
+    status, _, body = api(
+        "POST", "/reports/R-1/attachments?step=D3&name=" + urllib.request.quote(name),
+        raw=b"hello", headers={"Content-Type": "text/plain"},
+    )
+    assert status == 201
+    status, headers, data = api("GET", f"/reports/R-1/attachments/{json.loads(body)['digest']}")
+    assert (status, data) == (200, b"hello")
+    disposition = headers["Content-Disposition"]
+    assert disposition.startswith('attachment; filename="Pruf_bericht_ x_1.txt"; ')
+    assert "filename*=UTF-8''Pr%C3%BCf%22bericht%3B%20x%3D1.txt" in disposition
+
+
+def test_export_is_202_while_building_then_cached(api, monkeypatch):
+    _create(api, steps={"D1": {"answer": "Connector cracked"}})
+    release = threading.Event()
+    generate, mime = jobs.EXPORTERS["xlsx"]
+    monkeypatch.setitem(jobs.EXPORTERS, "xlsx", (lambda report, lang: release.wait(10) and generate(report, lang), mime))
+
+    status, headers, body = api("GET", "/reports/R-1/export.xlsx?wait=0")
+    assert status == 202 and headers["Retry-After"] == "1"
+    assert json.loads(body)["status"] in (jobs.QUEUED, jobs.RUNNING)
+
+    release.set()
+    status, headers, body = api("GET", "/reports/R-1/export.xlsx")
+    assert status == 200 and body[:2] == b"PK"
+    assert api("GET", "/reports/R-1/export.xlsx", headers={"If-None-Match": headers["ETag"]})[0] == 304
+
+
+def test_export_wait_timeout_is_202(api, monkeypatch):
+    import eightd.api
+
+    _create(api)
+    release = threading.Event()
+    generate, mime = jobs.EXPORTERS["xlsx"]
+    monkeypatch.setitem(jobs.EXPORTERS, "xlsx", (lambda report, lang: release.wait(10) and generate(report, lang), mime))
+    monkeypatch.setattr(eightd.api, "EXPORT_WAIT_SECONDS", 0.1)
+    try:
+        assert api("GET", "/reports/R-1/export.xlsx")[0] == 202
+    finally:
+        release.set()
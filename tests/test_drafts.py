@@ -0,0 +1,102 @@
+import pytest
+
+from eightd import drafts
+from eightd.model import WhyEntry
+
+
+class CountingProvider(drafts.OfflineProvider):
+    """The offline stand-in, counting the drafts that reach it."""
+
+    name = "counting"
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def stream(self, prompt):
+        self.calls += 1
+        yield from super().stream(prompt)
+
+
+class FailingProvider(drafts.DraftProvider):
+    name = "failing"
+
+    def stream(self, prompt):
+        raise RuntimeError("backend down")
+        yield
+
+
+@pytest.fixture
+def prompt(report):
+    report.whys["occ"][0] = WhyEntry("occ-1.1")
+    return drafts.draft_prompt(report, drafts.ROOT_CAUSE, "occ", "en")
+
+
+def _finish(job):
+    job.future.result(timeout=10)
+    return job
+
+
+def test_provider_defaults_to_offline(monkeypatch):
+    monkeypatch.delenv(drafts.DRAFT_PROVIDER_ENV, raising=False)
+    assert isinstance(drafts.make_provider(api_key="sk-test"), drafts.OfflineProvider)
+    monkeypatch.setenv(drafts.DRAFT_PROVIDER_ENV, "openai")
+    with pytest.raises(ValueError):
+        drafts.make_provider()
+    assert isinstance(drafts.make_provider(api_key="sk-test"), drafts.OpenAIProvider)
+
+
+def test_provider_is_abstract():
+    with pytest.raises(TypeError):
+        drafts.DraftProvider()
+
+
+def test_offline_draft_streams_the_whole_text(store, prompt):
+    queue = drafts.DraftQueue(drafts.OfflineProvider(), store)
+    job = _finish(queue.submit(prompt, user="ann"))
+    assert job.status == drafts.DONE
+    assert job.text.startswith("The occurrence root cause is:")
+    queue.shutdown()
+
+
+def test_same_prompt_coalesces_and_is_cached_across_restarts(store, prompt):
+    provider = CountingProvider()
+    queue = drafts.DraftQueue(provider, store)
+    first = _finish(queue.submit(prompt, user="ann"))
+    assert queue.submit(prompt, user="bob") is first
+    queue.shutdown()
+
+    restarted = drafts.DraftQueue(provider, store)
+    cached = restarted.submit(prompt, user="ann")
+    assert (cached.status, cached.cached, cached.text) == (drafts.DONE, True, first.text)
+    assert provider.calls == 1
+    restarted.shutdown()
+
+
+def test_key_ignores_case_spacing_and_unicode_forms():
+    a = drafts.DraftPrompt(drafts.ROOT_CAUSE, "occ", "en", "Radio dead", ("Cable “cut” at  pin 2",))
+    b = drafts.DraftPrompt(drafts.ROOT_CAUSE, "occ", "en", "radio DEAD", ('cable "cut" at pin 2',))
+    assert a.key("offline") == b.key("offline")
+    assert a.key("offline") != a.key("openai:gpt-4o-mini")
+
+
+def test_rate_limit_counts_only_provider_calls(store, prompt, report):
+    queue = drafts.DraftQueue(drafts.OfflineProvider(), store, rate=1)
+    _finish(queue.submit(prompt, user="ann"))
+    queue.submit(prompt, user="ann")  # coalesced: free
+    other = drafts.draft_prompt(report, drafts.ACTIONS, "occ", "en")
+    with pytest.raises(drafts.DraftRateLimited) as e:
+        queue.submit(other, user="ann")
+    assert e.value.retry_after > 0
+    assert queue.submit(other, user="bob") is not None  # per user
+    queue.shutdown()
+
+
+def test_failed_draft_is_reported_and_retried(store, prompt):
+    queue = drafts.DraftQueue(FailingProvider(), store)
+    job = queue.submit(prompt, user="ann")
+    job.future.result(timeout=10)
+    assert job.status == drafts.FAILED and "backend down" in job.error
+    assert store.draft_text(job.job_id) is None
+    assert queue.submit(prompt, user="ann") is not job
+    queue.shutdown()
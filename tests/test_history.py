@@ -0,0 +1,85 @@
+import eightd.store
+from eightd import history
+from eightd.model import EightD, WhyEntry
+
+
+def _edit(store, report, at, step, text, user="Ann"):
+    report.step(step).answer = text
+    store.save("r1", report, now=at, user=user)
+
+
+def test_first_save_is_one_created_event(store, report):
+    store.save("r1", report, now=100.0, user="Ann")
+    [event] = store.events("r1")
+    assert (event.user, event.step, event.field) == ("Ann", history.HEADER, history.CREATED)
+
+
+def test_one_event_per_changed_field(store, report):
+    store.save("r1", report, now=100.0, user="Ann")
+    report.step("D2").answer = "Team of four"
+    report.whys["occ"][0] = WhyEntry("occ-1.1")
+    store.save("r1", report, now=200.0, user="Bob")
+    store.save("r1", report, now=300.0, user="Bob")  # nothing changed: nothing logged
+
+    changes = {(e.step, e.field, e.user) for e in store.events("r1") if e.seq > 1}
+    assert changes == {("D2", "answer", "Bob"), ("D5", "whys.occ", "Bob")}
+
+
+def test_report_at_replays_to_any_point(store, report):
+    store.save("r1", report, now=100.0, user="Ann")
+    _edit(store, report, 200.0, "D2", "first")
+    _edit(store, report, 300.0, "D2", "second")
+    _edit(store, report, 400.0, "D2", "")
+
+    assert store.report_at("r1", at=50.0) is None
+    assert store.report_at("r1", at=150.0).step("D2").answer == ""
+    assert store.report_at("r1", at=250.0).step("D2").answer == "first"
+    assert store.report_at("r1", at=350.0).step("D2").answer == "second"
+    assert store.report_at("r1").to_dict() == store.load("r1").to_dict()
+    assert store.report_at("r1", seq=2).step("D2").answer == "first"
+
+
+def test_snapshots_bound_the_replay(store, report, monkeypatch):
+    monkeypatch.setattr(eightd.store, "SNAPSHOT_EVERY", 5)
+    store.save("r1", report, now=0.0)
+    for i in range(1, 13):
+        _edit(store, report, float(i), "D2", f"edit {i}")
+
+    _, snapshots = store.query("SELECT seq FROM report_snapshots WHERE report_id = ? ORDER BY seq", ("r1",))
+    assert [seq for (seq,) in snapshots] == [0, 5, 10]
+    for i in range(1, 13):
+        assert store.report_at("r1", at=float(i)).step("D2").answer == f"edit {i}"
+
+
+def test_compaction_folds_old_events_into_a_snapshot(store, report):
+    store.save("r1", report, now=100.0, user="Ann")
+    _edit(store, report, 200.0, "D2", "first")
+    _edit(store, report, 300.0, "D2", "second")
+    _edit(store, report, 400.0, "D3", "measured")
+
+    assert store.compact_events(before=350.0) == 3
+    assert [e.seq for e in store.events("r1")] == [4]
+    _, snapshots = store.query("SELECT seq FROM report_snapshots WHERE report_id = ?", ("r1",))
+    assert snapshots == [(3,)]
+
+    # History from the compaction point on is intact; before it, the folded state stands in
+    assert store.report_at("r1", at=300.0).step("D2").answer == "second"
+    latest = store.report_at("r1")
+    assert (latest.step("D2").answer, latest.step("D3").answer) == ("second", "measured")
+    assert store.report_at("r1", at=150.0) is None
+
+    # The log carries on after compaction
+    _edit(store, report, 500.0, "D2", "third")
+    assert store.report_at("r1").step("D2").answer == "third"
+
+
+def test_diff_and_replay_round_trip():
+    old = EightD(report_date="2026-10-01").to_dict()
+    new_report = EightD(report_date="2026-10-02", prepared_by="Ann")
+    new_report.step("D3").inspection_stage = ["Before shipment"]
+    new_report.whys["sys"][1] = WhyEntry("Other", "no training plan")
+    new = new_report.to_dict()
+
+    changes = history.diff(old, new)
+    assert history.replay(old, [(step, name, value) for step, name, _, _, value in changes]) == new
+    assert history.diff(new, new) == []
@@ -0,0 +1,96 @@
+from eightd import shared
+from eightd.model import WhyEntry
+
+NOW = 1_000_000.0
+
+
+def test_share_starts_every_part_at_version_one(store, report):
+    state = shared.share(store, "r1", report, "Ann", "session-a", now=NOW)
+    assert state.stamp == 1
+    assert {row.part: row.version for row in store.shared_parts("r1")} == dict.fromkeys(shared.PARTS, 1)
+    assert shared.share(store, "r1", report, "Ann", "session-a", now=NOW).stamp == 1  # sharing again changes nothing
+
+
+def test_pull_applies_other_sessions_commits(store, report):
+    state_a = shared.share(store, "r1", report, "Ann", "session-a", now=NOW)
+    report_b, state_b = shared.join(store, "r1", "session-b", now=NOW)
+    report_b.step("D2").answer = "Team of four"
+    assert shared.push(store, state_b, report_b, "Bob", now=NOW) == ["D2"]
+
+    assert shared.pull(store, state_a, report, now=NOW + 1) == ["D2"]
+    assert report.step("D2").answer == "Team of four"
+    assert shared.pull(store, state_a, report, now=NOW + 2) == []  # stamp unchanged: nothing read
+
+
+def test_stale_version_is_a_conflict(store, report):
+    state_a = shared.share(store, "r1", report, "Ann", "session-a", now=NOW)
+    report_b, state_b = shared.join(store, "r1", "session-b", now=NOW)
+    report.step("D2").answer = "Ann's team"
+    assert shared.push(store, state_a, report, "Ann", now=NOW) == ["D2"]
+
+    # B edits D2 from version 1 after A committed version 2; the lease has run out by then
+    later = NOW + shared.LEASE_SECONDS + 1
+    report_b.step("D2").answer = "Bob's team"
+    assert shared.push(store, state_b, report_b, "Bob", now=later) == []
+    conflict = state_b.conflicts["D2"]
+    assert (conflict.version, conflict.editor, conflict.fields) == (2, "Ann", ["answer"])
+    assert {row.part: row.body for row in store.shared_parts("r1")}["D2"] == shared.part_body(report, "D2")
+
+
+def test_conflict_resolution(store, report):
+    state_a = shared.share(store, "r1", report, "Ann", "session-a", now=NOW)
+    report_b, state_b = shared.join(store, "r1", "session-b", now=NOW)
+    report.step("D2").answer = "Ann's team"
+    shared.push(store, state_a, report, "Ann", now=NOW)
+    later = NOW + shared.LEASE_SECONDS + 1
+    report_b.step("D2").answer = "Bob's team"
+    shared.push(store, state_b, report_b, "Bob", now=later)
+
+    shared.keep_mine(state_b, "D2")
+    assert shared.push(store, state_b, report_b, "Bob", now=later) == ["D2"]
+    assert store.load("r1").step("D2").answer == "Bob's team"
+
+    shared.pull(store, state_a, report, now=later)  # A had no local edits left: takes Bob's
+    assert report.step("D2").answer == "Bob's team"
+
+    report.step("D2").answer = "Ann again"
+    report_b.step("D2").answer = "Bob again"
+    shared.push(store, state_a, report, "Ann", now=later + 2 * shared.LEASE_SECONDS)
+    shared.pull(store, state_b, report_b, now=later + 2 * shared.LEASE_SECONDS)
+    assert "D2" in state_b.conflicts
+    shared.take_theirs(store, state_b, report_b, "D2")
+    assert report_b.step("D2").answer == "Ann again"
+    assert "D2" not in state_b.conflicts
+
+
+def test_lease_blocks_other_sessions_until_it_runs_out(store, report):
+    state_a = shared.share(store, "r1", report, "Ann", "session-a", now=NOW)
+    report_b, state_b = shared.join(store, "r1", "session-b", now=NOW)
+    report.step("D4").answer = "Sort 2000 pcs"
+    shared.push(store, state_a, report, "Ann", now=NOW)
+
+    # B sees A's lease and does not even try to commit over it
+    shared.pull(store, state_b, report_b, now=NOW + 1)
+    assert state_b.locked_by("D4", now=NOW + 1) == "Ann"
+    assert state_b.locked_by("D4", now=NOW + shared.LEASE_SECONDS + 1) is None
+
+    # The store refuses a commit under someone else's lease, even at the current version
+    version = state_b.base["D4"][0]
+    result = store.commit_part("r1", "D4", version, '{"answer":"x"}', "Bob", "session-b", now=NOW + 1)
+    assert (result.status, result.editor) == (shared.LOCKED, "Ann")
+    result = store.commit_part(
+        "r1", "D4", version, '{"answer":"x"}', "Bob", "session-b", now=NOW + shared.LEASE_SECONDS + 1
+    )
+    assert result.status == shared.COMMITTED
+
+
+def test_why_sections_are_separate_parts(store, report):
+    state_a = shared.share(store, "r1", report, "Ann", "session-a", now=NOW)
+    report_b, state_b = shared.join(store, "r1", "session-b", now=NOW)
+    report.whys["occ"][0] = WhyEntry("occ-1.1")
+    report_b.whys["det"][0] = WhyEntry("det-1.1")
+    assert shared.push(store, state_a, report, "Ann", now=NOW) == ["D5.occ"]
+    assert shared.push(store, state_b, report_b, "Bob", now=NOW) == ["D5.det"]
+
+    stored = store.load("r1")
+    assert (stored.whys["occ"][0].item_id, stored.whys["det"][0].item_id) == ("occ-1.1", "det-1.1")